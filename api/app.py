@@ -3,33 +3,63 @@ from flask import Flask, jsonify
 from flask_cors import CORS
 import random
 import os
+import subprocess
+import sys
 
 # Import des configurations
-from api.config.openai_config import setup_openai
+from api.config.ingest_config import INGEST_ENABLED
+from api.config.json_provider import FastJSONProvider
+from api.config.persistence_config import FLEET_DATA_DIR
+from api.services.metrics_service import register_request_metrics
 
 # Import des routes
 from api.routes.equipment_routes import register_equipment_routes
 from api.routes.stats_routes import register_stats_routes
 from api.routes.ai_routes import register_ai_routes
+from api.routes.ingest_routes import register_ingest_routes
+from api.routes.metrics_routes import register_metrics_routes
+from api.routes.dashboard_routes import register_dashboard_routes
+from api.routes.stream_routes import register_stream_routes
+from api.routes.export_routes import register_export_routes
+
+def _recover():
+    """
+    Restaure l'état persisté; le service (et pandas) n'est importé qu'à la première requête
+    """
+    from api.services.persistence_service import recover
+    recover()
 
 def create_app():
     """
     Fonction factory pour créer l'application Flask
     """
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
     CORS(app)
     
     # Fixation de la seed aléatoire pour assurer la cohérence des données
     random.seed(42)
     
-    # Configuration de OpenAI
-    has_openai = setup_openai()
-    print(f"OpenAI configuré: {has_openai}")
+    # OpenAI est configuré au premier appel à l'IA, et les données au premier accès :
+    # seules les routes sont déclarées ici, leurs contrôleurs sont importés à la demande
     
     # Enregistrement des routes
     register_equipment_routes(app)
     register_stats_routes(app)
     register_ai_routes(app)
+    if INGEST_ENABLED:
+        register_ingest_routes(app)
+    register_metrics_routes(app)
+    register_dashboard_routes(app)
+    register_stream_routes(app)
+    register_export_routes(app)
+    
+    # Mesure de la durée et de la taille des réponses de chaque route
+    register_request_metrics(app)
+    
+    # Avec un répertoire de données, l'état persisté est restauré avant la première requête
+    if FLEET_DATA_DIR:
+        app.before_request(_recover)
     
     # Route pour la page d'accueil qui permet de vérifier que le serveur fonctionne
     @app.route('/', methods=['GET'])
@@ -38,8 +68,46 @@ def create_app():
     
     return app
 
-# Création de l'application
-app = create_app()
+# Objectif de durée d'un démarrage à froid (import et création de l'application), en millisecondes
+STARTUP_TARGET_MS = 200
+
+def check_startup(limit=20):
+    """
+    Mesure un démarrage à froid dans un nouveau processus et affiche la durée d'import des modules
+    les plus coûteux (python -X importtime). Retourne 0 si l'objectif de démarrage est tenu.
+    """
+    code = (
+        "import time; start = time.perf_counter(); "
+        "from api.app import create_app; create_app(); "
+        "print((time.perf_counter() - start) * 1000)"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code], cwd=root, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        return result.returncode
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, own, cumulative, name = (part.strip() for part in line.replace('import time:', '|').split('|'))
+        modules.append((int(cumulative) / 1000, int(own) / 1000, name))
+
+    print(f"{'cumulé (ms)':>12} {'propre (ms)':>12}  module")
+    for cumulative, own, name in sorted(modules, reverse=True)[:limit]:
+        print(f"{cumulative:12.1f} {own:12.1f}  {name}")
+
+    startup_ms = float(result.stdout.strip().splitlines()[-1])
+    status = 'OK' if startup_ms <= STARTUP_TARGET_MS else 'trop lent'
+    print(f"Démarrage à froid: {startup_ms:.0f} ms (objectif {STARTUP_TARGET_MS} ms) - {status}")
+    return 0 if startup_ms <= STARTUP_TARGET_MS else 1
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0')
+    if '--check' in sys.argv:
+        sys.exit(check_startup())
+    # Serveur de développement uniquement; en production : gunicorn -c api/gunicorn.conf.py
+    app = create_app()
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', host='0.0.0.0')
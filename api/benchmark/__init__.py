@@ -0,0 +1,2 @@
+
+# Initialisation du package benchmark (mesure des performances de l'API sur des parcs synthétiques)
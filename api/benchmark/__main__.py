@@ -0,0 +1,97 @@
+# Banc d'essai de l'API : python -m api.benchmark --profile 100k --output resultats.json
+import argparse
+import json
+import platform
+import sys
+import time
+
+from api.benchmark.runner import compare, load_fleet, run_http, run_local, select_requests
+from api.benchmark.synthetic import PROFILES, SyntheticFleet
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m api.benchmark', description="Mesure les performances de chaque route de l'API")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='1k', help="taille du parc synthétique")
+    parser.add_argument('--engines', type=int, help="nombre d'engins (remplace celui du profil)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--requests', type=int, default=50, help="requêtes mesurées par route")
+    parser.add_argument('--only', action='append', help="ne mesure que les routes dont le nom contient cette valeur")
+    parser.add_argument('--cold', action='store_true', help="vide le cache des réponses avant chaque requête")
+    parser.add_argument('--url', help="mesure un serveur en fonctionnement au lieu du client de test Flask")
+    parser.add_argument('--concurrency', type=int, default=8, help="connexions simultanées en mode HTTP")
+    parser.add_argument('--serve', type=int, metavar='PORT', help="charge le parc puis sert l'API sur ce port (cible de --url)")
+    parser.add_argument('--real-ai', action='store_true',
+                        help="appelle l'API OpenAI (par défaut les réponses de l'IA sont simulées, pour des mesures comparables)")
+    parser.add_argument('--output', help="fichier JSON des résultats")
+    parser.add_argument('--compare', help="fichier JSON d'une exécution précédente à comparer")
+    return parser.parse_args(argv)
+
+
+def build_fleet(args):
+    if args.engines:
+        profile = dict(PROFILES[args.profile], engines=args.engines)
+        return SyntheticFleet(seed=args.seed, **profile)
+    return SyntheticFleet.from_profile(args.profile, seed=args.seed)
+
+
+def print_results(results):
+    print(f"{'route':<26} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'octets':>10} {'pic KiB':>9}")
+    for name, result in results.items():
+        peak = result['peak_kib'] if result['peak_kib'] is not None else '-'
+        print(f"{name:<26} {result['throughput_rps']:>9} {result['p50_ms']:>9} {result['p95_ms']:>9} "
+              f"{result['p99_ms']:>9} {result['max_ms']:>9} {result['bytes']:>10} {peak:>9}"
+              + (f"  ({result['errors']} erreurs)" if result['errors'] else ''))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    fleet = build_fleet(args)
+    requests = select_requests(args.only)
+    report = {
+        'profile': args.profile,
+        'engines': fleet.engines,
+        'tagReads': fleet.reads,
+        'stockMovements': fleet.movements,
+        'mode': 'http' if args.url else 'local',
+        'cold': args.cold,
+        'ai': 'openai' if args.real_ai else 'simulation',
+        'python': platform.python_version(),
+        'startedAt': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+    if args.url:
+        # Le serveur doit déjà contenir le parc (python -m api.benchmark --serve PORT, IA simulée sauf --real-ai)
+        report['endpoints'] = run_http(args.url, requests, args.requests, args.concurrency)
+    else:
+        from api.app import create_app
+        from api.config.openai_config import use_simulation
+
+        # Sans --real-ai, /api/analyze-with-ai mesure la réponse simulée et non le réseau
+        if not args.real_ai:
+            use_simulation()
+        app = create_app()
+        print(f"Chargement de {fleet.engines} engins, {fleet.reads} lectures et {fleet.movements} mouvements...")
+        report['setup'] = load_fleet(fleet)
+        print(json.dumps(report['setup']))
+        if args.serve:
+            app.run(host='0.0.0.0', port=args.serve, threaded=True)
+            return 0
+        report['endpoints'] = run_local(app, requests, args.requests, args.cold)
+
+    print_results(report['endpoints'])
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        print(f"\nÉcart relatif (%) avec {args.compare}")
+        for row in compare(report, previous):
+            print(f"{row.pop('endpoint'):<26} " + ' '.join(f'{field}={value:+}' for field, value in row.items()))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
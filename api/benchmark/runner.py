@@ -0,0 +1,222 @@
+# Exécution des mesures : chargement d'un parc synthétique et requêtes sur chaque route
+import http.client
+import json
+import threading
+import time
+import tracemalloc
+from urllib.parse import urlsplit
+
+import numpy as np
+
+# Requêtes mesurées : nom -> (méthode, chemin, corps JSON)
+BENCHMARK_REQUESTS = {
+    'equipment': ('GET', '/api/equipment', None),
+    'equipment-page': ('GET', '/api/equipment?limit=100', None),
+    'equipment-filtered': ('GET', '/api/equipment?status=Maintenance&fields=id,name,location&limit=1000', None),
+    'equipment-ndjson': ('GET', '/api/equipment?format=ndjson', None),
+    'status-distribution': ('GET', '/api/status-distribution', None),
+    'zone-distribution': ('GET', '/api/zone-distribution', None),
+    'type-distribution': ('GET', '/api/distribution/type', None),
+    'stats': ('GET', '/api/stats', None),
+    'monthly-data': ('GET', '/api/monthly-data', None),
+    'analytical-data': ('GET', '/api/analytical-data', None),
+    'ai-predictions': ('GET', '/api/ai-predictions', None),
+    'equipment-presence': ('GET', '/api/equipment-presence', None),
+    'client-ranking': ('GET', '/api/client-ranking?limit=10', None),
+    'client-ranking-distance': ('GET', '/api/client-ranking?metric=distance&limit=10', None),
+    'equipment-usage': ('GET', '/api/equipment-usage', None),
+    'stock-analysis': ('GET', '/api/stock-analysis', None),
+    'stock-analysis-hourly': ('GET', '/api/stock-analysis?bucket=hour', None),
+    'stock-analysis-monthly': ('GET', '/api/stock-analysis?period=monthly', None),
+    'client-visits': ('GET', '/api/client-visits', None),
+    'export-stock-csv': ('GET', '/api/export/stock-movements?format=csv', None),
+    'export-presence-ndjson': ('GET', '/api/export/presence-history?format=ndjson', None),
+    'cache-stats': ('GET', '/api/cache-stats', None),
+    'dashboard-presence': ('GET', '/api/dashboard-stats?type=equipment-presence', None),
+    'dashboard-ranking': ('GET', '/api/dashboard-stats?type=client-ranking', None),
+    'dashboard-usage': ('GET', '/api/dashboard-stats?type=equipment-usage', None),
+    'dashboard-overview': ('GET', '/api/dashboard/overview', None),
+    'dashboard-presence-page': ('GET', '/api/dashboard/equipment-presence', None),
+    'dashboard-ranking-page': ('GET', '/api/dashboard/client-ranking', None),
+    'dashboard-usage-page': ('GET', '/api/dashboard/equipment-usage', None),
+    'dashboard-stock-page': ('GET', '/api/dashboard/stock-analysis', None),
+    'analyze-with-ai': ('POST', '/api/analyze-with-ai', {'prompt': "Analyse de l'utilisation des engins"}),
+    'metrics': ('GET', '/api/metrics', None),
+}
+
+def select_requests(only=None):
+    """
+    Filtre les requêtes mesurées sur une liste de sous-chaînes de leur nom
+    """
+    if not only:
+        return dict(BENCHMARK_REQUESTS)
+    return {name: spec for name, spec in BENCHMARK_REQUESTS.items() if any(part in name for part in only)}
+
+
+def summarize(latencies, wall, sizes, errors, peak_bytes=None):
+    """
+    Débit, percentiles de latence (ms), taille moyenne des réponses et pic mémoire d'une série de requêtes
+    """
+    values = np.asarray(latencies) * 1000
+    result = {
+        'requests': len(values),
+        'errors': errors,
+        'throughput_rps': round(len(values) / wall, 1) if wall else None,
+        'mean_ms': round(float(values.mean()), 3) if len(values) else None,
+        'bytes': int(np.mean(sizes)) if sizes else 0,
+    }
+    for q in (50, 95, 99):
+        result[f'p{q}_ms'] = round(float(np.percentile(values, q)), 3) if len(values) else None
+    result['max_ms'] = round(float(values.max()), 3) if len(values) else None
+    result['peak_kib'] = round(peak_bytes / 1024, 1) if peak_bytes is not None else None
+    return result
+
+
+def _timed(label, ingest, rows):
+    start = time.perf_counter()
+    result = ingest(rows)
+    elapsed = time.perf_counter() - start
+    accepted = result['accepted']
+    return label, {
+        'rows': accepted,
+        'rejected': result['rejected'],
+        'seconds': round(elapsed, 3),
+        'rows_per_s': round(accepted / elapsed, 1) if elapsed else None,
+    }
+
+
+def load_fleet(fleet):
+    """
+    Remplace les données de l'application par le parc synthétique et ingère ses événements.
+    Retourne les durées de chargement et d'ingestion.
+    """
+    from api.models import data
+    from api.models.repository import reset_data, preload_data
+    from api.models.store import ColumnarStore
+    from api.services.cache_service import response_cache
+    from api.services.ingest_service import ingest_stock_movements, ingest_tag_reads
+
+    start = time.perf_counter()
+    equipments = fleet.equipments()
+    store = ColumnarStore()
+    store.load('equipments', equipments)
+    store.load('tags', fleet.tags())
+    store.load('status_changes', fleet.status_changes(equipments))
+    store.load('client_visits', fleet.client_visits())
+    store.load('monthly_data', data.monthly_data)
+    store.load('analytical_data', data.analytical_data)
+    store.load('ai_predictions', data.ai_predictions)
+    reset_data(store)
+    preload_data()
+    response_cache.invalidate()
+    setup = {'load_s': round(time.perf_counter() - start, 3)}
+
+    setup.update([
+        _timed('tag_reads', ingest_tag_reads, fleet.tag_reads()),
+        _timed('stock_movements', ingest_stock_movements, fleet.stock_movements()),
+    ])
+    preload_data()
+    return setup
+
+
+def run_local(app, requests, count, cold=False):
+    """
+    Mesure chaque requête via le client de test Flask (sans réseau).
+    En mode cold, le cache des réponses est vidé avant chaque requête.
+    """
+    from api.services.cache_service import response_cache
+
+    client = app.test_client()
+    results = {}
+    for name, (method, path, body) in requests.items():
+        def send():
+            response = client.open(path, method=method, json=body)
+            payload = response.get_data()
+            response.close()
+            return response.status_code, len(payload)
+
+        send()
+
+        # Pic mémoire mesuré sur une requête isolée, tracemalloc ralentissant fortement l'exécution
+        response_cache.invalidate()
+        tracemalloc.start()
+        send()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        latencies, sizes, errors = [], [], 0
+        wall_start = time.perf_counter()
+        for _ in range(count):
+            if cold:
+                response_cache.invalidate()
+            start = time.perf_counter()
+            status, size = send()
+            latencies.append(time.perf_counter() - start)
+            sizes.append(size)
+            errors += status >= 400
+        results[name] = summarize(latencies, time.perf_counter() - wall_start, sizes, errors, peak)
+    return results
+
+
+def _connection(url):
+    parts = urlsplit(url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    return connection_class(parts.hostname, parts.port, timeout=60), parts.path.rstrip('/')
+
+
+def run_http(url, requests, count, concurrency=8):
+    """
+    Mesure chaque requête contre un serveur en fonctionnement, avec plusieurs connexions persistantes
+    """
+    results = {}
+    for name, (method, path, body) in requests.items():
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        latencies, sizes, errors = [], [], [0]
+        lock = threading.Lock()
+        per_worker = [count // concurrency + (index < count % concurrency) for index in range(concurrency)]
+
+        def worker(requests_to_send):
+            connection, prefix = _connection(url)
+            local_latencies, local_sizes, local_errors = [], [], 0
+            try:
+                for _ in range(requests_to_send):
+                    start = time.perf_counter()
+                    connection.request(method, prefix + path, body=payload, headers=headers)
+                    response = connection.getresponse()
+                    size = len(response.read())
+                    local_latencies.append(time.perf_counter() - start)
+                    local_sizes.append(size)
+                    local_errors += response.status >= 400
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(local_latencies)
+                sizes.extend(local_sizes)
+                errors[0] += local_errors
+
+        threads = [threading.Thread(target=worker, args=(number,)) for number in per_worker if number]
+        wall_start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        results[name] = summarize(latencies, time.perf_counter() - wall_start, sizes, errors[0])
+    return results
+
+
+def compare(current, previous):
+    """
+    Compare les percentiles et le débit de deux exécutions, route par route
+    """
+    rows = []
+    for name, result in current['endpoints'].items():
+        before = previous.get('endpoints', {}).get(name)
+        if not before:
+            continue
+        row = {'endpoint': name}
+        for field in ('p50_ms', 'p95_ms', 'throughput_rps'):
+            if result.get(field) is not None and before.get(field):
+                row[field] = round((result[field] - before[field]) * 100 / before[field], 1)
+        rows.append(row)
+    return rows
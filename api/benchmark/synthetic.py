@@ -0,0 +1,131 @@
+# Génération de parcs synthétiques, au format des données de api.models.data
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from api.models.data import REFERENCE_DATE
+
+# Tailles de parc prédéfinies : nombre d'engins et volumes d'événements par engin
+PROFILES = {
+    '1k': {'engines': 1_000, 'reads_per_engine': 20, 'movements_per_engine': 5},
+    '100k': {'engines': 100_000, 'reads_per_engine': 5, 'movements_per_engine': 1},
+    '1m': {'engines': 1_000_000, 'reads_per_engine': 1, 'movements_per_engine': 0.2},
+}
+
+TYPES = ['Bulldozer', 'Excavatrice', 'Chargeuse', 'Compacteur', 'Grue']
+TYPE_CODES = ['BX', 'EX', 'CL', 'CP', 'GR']
+STATUSES = ['Actif', 'Maintenance', 'Inactif']
+STATUS_WEIGHTS = [0.7, 0.1, 0.2]
+LOCATIONS = ['Zone A', 'Zone B', 'Zone C', 'Atelier', 'Entrepôt']
+
+# Proportion de tags en stock (non affectés) et d'engins par client
+SPARE_TAG_RATIO = 0.2
+ENGINES_PER_CLIENT = 200
+
+# Fenêtre couverte par les événements générés, en jours avant la date de référence
+HISTORY_DAYS = 30
+
+# Point de départ des trajectoires GPS et pas maximal entre deux lectures (degrés)
+BASE_POSITION = (48.85, 2.35)
+GPS_STEP = 0.002
+
+
+class SyntheticFleet:
+    """
+    Parc synthétique reproductible : tables initiales (DataFrames) et flux d'événements (dictionnaires)
+    """
+
+    def __init__(self, engines, reads_per_engine=5, movements_per_engine=1, seed=42):
+        self.engines = int(engines)
+        self.reads = int(self.engines * reads_per_engine)
+        self.movements = int(self.engines * movements_per_engine)
+        self.clients = [f'Client {index}' for index in range(1, max(5, self.engines // ENGINES_PER_CLIENT) + 1)]
+        self.seed = seed
+        self.reference = datetime.fromisoformat(REFERENCE_DATE) + timedelta(days=1)
+
+    @classmethod
+    def from_profile(cls, name, seed=42):
+        return cls(seed=seed, **PROFILES[name])
+
+    def _rng(self, stream):
+        return np.random.default_rng([self.seed, stream])
+
+    def equipments(self):
+        rng = self._rng(1)
+        ids = np.arange(1, self.engines + 1)
+        types = rng.integers(0, len(TYPES), self.engines)
+        names = [f'{TYPES[kind]} {TYPE_CODES[kind]}-{number}' for kind, number in zip(types.tolist(), ids.tolist())]
+        last_used = self.reference - pd.to_timedelta(rng.integers(1, HISTORY_DAYS + 1, self.engines), unit='D')
+        return pd.DataFrame({
+            'id': ids,
+            'name': names,
+            'type': np.array(TYPES, dtype=object)[types],
+            'status': rng.choice(STATUSES, self.engines, p=STATUS_WEIGHTS),
+            'location': rng.choice(LOCATIONS, self.engines),
+            'client': rng.choice(self.clients, self.engines),
+            'lastUsed': last_used.normalize(),
+            'onSite': rng.random(self.engines) < 0.8,
+        })
+
+    def tags(self):
+        rng = self._rng(2)
+        count = int(self.engines * (1 + SPARE_TAG_RATIO))
+        battery = np.round(rng.uniform(5, 100, count), 1)
+        equipment_ids = pd.array(np.arange(1, count + 1), dtype='Int64')
+        equipment_ids[self.engines:] = pd.NA
+        return pd.DataFrame({
+            'tagId': [f'TAG-{number:07d}' for number in range(1, count + 1)],
+            'equipmentId': equipment_ids,
+            'battery': battery,
+            'needsMaintenance': battery < 20,
+        })
+
+    def status_changes(self, equipments):
+        return equipments[['id', 'lastUsed', 'status']].rename(columns={'lastUsed': 'ts'})
+
+    def client_visits(self):
+        rng = self._rng(3)
+        elapsed = rng.integers(0, HISTORY_DAYS, len(self.clients))
+        return pd.DataFrame({
+            'client': self.clients,
+            'visitCount': rng.integers(1, 40, len(self.clients)),
+            'lastVisit': (self.reference - timedelta(days=1) - pd.to_timedelta(elapsed, unit='D')).normalize(),
+        })
+
+    def tag_reads(self):
+        """
+        Lectures de tags triées par date : lectures simples avec position GPS, entrées et sorties chez les clients
+        """
+        rng = self._rng(4)
+        equipment = rng.integers(1, self.engines + 1, self.reads)
+        offsets = np.sort(rng.uniform(0, HISTORY_DAYS * 86400, self.reads))
+        ts = self.reference - pd.to_timedelta(HISTORY_DAYS * 86400 - offsets, unit='s')
+        lat = BASE_POSITION[0] + rng.uniform(-GPS_STEP, GPS_STEP, self.reads) + (equipment % 100) * 0.01
+        lon = BASE_POSITION[1] + rng.uniform(-GPS_STEP, GPS_STEP, self.reads) + (equipment // 100 % 100) * 0.01
+        events = rng.choice(['read', 'enter', 'exit'], self.reads, p=[0.8, 0.1, 0.1])
+        clients = rng.choice(self.clients, self.reads)
+        battery = np.round(rng.uniform(5, 100, self.reads), 1)
+        for row in zip(equipment.tolist(), ts.strftime('%Y-%m-%dT%H:%M:%S').tolist(), events.tolist(),
+                       clients.tolist(), battery.tolist(), lat.tolist(), lon.tolist()):
+            equipment_id, timestamp, event, client, level, latitude, longitude = row
+            read = {'tagId': f'TAG-{equipment_id:07d}', 'equipmentId': equipment_id, 'ts': timestamp,
+                    'event': event, 'battery': level, 'lat': latitude, 'lon': longitude}
+            if event != 'read':
+                read['client'] = client
+            yield read
+
+    def stock_movements(self):
+        rng = self._rng(5)
+        offsets = np.sort(rng.uniform(0, HISTORY_DAYS * 86400, self.movements))
+        ts = self.reference - pd.to_timedelta(HISTORY_DAYS * 86400 - offsets, unit='s')
+        directions = rng.choice(['in', 'out'], self.movements)
+        quantities = rng.integers(1, 20, self.movements)
+        storage = np.round(rng.uniform(0.5, 10, self.movements), 1)
+        for timestamp, direction, quantity, storage_time in zip(
+            ts.strftime('%Y-%m-%dT%H:%M:%S').tolist(), directions.tolist(), quantities.tolist(), storage.tolist()
+        ):
+            movement = {'ts': timestamp, 'direction': direction, 'quantity': quantity}
+            if direction == 'out':
+                movement['storageTime'] = storage_time
+            yield movement
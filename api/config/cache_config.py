@@ -0,0 +1,29 @@
+
+import os
+
+# Configuration du cache des réponses de l'API
+
+# Nombre maximal de réponses conservées (les moins récemment utilisées sont évincées)
+CACHE_MAX_ENTRIES = int(os.environ.get('API_CACHE_MAX_ENTRIES', '512'))
+
+# Durée de vie par défaut d'une réponse en cache, en secondes
+CACHE_DEFAULT_TTL = float(os.environ.get('API_CACHE_DEFAULT_TTL', '30'))
+
+# Durées de vie par point d'entrée (nom de la route Flask), en secondes
+CACHE_TTLS = {
+    'get_equipment': 10,
+    'get_status_distribution': 5,
+    'get_zone_distribution': 5,
+    'get_distribution': 5,
+    'get_stats': 5,
+    'get_monthly_data': 300,
+    'get_analytical_data': 300,
+    'get_ai_predictions': 300,
+    'get_equipment_presence': 30,
+    'get_client_ranking': 30,
+    'get_equipment_usage': 30,
+    'get_stock_analysis': 60,
+    'get_client_visits': 30,
+    'get_dashboard_stats': 30,
+    'get_dashboard': 5,
+}
@@ -0,0 +1,9 @@
+import os
+
+# Configuration de l'ingestion des événements du parc (/api/ingest/*)
+
+# Routes d'ingestion actives (serveur de développement par défaut). Les compteurs, agrégats,
+# flux en direct et le journal des écritures étant propres à chaque processus, l'ingestion impose
+# un seul worker gunicorn; gunicorn.conf.py la désactive par défaut (rôle web en lecture seule,
+# un worker par cœur).
+INGEST_ENABLED = os.environ.get('INGEST_ENABLED', '1') == '1'
@@ -0,0 +1,25 @@
+
+from flask.json.provider import DefaultJSONProvider
+
+# Encodeur JSON rapide, utilisé seulement s'il est installé
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Fournisseur JSON de Flask utilisant orjson quand il est disponible
+    """
+
+    def dumps(self, obj, **kwargs):
+        # orjson produit toujours un JSON compact : l'indentation reste gérée par l'encodeur standard
+        if orjson is None or kwargs.get('indent') is not None:
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+        except TypeError:
+            return super().dumps(obj, **kwargs)
@@ -1,11 +1,61 @@
-
 import os
 import sys
+import threading
+
+# Modèle et paramètres des appels à l'API OpenAI
+OPENAI_MODEL = os.environ.get('OPENAI_MODEL', 'gpt-4o')
+
+# URL de base de l'API (permet de cibler un serveur local de substitution pour les tests)
+OPENAI_BASE_URL = os.environ.get('OPENAI_BASE_URL') or None
+
+# Délai maximal d'attente d'une réponse, en secondes, avant de basculer en mode simulation
+OPENAI_TIMEOUT = float(os.environ.get('OPENAI_TIMEOUT', '15'))
+
+# Nombre maximal d'appels simultanés vers l'API
+OPENAI_MAX_CONCURRENCY = int(os.environ.get('OPENAI_MAX_CONCURRENCY', '8'))
+
+# Cache des réponses de l'IA : durée de vie (secondes) et nombre maximal de prompts conservés
+AI_CACHE_TTL = float(os.environ.get('AI_CACHE_TTL', '600'))
+AI_CACHE_MAX_ENTRIES = int(os.environ.get('AI_CACHE_MAX_ENTRIES', '256'))
+
+_client = None
+_configured = False
+_setup_lock = threading.Lock()
 
 # Configuration de OpenAI
 def setup_openai():
     """
-    Configure l'environnement OpenAI
+    Configure l'environnement OpenAI une seule fois et crée le client partagé
+    (une connexion HTTP réutilisée par tous les appels)
+    """
+    global _client, _configured
+    with _setup_lock:
+        if _configured:
+            return _client is not None
+        _configured = True
+        _client = _create_client()
+        return _client is not None
+
+def use_simulation():
+    """
+    Force le mode simulation : aucun appel à l'API OpenAI (mesures reproductibles du banc d'essai)
+    """
+    global _client, _configured
+    with _setup_lock:
+        _client = None
+        _configured = True
+
+def get_openai_client():
+    """
+    Retourne le client OpenAI partagé, ou None en mode simulation
+    """
+    if not _configured:
+        setup_openai()
+    return _client
+
+def _create_client():
+    """
+    Charge la clé API et construit le client OpenAI, ou retourne None si elle est indisponible
     """
     try:
         # Charger les variables d'environnement depuis .env de manière plus robuste
@@ -13,7 +63,7 @@ def setup_openai():
             from dotenv import load_dotenv
             # Affichage du répertoire courant pour le débogage
             print(f"Répertoire courant: {os.getcwd()}")
-            
+
             # Essayer de charger à partir de différents chemins potentiels
             dotenv_paths = [
                 '.env',
@@ -21,7 +71,7 @@ def setup_openai():
                 '../api/.env',
                 os.path.join(os.path.dirname(__file__), '../../.env')
             ]
-            
+
             dotenv_loaded = False
             for dotenv_path in dotenv_paths:
                 if os.path.exists(dotenv_path):
@@ -29,7 +79,7 @@ def setup_openai():
                     load_dotenv(dotenv_path=dotenv_path)
                     dotenv_loaded = True
                     break
-            
+
             if dotenv_loaded:
                 print("dotenv chargé avec succès")
             else:
@@ -41,20 +91,26 @@ def setup_openai():
         # Vérifier que la clé API est bien chargée
         openai_api_key = os.environ.get('OPENAI_API_KEY')
         print(f"Tentative de chargement de la clé API: {'Clé trouvée' if openai_api_key else 'Clé non trouvée'}")
-        
+
         # Configuration de OpenAI si disponible, sinon mode simulation
         if openai_api_key:
             try:
                 import openai
-                openai.api_key = openai_api_key
+                # Les nouvelles tentatives sont désactivées : le délai reste borné par OPENAI_TIMEOUT
+                client = openai.OpenAI(
+                    api_key=openai_api_key,
+                    base_url=os.environ.get('OPENAI_BASE_URL') or OPENAI_BASE_URL,
+                    timeout=OPENAI_TIMEOUT,
+                    max_retries=0,
+                )
                 print("Clé API OpenAI configurée avec succès!")
-                return True
+                return client
             except ImportError:
                 print("Module OpenAI non installé. Veuillez l'installer avec 'pip install openai'")
-                return False
+                return None
         else:
             print("AVERTISSEMENT: Clé API OpenAI non configurée. Mode de simulation activé.")
-            return False
+            return None
     except Exception as e:
         print(f"Erreur lors de la configuration d'OpenAI: {str(e)}")
-        return False
+        return None
@@ -0,0 +1,18 @@
+import os
+
+# Configuration de la persistance de l'état du parc (journal des écritures et instantanés)
+
+# Répertoire des données persistées; sans valeur, l'état reste uniquement en mémoire
+FLEET_DATA_DIR = os.environ.get('FLEET_DATA_DIR') or None
+
+# Synchronisation sur disque (fsync) de chaque lot journalisé avant de l'appliquer
+WAL_FSYNC = os.environ.get('WAL_FSYNC', '1') == '1'
+
+# Un instantané est écrit lorsque le journal dépasse cette taille (octets) ...
+SNAPSHOT_WAL_BYTES = int(os.environ.get('SNAPSHOT_WAL_MB', '64')) * 1024 * 1024
+
+# ... ou lorsque cette durée (secondes) s'est écoulée depuis le précédent avec des écritures entre-temps
+SNAPSHOT_INTERVAL = float(os.environ.get('SNAPSHOT_INTERVAL', '300'))
+
+# Nombre d'instantanés conservés
+SNAPSHOT_KEEP = int(os.environ.get('SNAPSHOT_KEEP', '2'))
@@ -0,0 +1,15 @@
+import os
+
+# Configuration du stockage des tables du parc
+
+# Moteur de stockage : 'memory' (tables pandas en mémoire) ou 'sqlite' (base locale, déploiement mono-serveur)
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'memory').lower()
+
+# Fichier de la base SQLite
+SQLITE_PATH = os.environ.get('SQLITE_PATH', 'fleet.db')
+
+# Attente maximale (secondes) d'un verrou d'écriture tenu par une autre connexion
+SQLITE_BUSY_TIMEOUT = float(os.environ.get('SQLITE_BUSY_TIMEOUT', '5'))
+
+# Requêtes préparées conservées par connexion (réutilisées d'une requête HTTP à l'autre)
+SQLITE_CACHED_STATEMENTS = int(os.environ.get('SQLITE_CACHED_STATEMENTS', '256'))
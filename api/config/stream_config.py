@@ -0,0 +1,14 @@
+import os
+
+# Configuration des flux de mises à jour en direct (/api/stream)
+
+# Intervalle minimal entre deux diffusions, en secondes : les écritures rapprochées sont regroupées
+STREAM_MIN_INTERVAL = float(os.environ.get('STREAM_MIN_INTERVAL', '1'))
+
+# Délai sans événement après lequel un commentaire de maintien est envoyé, en secondes
+STREAM_HEARTBEAT = float(os.environ.get('STREAM_HEARTBEAT', '15'))
+
+# Abonnés simultanés par processus. Avec les workers gthread, chaque abonné occupe un thread
+# pendant toute la durée de sa connexion (en attente, sans calcul) : gunicorn.conf.py ajoute
+# autant de threads aux GUNICORN_THREADS réservés aux autres requêtes
+STREAM_MAX_SUBSCRIBERS = int(os.environ.get('STREAM_MAX_SUBSCRIBERS', '64'))
@@ -1,14 +1,73 @@
 
-from flask import jsonify, request
+from flask import Response, current_app, jsonify, request
 import sys
 import os
-from api.services.ai_service import generate_simulated_ai_response, create_visualizations, generate_recommendations
-from api.config.openai_config import setup_openai
-import openai
+from api.services.metrics_service import metrics
+from api.services.ai_service import (
+    complete_prompt, stream_completion, iter_text_chunks, classify_prompt,
+    generate_simulated_ai_response, create_visualizations, generate_recommendations
+)
+
+def _wants_stream():
+    """
+    Le client demande un flux d'événements (paramètre stream=1 ou en-tête Accept: text/event-stream)
+    """
+    if request.args.get('stream', '').lower() in ('1', 'true'):
+        return True
+    return request.accept_mimetypes.best == 'text/event-stream'
+
+def _sse(dumps, event, data):
+    """
+    Formate un événement server-sent events
+    """
+    return f"event: {event}\ndata: {dumps(data)}\n\n"
+
+def _stream_analysis(prompt, dumps):
+    """
+    Diffuse d'abord les graphiques et recommandations, puis le texte de l'IA fragment par fragment,
+    et termine par la réponse complète. Le mode simulation est diffusé de la même manière.
+    """
+    intents = classify_prompt(prompt)
+    custom_insights = create_visualizations(prompt, intents)
+    recommendations = generate_recommendations(prompt, intents)
+    yield _sse(dumps, 'insights', {"customInsights": custom_insights, "recommendations": recommendations})
+
+    ai_remarks = None
+    tokens = stream_completion(prompt)
+    if tokens is not None:
+        parts = []
+        try:
+            for delta in tokens:
+                parts.append(delta)
+                yield _sse(dumps, 'token', {"delta": delta})
+        except Exception as e:
+            print(f"Erreur lors de l'appel à l'API OpenAI: {str(e)}")
+            if not parts:
+                metrics.increment('ai_fallbacks_total', (('reason', 'error'),))
+        if parts:
+            ai_remarks = [
+                ''.join(parts),
+                "Analyse réalisée avec l'API OpenAI",
+                "Explorez les graphiques générés pour visualiser les données"
+            ]
+
+    if ai_remarks is None:
+        print("Mode simulation activé pour l'analyse IA")
+        ai_remarks = generate_simulated_ai_response(prompt, intents)
+        for delta in iter_text_chunks(ai_remarks[0]):
+            yield _sse(dumps, 'token', {"delta": delta})
+
+    yield _sse(dumps, 'done', {
+        "response": " ".join(ai_remarks),
+        "remarks": ai_remarks,
+        "recommendations": recommendations,
+        "customInsights": custom_insights
+    })
 
 def analyze_with_ai_controller():
     """
-    Contrôleur pour analyser les données avec l'IA
+    Contrôleur pour analyser les données avec l'IA.
+    Avec stream=1 (ou Accept: text/event-stream), la réponse est diffusée en server-sent events.
     """
     try:
         data = request.json
@@ -16,50 +75,33 @@ def analyze_with_ai_controller():
         
         print(f"Prompt reçu: {prompt}")
         
-        # Vérifier si OpenAI est configuré
-        has_openai = setup_openai()
+        if _wants_stream():
+            response = Response(_stream_analysis(prompt, current_app.json.dumps), mimetype='text/event-stream')
+            response.headers['Cache-Control'] = 'no-cache'
+            # Désactive la mise en tampon des proxys (nginx) pour transmettre chaque événement immédiatement
+            response.headers['X-Accel-Buffering'] = 'no'
+            return response
         
-        if has_openai:
-            try:
-                print("Utilisation de l'API OpenAI pour l'analyse")
-                
-                # Appel à l'API OpenAI
-                response = openai.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[
-                        {"role": "system", "content": "Tu es un assistant spécialisé dans l'analyse de données pour une entreprise de gestion d'équipements. Tu dois analyser les données et générer des visualisations pertinentes."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.7,
-                    max_tokens=800
-                )
-                
-                ai_response = response.choices[0].message.content
-                
-                # Générer des remarques basées sur la réponse de l'IA
-                ai_remarks = [
-                    ai_response,
-                    "Analyse réalisée avec l'API OpenAI",
-                    "Explorez les graphiques générés pour visualiser les données"
-                ]
-                
-                # Générer des visualisations personnalisées basées sur le prompt
-                custom_insights = create_visualizations(prompt)
-                recommendations = generate_recommendations(prompt)
-                
-            except Exception as e:
-                print(f"Erreur lors de l'appel à l'API OpenAI: {str(e)}")
-                print("Utilisation du mode simulation comme fallback")
-                
-                # En cas d'erreur avec OpenAI, utiliser le mode simulation
-                ai_remarks = generate_simulated_ai_response(prompt)
-                custom_insights = create_visualizations(prompt)
-                recommendations = generate_recommendations(prompt)
+        # Intentions du prompt, détectées une seule fois pour tous les générateurs
+        intents = classify_prompt(prompt)
+        
+        # Réponse de l'API OpenAI (cache, appel partagé, délai borné); None en mode simulation
+        ai_response = complete_prompt(prompt)
+        
+        if ai_response is not None:
+            # Générer des remarques basées sur la réponse de l'IA
+            ai_remarks = [
+                ai_response,
+                "Analyse réalisée avec l'API OpenAI",
+                "Explorez les graphiques générés pour visualiser les données"
+            ]
         else:
-            print("Mode simulation activé pour l'analyse IA (OpenAI non configuré)")
-            ai_remarks = generate_simulated_ai_response(prompt)
-            custom_insights = create_visualizations(prompt)
-            recommendations = generate_recommendations(prompt)
+            print("Mode simulation activé pour l'analyse IA")
+            ai_remarks = generate_simulated_ai_response(prompt, intents)
+        
+        # Générer des visualisations personnalisées basées sur le prompt
+        custom_insights = create_visualizations(prompt, intents)
+        recommendations = generate_recommendations(prompt, intents)
         
         # Construire la réponse
         response = {
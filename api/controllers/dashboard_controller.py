@@ -0,0 +1,28 @@
+from flask import jsonify, request
+from api.services.cache_service import cached_response
+from api.services.dashboard_service import DASHBOARD_TILES, dashboard_tables, get_dashboard
+
+def _dashboard_response(dashboard_type):
+    """
+    Construit la réponse d'un tableau de bord (paramètre tiles facultatif : tuiles séparées par des virgules)
+    """
+    tiles = [tile.strip() for tile in request.args.get('tiles', '').split(',') if tile.strip()]
+    try:
+        return jsonify(get_dashboard(dashboard_type, tiles))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+# Une vue en cache par tableau de bord, invalidée par les seules tables lues par ses tuiles
+DASHBOARD_VIEWS = {
+    dashboard_type: cached_response(depends_on=dashboard_tables(dashboard_type))(_dashboard_response)
+    for dashboard_type in DASHBOARD_TILES
+}
+
+def get_dashboard_controller(dashboard_type):
+    """
+    Contrôleur pour obtenir en une seule requête toutes les données d'un tableau de bord
+    """
+    view = DASHBOARD_VIEWS.get(dashboard_type)
+    if view is None:
+        return jsonify({"error": f"Tableau de bord inconnu: {dashboard_type}"}), 400
+    return view(dashboard_type)
@@ -1,21 +1,78 @@
 
-from flask import jsonify
-from api.services.equipment_service import get_equipment_list, get_status_distribution, get_zone_distribution
+from flask import Response, current_app, jsonify, request
+from api.services.cache_service import cached_response
+from api.services.equipment_service import (
+    get_equipment_list, get_status_distribution, get_zone_distribution, get_distribution,
+    query_equipments, iter_equipment_records, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+)
 
+def _list_arg(name):
+    """
+    Lit un paramètre de requête sous forme de liste (valeurs séparées par des virgules)
+    """
+    values = [value.strip() for raw in request.args.getlist(name) for value in raw.split(',')]
+    return [value for value in values if value]
+
+@cached_response(depends_on=('equipments',))
 def get_equipment():
     """
-    Contrôleur pour obtenir la liste des équipements
+    Contrôleur pour obtenir la liste des équipements.
+    Paramètres facultatifs : status, location, fields, cursor, limit et format=ndjson (flux).
     """
-    return jsonify(get_equipment_list())
+    paginated = 'cursor' in request.args or 'limit' in request.args
+    streamed = request.args.get('format') == 'ndjson'
+    if not paginated and not streamed and not request.args:
+        return jsonify(get_equipment_list())
+
+    try:
+        limit = request.args.get('limit', type=int)
+        if limit is None and paginated and not streamed:
+            limit = DEFAULT_PAGE_SIZE
+        if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit doit être compris entre 1 et {MAX_PAGE_SIZE}")
+        frame, next_cursor = query_equipments(
+            statuses=_list_arg('status'),
+            locations=_list_arg('location'),
+            fields=_list_arg('fields'),
+            cursor=request.args.get('cursor'),
+            limit=limit,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if streamed:
+        dumps = current_app.json.dumps
+        lines = (dumps(record) + '\n' for record in iter_equipment_records(frame))
+        response = Response(lines, mimetype='application/x-ndjson')
+        if next_cursor is not None:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
 
+    records = list(iter_equipment_records(frame))
+    if paginated:
+        return jsonify({"items": records, "nextCursor": next_cursor})
+    return jsonify(records)
+
+@cached_response(depends_on=('equipments',))
 def get_status_distribution_data():
     """
     Contrôleur pour obtenir la répartition par statut
     """
     return jsonify(get_status_distribution())
 
+@cached_response(depends_on=('equipments',))
 def get_zone_distribution_data():
     """
     Contrôleur pour obtenir la répartition par zone
     """
     return jsonify(get_zone_distribution())
+
+@cached_response(depends_on=('equipments',))
+def get_distribution_data(dimension):
+    """
+    Contrôleur pour obtenir la répartition selon une dimension (statut, zone, type, client)
+    """
+    try:
+        return jsonify(get_distribution(dimension))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
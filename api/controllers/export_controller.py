@@ -0,0 +1,30 @@
+from flask import Response, current_app, jsonify, request
+from api.controllers.stats_controller import date_arg
+from api.services.export_service import (
+    EXPORT_FORMATS, export_chunks, iter_export, parquet_available
+)
+
+def export_dataset_controller(dataset):
+    """
+    Contrôleur d'export d'un jeu de données en flux.
+    Paramètres facultatifs : format=csv|ndjson|parquet (csv par défaut), from et to, ainsi que
+    ceux de la route du jeu de données (client, metric, period, bucket, stale_days).
+    """
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"Format d'export non supporté: {export_format}"}), 400
+    if export_format == 'parquet' and not parquet_available():
+        return jsonify({"error": "Export parquet indisponible: pyarrow n'est pas installé ou ne peut pas être importé"}), 501
+
+    try:
+        start = date_arg('from')
+        end = date_arg('to', end_of_day=True)
+        chunks = export_chunks(dataset, request.args, start, end)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # Réponse non mise en cache : les octets sont envoyés dès le premier bloc sérialisé
+    body = iter_export(chunks, export_format, current_app.json.dumps)
+    response = Response(body, mimetype=EXPORT_FORMATS[export_format])
+    response.headers['Content-Disposition'] = f'attachment; filename="{dataset}.{export_format}"'
+    return response
@@ -0,0 +1,75 @@
+
+import zlib
+
+from flask import jsonify, request
+from api.services.ingest_service import (
+    record_status_changes, ingest_tag_reads, ingest_stock_movements, ingest_positions,
+    iter_stream_lines, parse_ndjson, parse_csv
+)
+
+# Formats acceptés pour les flux d'événements : format -> analyseur de lignes
+STREAM_PARSERS = {
+    'ndjson': parse_ndjson,
+    'csv': parse_csv,
+}
+
+CONTENT_TYPE_FORMATS = {
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+    'application/json': 'ndjson',
+    'text/csv': 'csv',
+}
+
+def ingest_status_changes_controller():
+    """
+    Contrôleur pour enregistrer des changements de statut d'équipements
+    """
+    data = request.get_json(silent=True)
+    if data is None:
+        return jsonify({"error": "Corps JSON attendu"}), 400
+    changes = data if isinstance(data, list) else [data]
+    try:
+        count = record_status_changes(changes)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Changement de statut invalide: {e}"}), 400
+    except RuntimeError as e:
+        # Journal des écritures détenu par un autre worker
+        return jsonify({"error": str(e)}), 503
+    return jsonify({"accepted": count})
+
+def _ingest_stream(ingest):
+    """
+    Analyse le corps de la requête en flux (JSON lines ou CSV, gzip accepté) et l'ingère
+    """
+    data_format = request.args.get('format') or CONTENT_TYPE_FORMATS.get(request.mimetype, 'ndjson')
+    if data_format not in STREAM_PARSERS:
+        return jsonify({"error": f"Format non supporté: {data_format}"}), 415
+
+    gzip = request.headers.get('Content-Encoding', '').lower() == 'gzip'
+    lines = iter_stream_lines(request.stream, gzip=gzip)
+    try:
+        result = ingest(STREAM_PARSERS[data_format](lines))
+    except (UnicodeDecodeError, zlib.error) as e:
+        return jsonify({"error": f"Corps de requête illisible: {e}"}), 400
+    except RuntimeError as e:
+        # Journal des écritures détenu par un autre worker
+        return jsonify({"error": str(e)}), 503
+    return jsonify(result)
+
+def ingest_tag_reads_controller():
+    """
+    Contrôleur pour ingérer un lot de lectures de tags
+    """
+    return _ingest_stream(ingest_tag_reads)
+
+def ingest_stock_movements_controller():
+    """
+    Contrôleur pour ingérer un lot de mouvements de stock
+    """
+    return _ingest_stream(ingest_stock_movements)
+
+def ingest_positions_controller():
+    """
+    Contrôleur pour ingérer un lot de positions GPS
+    """
+    return _ingest_stream(ingest_positions)
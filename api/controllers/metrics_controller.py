@@ -0,0 +1,27 @@
+from flask import Response
+from api.services.ai_service import completion_cache
+from api.services.cache_service import response_cache
+from api.services.metrics_service import metrics, gauge_lines, render_families
+
+# Métriques des caches exportées à partir de leurs compteurs : nom -> (type, aide, champ des statistiques)
+CACHE_METRICS = {
+    'api_cache_hits_total': ('counter', "Consultations réussies du cache", 'hits'),
+    'api_cache_misses_total': ('counter', "Consultations sans résultat du cache", 'misses'),
+    'api_cache_evictions_total': ('counter', "Entrées évincées du cache (taille maximale atteinte)", 'evictions'),
+    'api_cache_invalidations_total': ('counter', "Entrées invalidées après une écriture", 'invalidations'),
+    'api_cache_entries': ('gauge', "Nombre d'entrées dans le cache", 'entries'),
+    'api_cache_hit_ratio': ('gauge', "Proportion de consultations réussies du cache", 'hitRatio'),
+}
+
+def get_metrics_controller():
+    """
+    Contrôleur pour exporter les métriques au format texte de Prometheus
+    """
+    caches = {'response': response_cache.stats(), 'ai': completion_cache.stats()}
+    families = {
+        name: gauge_lines(name, [((('cache', cache),), stats[field]) for cache, stats in caches.items()])
+        for name, (_, _, field) in CACHE_METRICS.items()
+    }
+    help_texts = {name: (metric_type, help_text) for name, (metric_type, help_text, _) in CACHE_METRICS.items()}
+    body = metrics.render() + render_families(families, help_texts)
+    return Response(body, content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,4 +1,6 @@
 
+from datetime import datetime, timezone
+
 from flask import jsonify, request
 from api.services.stats_service import (
     get_monthly_data, get_analytical_data, get_ai_predictions,
@@ -6,65 +8,137 @@ from api.services.stats_service import (
     get_equipment_usage, get_stock_analysis, get_client_visits,
     get_dashboard_stats
 )
+from api.services.cache_service import cached_response, response_cache
+
+def date_arg(name, end_of_day=False):
+    """
+    Lit un paramètre de date ISO (YYYY-MM-DD ou date et heure); une date seule en fin de
+    plage couvre toute la journée
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Date invalide pour {name}: {value}")
+    if end_of_day and len(value) == 10:
+        parsed = parsed.replace(hour=23, minute=59, second=59, microsecond=999999)
+    if parsed.tzinfo is not None:
+        # Les données sont stockées en UTC naïf
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
 
+@cached_response(depends_on=('monthly_data',))
 def get_monthly_data_controller():
     """
     Contrôleur pour obtenir les données mensuelles
     """
     return jsonify(get_monthly_data())
 
+@cached_response(depends_on=('analytical_data',))
 def get_analytical_data_controller():
     """
     Contrôleur pour obtenir les données analytiques
     """
     return jsonify(get_analytical_data())
 
+@cached_response(depends_on=('ai_predictions',))
 def get_ai_predictions_controller():
     """
     Contrôleur pour obtenir les prédictions IA
     """
     return jsonify(get_ai_predictions())
 
+@cached_response(depends_on=('equipments', 'tags'))
 def get_stats_controller():
     """
     Contrôleur pour obtenir des statistiques globales
     """
     return jsonify(get_global_stats())
 
+@cached_response(depends_on=('tag_reads', 'equipments'))
 def get_equipment_presence_controller():
     """
     Contrôleur pour obtenir les données de durée de présence des engins
-    """
-    return jsonify(get_equipment_presence())
+    (client, from et to facultatifs)
+    """
+    try:
+        start = date_arg('from')
+        end = date_arg('to', end_of_day=True)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(get_equipment_presence(request.args.get('client'), start, end))
 
+@cached_response(depends_on=('tag_reads', 'positions', 'equipments', 'client_visits'))
 def get_client_ranking_controller():
     """
     Contrôleur pour obtenir les données de classement des clients
-    """
-    return jsonify(get_client_ranking())
+    (metric=duration|visits|distance|equipment, limit, from et to facultatifs)
+    """
+    limit = request.args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            return jsonify({"error": f"limit doit être un entier positif: {request.args['limit']}"}), 400
+    try:
+        start = date_arg('from')
+        end = date_arg('to', end_of_day=True)
+        metric = request.args.get('metric', 'duration')
+        return jsonify(get_client_ranking(metric, limit, start, end))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
+@cached_response(depends_on=('tag_reads', 'positions', 'equipments'))
 def get_equipment_usage_controller():
     """
     Contrôleur pour obtenir les données d'utilisation des engins
     """
     return jsonify(get_equipment_usage())
 
+@cached_response(depends_on=('stock_movements',))
 def get_stock_analysis_controller():
     """
     Contrôleur pour obtenir les données d'analyse des stocks
+    (period=daily|weekly|monthly ou bucket=hour|day|week|month, from et to facultatifs)
     """
     period = request.args.get('period', 'daily')
-    return jsonify(get_stock_analysis(period))
+    try:
+        start = date_arg('from')
+        end = date_arg('to', end_of_day=True)
+        return jsonify(get_stock_analysis(period, request.args.get('bucket'), start, end))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
+@cached_response(depends_on=('client_visits',))
 def get_client_visits_controller():
     """
     Contrôleur pour obtenir les données de fréquence de visite des clients
-    """
-    return jsonify(get_client_visits())
+    (stale_days facultatif : clients non visités depuis au moins N jours)
+    """
+    stale_days = request.args.get('stale_days')
+    if stale_days is not None:
+        try:
+            stale_days = int(stale_days)
+            if stale_days < 0:
+                raise ValueError
+        except ValueError:
+            return jsonify({"error": f"stale_days doit être un entier positif: {request.args['stale_days']}"}), 400
+    return jsonify(get_client_visits(stale_days))
 
+@cached_response(depends_on=('tag_reads', 'positions', 'equipments', 'client_visits', 'stock_movements'))
 def get_dashboard_stats_controller():
     """
     Contrôleur pour obtenir les statistiques d'un tableau de bord spécifique
     """
     dashboard_type = request.args.get('type', 'equipment-presence')
     return jsonify(get_dashboard_stats(dashboard_type))
+
+def get_cache_stats_controller():
+    """
+    Contrôleur pour obtenir les compteurs du cache des réponses
+    """
+    return jsonify(response_cache.stats())
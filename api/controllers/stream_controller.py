@@ -0,0 +1,42 @@
+from flask import Response, current_app, jsonify, request
+from api.config.stream_config import STREAM_HEARTBEAT, STREAM_MAX_SUBSCRIBERS
+from api.services.stream_service import TOPICS, broadcaster
+
+def _events(subscription):
+    """
+    Envoie les mises à jour de l'abonné dès qu'elles sont disponibles, et un commentaire de maintien
+    en leur absence; l'abonnement est retiré à la fermeture de la connexion
+    """
+    try:
+        while True:
+            events = subscription.wait(STREAM_HEARTBEAT)
+            yield ''.join(events) if events else ': keep-alive\n\n'
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+def stream_controller():
+    """
+    Contrôleur pour s'abonner en server-sent events aux mises à jour de sujets
+    (topics=status-distribution,client-visits,...). Chaque sujet est envoyé à l'abonnement,
+    puis à nouveau seulement lorsque son contenu change.
+    """
+    topics = [topic.strip() for topic in request.args.get('topics', '').split(',') if topic.strip()]
+    if not topics:
+        return jsonify({"error": "Paramètre topics attendu", "topics": list(TOPICS)}), 400
+    unknown = [topic for topic in topics if topic not in TOPICS]
+    if unknown:
+        return jsonify({"error": f"Sujets inconnus: {', '.join(unknown)}", "topics": list(TOPICS)}), 400
+
+    subscription = broadcaster.subscribe(
+        list(dict.fromkeys(topics)), current_app._get_current_object(), limit=STREAM_MAX_SUBSCRIBERS
+    )
+    if subscription is None:
+        return jsonify({"error": "Trop d'abonnés simultanés, réessayez plus tard"}), 503
+    response = Response(_events(subscription), mimetype='text/event-stream')
+    # Le générateur peut ne jamais démarrer (client déconnecté avant la première lecture) :
+    # l'abonnement est aussi retiré à la fermeture de la réponse
+    response.call_on_close(lambda: broadcaster.unsubscribe(subscription))
+    response.headers['Cache-Control'] = 'no-cache'
+    # Désactive la mise en tampon des proxys (nginx) pour transmettre chaque événement immédiatement
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
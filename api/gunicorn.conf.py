@@ -0,0 +1,53 @@
+# Configuration gunicorn de production : gunicorn -c api/gunicorn.conf.py
+# Rechargement gracieux des workers : kill -HUP <pid maître>. L'application étant préchargée,
+# un nouveau code se déploie avec USR2 (nouveau maître) puis WINCH et QUIT sur l'ancien.
+#
+# Rôle web par défaut : tableaux de bord en lecture seule (INGEST_ENABLED=0), données préchargées
+# dans le maître et partagées par fork entre un worker par cœur. Compteurs, agrégats, index de
+# présence et de visites, diffusion /api/stream et journal des écritures étant propres à chaque
+# processus, l'ingestion (INGEST_ENABLED=1) ou un répertoire de données (FLEET_DATA_DIR) impose
+# un seul worker, la montée en charge passant alors par GUNICORN_THREADS. Avec
+# STORAGE_BACKEND=sqlite, seules les tables de la base sont communes aux processus : chaque worker
+# garde ses propres tables lues en entier et ne les relit que lorsque le compteur d'écritures d'une
+# table (table_versions) a changé.
+import multiprocessing
+import os
+
+wsgi_app = 'api.wsgi:app'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Workers (processus) et threads par worker : GUNICORN_THREADS pour les requêtes, plus un thread
+# par abonné à /api/stream, occupé (en attente) pendant toute sa connexion (STREAM_MAX_SUBSCRIBERS)
+# Défini avant le préchargement de l'application, qui lit INGEST_ENABLED (api/config/ingest_config.py)
+os.environ.setdefault('INGEST_ENABLED', '0')
+single_process = os.environ['INGEST_ENABLED'] == '1' or bool(os.environ.get('FLEET_DATA_DIR'))
+workers = int(os.environ.get('WEB_CONCURRENCY', 1 if single_process else multiprocessing.cpu_count() * 2 + 1))
+if single_process and workers > 1:
+    raise RuntimeError(
+        f"WEB_CONCURRENCY={workers} incompatible avec l'ingestion ou FLEET_DATA_DIR : l'état du parc est "
+        "propre à chaque worker. Utiliser un seul worker (et GUNICORN_THREADS) ou le rôle en lecture seule "
+        "(INGEST_ENABLED=0 sans FLEET_DATA_DIR)."
+    )
+# (même valeur par défaut que api/config/stream_config.py)
+stream_subscribers = int(os.environ.get('STREAM_MAX_SUBSCRIBERS', '64'))
+threads = int(os.environ.get('GUNICORN_THREADS', '4')) + stream_subscribers
+worker_class = 'gthread'
+
+# Application et données chargées une fois dans le maître, puis partagées par fork
+preload_app = True
+
+# Délais (secondes) : les appels à l'IA et les flux SSE peuvent durer plusieurs secondes
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', '5'))
+
+# Recyclage des workers après N requêtes (0 = désactivé : un worker recyclé repart des données initiales)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', '0'))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+def when_ready(server):
+    server.log.info(f"API prête : {workers} workers x {threads} threads sur {bind}")
@@ -0,0 +1,180 @@
+
+# Compteurs matérialisés des indicateurs du parc, mis à jour à chaque événement
+import threading
+
+import pandas as pd
+
+# Seuil de batterie (en %) en dessous duquel un tag doit être entretenu
+TAG_BATTERY_THRESHOLD = 20.0
+
+
+def _optional(value):
+    """
+    Convertit les valeurs manquantes pandas en None
+    """
+    return None if pd.isna(value) else value
+
+
+def _increment(counts, key, delta):
+    """
+    Ajoute delta au compteur d'une clé et supprime les clés tombées à zéro
+    """
+    if key is None:
+        return
+    value = counts.get(key, 0) + delta
+    if value > 0:
+        counts[key] = value
+    else:
+        counts.pop(key, None)
+
+
+class FleetCounters:
+    """
+    Indicateurs du parc (statuts, zones, tags) maintenus en O(1) par événement
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.status_counts = {}
+        self.zone_counts = {}
+        self._equipments = {}
+        self._tags = {}
+        self._tags_per_equipment = {}
+        self.engines_on_site = 0
+        self.tags_to_maintain = 0
+        self.used_tags = 0
+
+    @classmethod
+    def from_frames(cls, equipments, tags):
+        """
+        Initialise les compteurs à partir des tables équipements et tags
+        """
+        counters = cls()
+        for equipment_id, status, location, on_site in zip(
+            equipments['id'], equipments['status'], equipments['location'], equipments['onSite']
+        ):
+            counters.apply_status_change(
+                int(equipment_id), status=_optional(status), location=_optional(location), on_site=bool(on_site)
+            )
+        for tag_id, equipment_id, battery, needs_maintenance in zip(
+            tags['tagId'], tags['equipmentId'], tags['battery'], tags['needsMaintenance']
+        ):
+            counters.apply_tag_read(
+                str(tag_id),
+                equipment_id=None if pd.isna(equipment_id) else int(equipment_id),
+                battery=_optional(battery),
+                needs_maintenance=bool(needs_maintenance),
+            )
+        return counters
+
+    @property
+    def total_engines(self):
+        return len(self._equipments)
+
+    @property
+    def total_tags(self):
+        return len(self._tags)
+
+    @property
+    def tagged_engines(self):
+        return len(self._tags_per_equipment)
+
+    def has_equipment(self, equipment_id):
+        """
+        Indique si un équipement fait partie du parc
+        """
+        return equipment_id in self._equipments
+
+    def equipment_ids(self):
+        """
+        Retourne les identifiants des équipements du parc
+        """
+        with self._lock:
+            return list(self._equipments)
+
+    def _equipment_state(self, equipment_id):
+        """
+        Retourne l'état suivi d'un équipement, en l'ajoutant au parc s'il est inconnu
+        """
+        state = self._equipments.get(equipment_id)
+        if state is None:
+            state = {'status': None, 'location': None, 'onSite': False}
+            self._equipments[equipment_id] = state
+        return state
+
+    def apply_status_change(self, equipment_id, status=None, location=None, on_site=None):
+        """
+        Met à jour les compteurs pour un changement de statut, de zone ou de présence d'un équipement.
+        Retourne True si l'état de l'équipement a changé.
+        """
+        with self._lock:
+            state = self._equipment_state(equipment_id)
+            changed = False
+            if status is not None and status != state['status']:
+                _increment(self.status_counts, state['status'], -1)
+                _increment(self.status_counts, status, 1)
+                state['status'] = status
+                changed = True
+            if location is not None and location != state['location']:
+                _increment(self.zone_counts, state['location'], -1)
+                _increment(self.zone_counts, location, 1)
+                state['location'] = location
+                changed = True
+            if on_site is not None and on_site != state['onSite']:
+                self.engines_on_site += 1 if on_site else -1
+                state['onSite'] = on_site
+                changed = True
+            return changed
+
+    def apply_tag_read(self, tag_id, equipment_id=None, battery=None, needs_maintenance=None):
+        """
+        Met à jour les compteurs pour une lecture de tag (affectation, batterie, état).
+        Retourne True si la ligne du tag a changé.
+        """
+        with self._lock:
+            state = self._tags.get(tag_id)
+            changed = state is None
+            if state is None:
+                state = {'equipmentId': None, 'needsMaintenance': False}
+                self._tags[tag_id] = state
+            if battery is not None and battery != state.get('battery'):
+                state['battery'] = battery
+                changed = True
+            if equipment_id is not None and equipment_id != state['equipmentId']:
+                changed = True
+                self._equipment_state(equipment_id)
+                if state['equipmentId'] is None:
+                    self.used_tags += 1
+                _increment(self._tags_per_equipment, state['equipmentId'], -1)
+                _increment(self._tags_per_equipment, equipment_id, 1)
+                state['equipmentId'] = equipment_id
+            if needs_maintenance is None and battery is not None:
+                needs_maintenance = battery < TAG_BATTERY_THRESHOLD
+            if needs_maintenance is not None and needs_maintenance != state['needsMaintenance']:
+                self.tags_to_maintain += 1 if needs_maintenance else -1
+                state['needsMaintenance'] = needs_maintenance
+                changed = True
+            return changed
+
+    def tag_needs_maintenance(self, tag_id):
+        """
+        Indique si un tag est actuellement marqué comme à entretenir
+        """
+        state = self._tags.get(tag_id)
+        return bool(state and state['needsMaintenance'])
+
+    def snapshot(self):
+        """
+        Retourne une copie cohérente des indicateurs
+        """
+        with self._lock:
+            return {
+                'statusCounts': dict(self.status_counts),
+                'zoneCounts': dict(self.zone_counts),
+                'totalEngines': self.total_engines,
+                'taggedEngines': self.tagged_engines,
+                'enginesOnSite': self.engines_on_site,
+                'totalTags': self.total_tags,
+                'usedTags': self.used_tags,
+                'tagsToMaintain': self.tags_to_maintain,
+            }
@@ -8,11 +8,23 @@ random.seed(42)
 
 # Données simulées pour les équipements
 equipments = [
-    {"id": 1, "name": "Bulldozer BX-250", "status": "Actif", "location": "Zone A", "lastUsed": "2023-07-20"},
-    {"id": 2, "name": "Excavatrice EX-450", "status": "Maintenance", "location": "Atelier", "lastUsed": "2023-07-15"},
-    {"id": 3, "name": "Chargeuse CL-300", "status": "Actif", "location": "Zone B", "lastUsed": "2023-07-21"},
-    {"id": 4, "name": "Compacteur CP-100", "status": "Inactif", "location": "Entrepôt", "lastUsed": "2023-07-10"},
-    {"id": 5, "name": "Grue GR-750", "status": "Actif", "location": "Zone C", "lastUsed": "2023-07-19"},
+    {"id": 1, "name": "Bulldozer BX-250", "type": "Bulldozer", "status": "Actif", "location": "Zone A", "client": "Client A", "lastUsed": "2023-07-20", "onSite": True},
+    {"id": 2, "name": "Excavatrice EX-450", "type": "Excavatrice", "status": "Maintenance", "location": "Atelier", "client": "Client B", "lastUsed": "2023-07-15", "onSite": True},
+    {"id": 3, "name": "Chargeuse CL-300", "type": "Chargeuse", "status": "Actif", "location": "Zone B", "client": "Client C", "lastUsed": "2023-07-21", "onSite": True},
+    {"id": 4, "name": "Compacteur CP-100", "type": "Compacteur", "status": "Inactif", "location": "Entrepôt", "client": "Client A", "lastUsed": "2023-07-10", "onSite": True},
+    {"id": 5, "name": "Grue GR-750", "type": "Grue", "status": "Actif", "location": "Zone C", "client": "Client D", "lastUsed": "2023-07-19", "onSite": True},
+]
+
+# Parc de tags : les tags sans équipement sont disponibles en stock
+tags = [
+    {"tagId": "TAG-001", "equipmentId": 1, "battery": 92.0, "needsMaintenance": False},
+    {"tagId": "TAG-002", "equipmentId": 2, "battery": 78.0, "needsMaintenance": False},
+    {"tagId": "TAG-003", "equipmentId": 3, "battery": 85.0, "needsMaintenance": False},
+    {"tagId": "TAG-004", "equipmentId": 4, "battery": 64.0, "needsMaintenance": False},
+    {"tagId": "TAG-005", "equipmentId": 5, "battery": 88.0, "needsMaintenance": False},
+] + [
+    {"tagId": f"TAG-{number:03d}", "equipmentId": None, "battery": 100.0, "needsMaintenance": False}
+    for number in range(6, 17)
 ]
 
 # Données fixes pour les statistiques mensuelles
@@ -46,7 +58,11 @@ ai_predictions = [
     {'name': 'Mar', 'Predicted': 92},
 ]
 
-# Données pour la durée de présence des engins chez les clients
+# Date de référence des historiques de présence et de distance (dernier jour de données)
+REFERENCE_DATE = "2023-07-21"
+
+# Historique des durées de présence des engins chez les clients (jours),
+# pour des présences terminées à la date de référence
 equipment_presence_data = [
     {"client": "Client A", "equipment": "Bulldozer BX-250", "duration": 15, "unit": "jours"},
     {"client": "Client B", "equipment": "Excavatrice EX-450", "duration": 8, "unit": "jours"},
@@ -55,16 +71,7 @@ equipment_presence_data = [
     {"client": "Client D", "equipment": "Grue GR-750", "duration": 12, "unit": "jours"},
 ]
 
-# Données pour le classement des clients par temps d'utilisation
-client_ranking_data = [
-    {"rank": 1, "client": "Client A", "totalDuration": 42, "unit": "jours", "equipmentCount": 5},
-    {"rank": 2, "client": "Client C", "totalDuration": 36, "unit": "jours", "equipmentCount": 3},
-    {"rank": 3, "client": "Client B", "totalDuration": 28, "unit": "jours", "equipmentCount": 4},
-    {"rank": 4, "client": "Client D", "totalDuration": 25, "unit": "jours", "equipmentCount": 2},
-    {"rank": 5, "client": "Client E", "totalDuration": 18, "unit": "jours", "equipmentCount": 2},
-]
-
-# Données pour l'utilisation des engins (distances parcourues)
+# Distances parcourues (km) le jour de référence, sur les 7 et sur les 30 derniers jours
 equipment_usage_data = [
     {"equipment": "Bulldozer BX-250", "day": 12, "week": 68, "month": 280, "unit": "km"},
     {"equipment": "Excavatrice EX-450", "day": 5, "week": 32, "month": 145, "unit": "km"},
@@ -73,7 +80,7 @@ equipment_usage_data = [
     {"equipment": "Grue GR-750", "day": 0, "week": 0, "month": 0, "unit": "km"},
 ]
 
-# Données pour l'analyse des stocks et mouvements
+# Historique journalier des mouvements de stock (les vues semaine et mois en sont dérivées)
 stock_analysis_data = {
     "daily": [
         {"date": "2023-07-15", "incoming": 12, "outgoing": 8, "avgStorageTime": 3.5},
@@ -100,9 +107,9 @@ stock_analysis_data = {
 
 # Données pour la fréquence de visite chez les clients
 client_visit_data = [
-    {"client": "Client A", "visitCount": 15, "lastVisit": "2023-07-18", "daysElapsed": 3},
-    {"client": "Client B", "visitCount": 8, "lastVisit": "2023-07-10", "daysElapsed": 11},
-    {"client": "Client C", "visitCount": 22, "lastVisit": "2023-07-21", "daysElapsed": 0},
-    {"client": "Client D", "visitCount": 5, "lastVisit": "2023-06-30", "daysElapsed": 21},
-    {"client": "Client E", "visitCount": 12, "lastVisit": "2023-07-15", "daysElapsed": 6},
+    {"client": "Client A", "visitCount": 15, "lastVisit": "2023-07-18"},
+    {"client": "Client B", "visitCount": 8, "lastVisit": "2023-07-10"},
+    {"client": "Client C", "visitCount": 22, "lastVisit": "2023-07-21"},
+    {"client": "Client D", "visitCount": 5, "lastVisit": "2023-06-30"},
+    {"client": "Client E", "visitCount": 12, "lastVisit": "2023-07-15"},
 ]
@@ -0,0 +1,371 @@
+# Persistance sur disque de l'état du parc : journal des écritures et instantanés colonnaires
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+import zlib
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+SNAPSHOT_PREFIX = 'snapshot-'
+WAL_PREFIX = 'wal-'
+WAL_SUFFIX = '.log'
+MANIFEST = 'manifest.json'
+LOCK_FILE = 'LOCK'
+
+# Types pandas à valeurs manquantes, écrits en deux tableaux (valeurs, masque)
+MASKED_ARRAYS = {
+    'Int': pd.arrays.IntegerArray,
+    'UInt': pd.arrays.IntegerArray,
+    'Float': pd.arrays.FloatingArray,
+    'boolean': pd.arrays.BooleanArray,
+}
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Valeur non sérialisable dans le journal: {type(value).__name__}")
+
+
+def _encode_record(lsn, kind, rows):
+    """
+    Ligne du journal : somme de contrôle CRC32 puis [lsn, type, lignes] en JSON
+    """
+    payload = json.dumps([lsn, kind, rows], default=_json_default, separators=(',', ':'), ensure_ascii=False)
+    return f'{zlib.crc32(payload.encode()):08x} {payload}\n'.encode()
+
+
+def _decode_record(line):
+    """
+    Décode une ligne du journal, ou retourne None si elle est tronquée ou corrompue
+    """
+    try:
+        text = line.decode()
+        checksum, payload = text.rstrip('\n').split(' ', 1)
+        if not text.endswith('\n') or int(checksum, 16) != zlib.crc32(payload.encode()):
+            return None
+        return json.loads(payload)
+    except (UnicodeDecodeError, ValueError):
+        return None
+
+
+def _fsync_directory(directory):
+    descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+class WriteAheadLog:
+    """
+    Journal des écritures en ajout seul, découpé en segments wal-<premier lsn>.log.
+    Chaque enregistrement (lot d'événements déjà validés) reçoit un numéro de séquence (lsn)
+    croissant; une ligne finale tronquée par un arrêt brutal est ignorée puis écrasée.
+    """
+
+    def __init__(self, directory, fsync=True):
+        self.directory = directory
+        self.fsync = fsync
+        self.lsn = 0
+        self.bytes_written = 0
+        self._file = None
+        self._lock_file = None
+        self._lock = threading.Lock()
+
+    def segments(self):
+        """
+        Liste les segments (premier lsn, chemin) dans l'ordre du journal
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        names = [name for name in os.listdir(self.directory) if name.startswith(WAL_PREFIX) and name.endswith(WAL_SUFFIX)]
+        return sorted(
+            (int(name[len(WAL_PREFIX):-len(WAL_SUFFIX)]), os.path.join(self.directory, name)) for name in names
+        )
+
+    def records(self, after_lsn=0):
+        """
+        Parcourt les enregistrements (lsn, type, lignes) postérieurs à after_lsn
+        """
+        segments = self.segments()
+        for index, (first_lsn, path) in enumerate(segments):
+            following = segments[index + 1][0] if index + 1 < len(segments) else None
+            if following is not None and following <= after_lsn + 1:
+                continue
+            with open(path, 'rb') as f:
+                for line in f:
+                    record = _decode_record(line)
+                    if record is None:
+                        break
+                    if record[0] > after_lsn:
+                        yield record
+
+    def open(self, min_lsn=0):
+        """
+        Ouvre le journal en écriture pour ce processus seul (verrou exclusif) et reprend
+        après le dernier enregistrement valide
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        lock_file = open(os.path.join(self.directory, LOCK_FILE), 'a')
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                raise RuntimeError(f"Journal {self.directory} déjà ouvert par un autre processus")
+        self._lock_file = lock_file
+
+        self.lsn = min_lsn
+        segments = self.segments()
+        if segments:
+            path = segments[-1][1]
+            valid_end = 0
+            with open(path, 'rb') as f:
+                for line in f:
+                    record = _decode_record(line)
+                    if record is None:
+                        break
+                    valid_end += len(line)
+                    self.lsn = max(self.lsn, record[0])
+            # Suppression d'une éventuelle fin d'écriture interrompue
+            with open(path, 'r+b') as f:
+                f.truncate(valid_end)
+            self._file = open(path, 'ab')
+
+    def append(self, kind, rows):
+        """
+        Ajoute un enregistrement et le rend durable avant de retourner son lsn
+        """
+        with self._lock:
+            lsn = self.lsn + 1
+            line = _encode_record(lsn, kind, rows)
+            if self._file is None:
+                self._file = open(os.path.join(self.directory, f'{WAL_PREFIX}{lsn:020d}{WAL_SUFFIX}'), 'ab')
+                _fsync_directory(self.directory)
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.lsn = lsn
+            self.bytes_written += len(line)
+            return lsn
+
+    def rotate(self):
+        """
+        Termine le segment courant : les enregistrements suivants iront dans un nouveau segment
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self.bytes_written = 0
+
+    def discard(self, upto_lsn):
+        """
+        Supprime les segments fermés dont tous les enregistrements sont couverts par un instantané
+        (rotate() ayant été appelé au lsn de l'instantané)
+        """
+        with self._lock:
+            current = self._file.name if self._file is not None else None
+        for first_lsn, path in self.segments():
+            if first_lsn <= upto_lsn and path != current:
+                os.remove(path)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+
+
+def _save_column(directory, stem, series):
+    """
+    Écrit une colonne en tableaux numpy (.npy, projetables en mémoire) et retourne sa description
+    """
+    def save(suffix, values):
+        name = f'{stem}.{suffix}.npy'
+        np.save(os.path.join(directory, name), values)
+        return name
+
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return {'kind': 'category', 'codes': save('codes', series.cat.codes.to_numpy()),
+                'categories': [str(value) for value in series.cat.categories]}
+    if isinstance(series.dtype, pd.StringDtype):
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        return {'kind': 'string', 'codes': save('codes', codes), 'values': [str(value) for value in uniques]}
+    if isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+        return {'kind': 'masked', 'dtype': str(series.dtype),
+                'values': save('values', series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0)),
+                'mask': save('mask', series.isna().to_numpy())}
+    if series.dtype == object:
+        # Un tableau d'objets serait écrit par pickle et ne pourrait pas être projeté en mémoire :
+        # les valeurs distinctes (booléens, nombres, textes) sont écrites dans la description
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        return {'kind': 'object', 'codes': save('codes', codes), 'values': [_json_value(value) for value in uniques]}
+    return {'kind': 'array', 'values': save('values', series.to_numpy())}
+
+
+def _json_value(value):
+    """
+    Valeur distincte d'une colonne d'objets, sous une forme représentable en JSON
+    """
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def _load_column(directory, spec):
+    """
+    Relit une colonne écrite par _save_column; les tableaux sont projetés en mémoire (lecture seule)
+    """
+    def load(key):
+        path = os.path.join(directory, spec[key])
+        try:
+            return np.load(path, mmap_mode='r')
+        except ValueError:
+            # Tableau d'objets écrit par une version antérieure : non projetable, relu en mémoire
+            return np.load(path, allow_pickle=True)
+
+    kind = spec['kind']
+    if kind == 'category':
+        return pd.Categorical.from_codes(load('codes'), categories=spec['categories'])
+    if kind == 'string':
+        values = np.array(spec['values'] + [None], dtype=object)
+        return pd.array(values[load('codes')], dtype='string')
+    if kind == 'masked':
+        array_class = MASKED_ARRAYS[spec['dtype'].rstrip('0123456789')]
+        return array_class(np.asarray(load('values')), np.asarray(load('mask')))
+    if kind == 'object':
+        values = np.empty(len(spec['values']) + 1, dtype=object)
+        values[:-1] = spec['values']
+        return values[load('codes')]
+    return load('values')
+
+
+def dump_state(obj):
+    """
+    Sérialise l'état d'un agrégat (compteurs, index) sous son verrou, verrou exclu
+    """
+    with obj._lock:
+        return pickle.dumps(
+            {key: value for key, value in vars(obj).items() if key != '_lock'}, protocol=pickle.HIGHEST_PROTOCOL
+        )
+
+
+def load_state(cls, data):
+    """
+    Recrée un agrégat à partir de l'état écrit par dump_state
+    """
+    obj = cls.__new__(cls)
+    obj.__dict__.update(pickle.loads(data))
+    obj._lock = threading.Lock()
+    return obj
+
+
+def snapshot_paths(directory):
+    """
+    Liste les instantanés complets (lsn, chemin), du plus récent au plus ancien
+    """
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        (
+            (int(name[len(SNAPSHOT_PREFIX):]), os.path.join(directory, name))
+            for name in os.listdir(directory)
+            if name.startswith(SNAPSHOT_PREFIX) and name[len(SNAPSHOT_PREFIX):].isdigit()
+        ),
+        reverse=True,
+    )
+
+
+def write_snapshot(directory, lsn, tables, aggregates):
+    """
+    Écrit un instantané (tables en colonnes .npy, agrégats sérialisés) couvrant le journal jusqu'à lsn.
+    L'instantané n'apparaît qu'une fois complet (renommage atomique).
+    """
+    final = os.path.join(directory, f'{SNAPSHOT_PREFIX}{lsn:020d}')
+    temporary = final + '.tmp'
+    shutil.rmtree(temporary, ignore_errors=True)
+    os.makedirs(temporary)
+
+    manifest = {'lsn': lsn, 'createdAt': time.time(), 'tables': {}, 'aggregates': sorted(aggregates)}
+    for name, frame in tables.items():
+        manifest['tables'][name] = {
+            'rows': len(frame),
+            'columns': {
+                column: _save_column(temporary, f'{name}.{index}', frame[column])
+                for index, column in enumerate(frame.columns)
+            },
+        }
+    for name, data in aggregates.items():
+        with open(os.path.join(temporary, f'{name}.pickle'), 'wb') as f:
+            f.write(data)
+    with open(os.path.join(temporary, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+    for name in os.listdir(temporary):
+        with open(os.path.join(temporary, name), 'rb') as f:
+            os.fsync(f.fileno())
+    shutil.rmtree(final, ignore_errors=True)
+    os.replace(temporary, final)
+    _fsync_directory(directory)
+    return final
+
+
+def prune_snapshots(directory, keep=2):
+    """
+    Supprime les instantanés au-delà des keep plus récents
+    """
+    for _, path in snapshot_paths(directory)[keep:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def load_snapshot(path):
+    """
+    Charge un instantané : (lsn, {table: DataFrame}, {agrégat: octets}); lève OSError, ValueError
+    ou KeyError s'il est illisible
+    """
+    with open(os.path.join(path, MANIFEST), encoding='utf-8') as f:
+        manifest = json.load(f)
+    tables = {}
+    for name, table in manifest['tables'].items():
+        frame = pd.DataFrame(
+            {column: _load_column(path, spec) for column, spec in table['columns'].items()},
+            index=pd.RangeIndex(table['rows']), copy=False,
+        )
+        if list(frame.columns) != list(table['columns']):
+            raise ValueError(f"Colonnes incomplètes pour la table {name}")
+        tables[name] = frame
+    aggregates = {}
+    for name in manifest['aggregates']:
+        with open(os.path.join(path, f'{name}.pickle'), 'rb') as f:
+            aggregates[name] = f.read()
+    return manifest['lsn'], tables, aggregates
+
+
+def read_snapshot(directory):
+    """
+    Charge l'instantané complet le plus récent : (lsn, {table: DataFrame}, {agrégat: octets}), ou None
+    """
+    for lsn, path in snapshot_paths(directory):
+        try:
+            return load_snapshot(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Instantané illisible ignoré ({path}): {str(e)}")
+    return None
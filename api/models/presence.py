@@ -0,0 +1,177 @@
+
+# Index d'intervalles des présences des engins chez les clients
+import bisect
+import threading
+import time
+
+
+class _Intervals:
+    """
+    Intervalles de présence d'un engin chez un client, triés par début.
+    Un engin ne peut pas être deux fois chez le même client en même temps : les intervalles
+    ne se chevauchent pas, donc les fins sont elles aussi triées.
+    """
+
+    __slots__ = ('starts', 'ends', 'prefix', 'open_start')
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        # Sommes cumulées des durées : prefix[k] = durée totale des k premiers intervalles
+        self.prefix = [0.0]
+        self.open_start = None
+
+    def add(self, start, end):
+        if not self.starts or start >= self.ends[-1]:
+            self.starts.append(start)
+            self.ends.append(end)
+            self.prefix.append(self.prefix[-1] + end - start)
+            return
+        # Événement arrivé en retard : insertion à sa place, fusion avec les intervalles qu'il
+        # chevauche (les intervalles restent disjoints) et recalcul des sommes suivantes
+        low = bisect.bisect_left(self.ends, start)
+        high = bisect.bisect_right(self.starts, end)
+        if low < high:
+            start = min(start, self.starts[low])
+            end = max(end, self.ends[high - 1])
+        self.starts[low:high] = [start]
+        self.ends[low:high] = [end]
+        del self.prefix[low + 1:]
+        for index in range(low, len(self.starts)):
+            self.prefix.append(self.prefix[-1] + self.ends[index] - self.starts[index])
+
+    def _window(self, start, end):
+        """
+        Indices [low, high) des intervalles fermés qui chevauchent la fenêtre
+        """
+        low = bisect.bisect_right(self.ends, start) if start is not None else 0
+        high = bisect.bisect_left(self.starts, end) if end is not None else len(self.starts)
+        return low, high
+
+    def overlaps(self, start, end, now):
+        low, high = self._window(start, end)
+        if low < high:
+            return True
+        if self.open_start is None:
+            return False
+        return (end is None or self.open_start < end) and (start is None or now > start)
+
+    def total(self, start, end, now):
+        """
+        Durée de présence (secondes) comprise dans la fenêtre, intervalle ouvert inclus
+        """
+        low, high = self._window(start, end)
+        total = 0.0
+        if low < high:
+            total = self.prefix[high] - self.prefix[low]
+            if start is not None and self.starts[low] < start:
+                total -= start - self.starts[low]
+            if end is not None and self.ends[high - 1] > end:
+                total -= self.ends[high - 1] - end
+        if self.open_start is not None:
+            open_start = self.open_start if start is None else max(self.open_start, start)
+            open_end = now if end is None else min(now, end)
+            total += max(0.0, open_end - open_start)
+        return total
+
+
+class PresenceIndex:
+    """
+    Présences des engins chez les clients à partir des événements d'entrée et de sortie,
+    indexées par client puis par équipement. Les requêtes de fenêtre coûtent O(log n + k)
+    par couple (client, équipement) au lieu d'un parcours de tout l'historique.
+    Les horodatages sont exprimés en secondes depuis l'epoch.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = {}
+
+    def _intervals(self, client, equipment):
+        equipments = self._clients.setdefault(client, {})
+        intervals = equipments.get(equipment)
+        if intervals is None:
+            intervals = _Intervals()
+            equipments[equipment] = intervals
+        return intervals
+
+    def enter(self, client, equipment, ts):
+        """
+        Ouvre une présence; une entrée répétée sans sortie est ignorée
+        """
+        with self._lock:
+            intervals = self._intervals(client, equipment)
+            if intervals.open_start is None:
+                intervals.open_start = ts
+
+    def exit(self, client, equipment, ts):
+        """
+        Ferme la présence ouverte; une sortie sans entrée est ignorée
+        """
+        with self._lock:
+            intervals = self._intervals(client, equipment)
+            if intervals.open_start is not None and ts >= intervals.open_start:
+                intervals.add(intervals.open_start, ts)
+                intervals.open_start = None
+
+    def add_interval(self, client, equipment, start, end):
+        """
+        Ajoute une présence déjà terminée (historique)
+        """
+        with self._lock:
+            self._intervals(client, equipment).add(start, end)
+
+    def clients(self):
+        """
+        Liste les clients connus, dans l'ordre d'apparition
+        """
+        with self._lock:
+            return list(self._clients)
+
+    def equipments_at(self, client, start=None, end=None, now=None):
+        """
+        Liste les équipements présents chez un client pendant la fenêtre
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            equipments = self._clients.get(client, {})
+            return [
+                equipment for equipment, intervals in equipments.items()
+                if intervals.overlaps(start, end, now)
+            ]
+
+    def totals(self, client=None, start=None, end=None, now=None):
+        """
+        Retourne (client, équipement, durée en secondes) pour chaque couple présent pendant la fenêtre
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            clients = [client] if client is not None else list(self._clients)
+            rows = []
+            for name in clients:
+                for equipment, intervals in self._clients.get(name, {}).items():
+                    if not intervals.overlaps(start, end, now):
+                        continue
+                    rows.append((name, equipment, intervals.total(start, end, now)))
+            return rows
+
+    def client_total(self, client, start=None, end=None, now=None):
+        """
+        Durée de présence cumulée (secondes) de tous les engins chez un client sur la fenêtre
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            return sum(
+                intervals.total(start, end, now)
+                for intervals in self._clients.get(client, {}).values()
+            )
+
+    def open_clients(self):
+        """
+        Liste les clients chez qui au moins un engin est actuellement présent
+        """
+        with self._lock:
+            return [
+                client for client, equipments in self._clients.items()
+                if any(intervals.open_start is not None for intervals in equipments.values())
+            ]
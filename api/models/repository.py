@@ -0,0 +1,283 @@
+
+# Dépôt d'accès aux données : les services interrogent le stockage colonnaire via ce module
+import threading
+
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from api.config.storage_config import STORAGE_BACKEND, SQLITE_BUSY_TIMEOUT, SQLITE_CACHED_STATEMENTS, SQLITE_PATH
+from api.models.counters import FleetCounters
+from api.models.presence import PresenceIndex
+from api.models.rollups import MONTH_NAMES, StockRollup, storage_totals
+from api.models.sqlite_store import SqlitePresenceIndex, SqliteStore
+from api.models.store import ColumnarStore, frame_to_records
+from api.models.usage import UsageAccumulator
+from api.models.visits import VisitIndex
+
+_store = None
+_counters = None
+_stock_rollup = None
+_presence_index = None
+_usage_accumulator = None
+_visit_index = None
+_store_lock = threading.Lock()
+
+
+def _seed_store(store):
+    """
+    Charge les données initiales de api.models.data dans le stockage
+    """
+    from api.models import data
+
+    store.load('equipments', data.equipments)
+    store.load('tags', data.tags)
+    store.load('monthly_data', data.monthly_data)
+    store.load('analytical_data', data.analytical_data)
+    store.load('ai_predictions', data.ai_predictions)
+    store.load('client_visits', data.client_visit_data)
+    # Historique des statuts : statut courant de chaque équipement à sa dernière utilisation
+    store.load('status_changes', [
+        {'id': equipment['id'], 'ts': equipment['lastUsed'], 'status': equipment['status']}
+        for equipment in data.equipments
+    ])
+
+
+def _create_store():
+    """
+    Crée le stockage du moteur configuré; une base SQLite existante est reprise sans rechargement
+    """
+    if STORAGE_BACKEND == 'sqlite':
+        store = SqliteStore(SQLITE_PATH, timeout=SQLITE_BUSY_TIMEOUT, cached_statements=SQLITE_CACHED_STATEMENTS)
+        if store.created:
+            _seed_store(store)
+        return store
+    store = ColumnarStore()
+    _seed_store(store)
+    return store
+
+
+def get_store():
+    """
+    Retourne le stockage partagé, initialisé au premier accès
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _create_store()
+    return _store
+
+
+def get_sql_store():
+    """
+    Retourne le stockage s'il s'agit d'une base SQLite interrogeable directement, sinon None
+    """
+    store = get_store()
+    return store if isinstance(store, SqliteStore) else None
+
+
+def get_frame(name):
+    """
+    Retourne une table du stockage sous forme de DataFrame
+    """
+    return get_store().table(name)
+
+
+def get_records(name):
+    """
+    Retourne une table du stockage sous forme de liste de dictionnaires
+    """
+    return frame_to_records(get_frame(name))
+
+
+def get_counters():
+    """
+    Retourne les compteurs matérialisés du parc, construits au premier accès
+    """
+    global _counters
+    if _counters is None:
+        store = get_store()
+        with _store_lock:
+            if _counters is None:
+                _counters = FleetCounters.from_frames(store.table('equipments'), store.table('tags'))
+    return _counters
+
+
+def _seed_stock_rollup(rollup):
+    """
+    Charge l'historique des stocks (journalier, hebdomadaire et mensuel) dans les agrégats
+    """
+    from api.models import data
+
+    year = date.fromisoformat(data.REFERENCE_DATE).year
+    keys = {
+        'daily': ('day', lambda row: date.fromisoformat(row['date'])),
+        'weekly': ('week', lambda row: (year, int(row['week'].split()[-1]))),
+        'monthly': ('month', lambda row: (year, MONTH_NAMES.index(row['month']) + 1)),
+    }
+    for period, (bucket, key) in keys.items():
+        for row in data.stock_analysis_data[period]:
+            rollup.add_history(
+                bucket,
+                key(row),
+                row['incoming'],
+                row['outgoing'],
+                *storage_totals(row['outgoing'], row['avgStorageTime']),
+            )
+
+
+def _replay_stock_movements(rollup, frame):
+    """
+    Ajoute aux agrégats les mouvements déjà présents dans la table stock_movements
+    """
+    for ts, direction, quantity, storage_time in zip(
+        frame['ts'], frame['direction'], frame['quantity'], frame['storageTime']
+    ):
+        rollup.add_movement(
+            ts.to_pydatetime(), direction, int(quantity), None if pd.isna(storage_time) else float(storage_time)
+        )
+
+
+def get_stock_rollup():
+    """
+    Retourne les agrégats de mouvements de stock, initialisés au premier accès
+    """
+    global _stock_rollup
+    if _stock_rollup is None:
+        movements = get_store().table('stock_movements')
+        with _store_lock:
+            if _stock_rollup is None:
+                rollup = StockRollup()
+                _seed_stock_rollup(rollup)
+                _replay_stock_movements(rollup, movements)
+                _stock_rollup = rollup
+    return _stock_rollup
+
+
+def _seed_presence_index(index):
+    """
+    Charge l'historique des présences : chaque durée devient un intervalle terminé à la date de référence
+    """
+    from api.models import data
+
+    ids = {equipment['name']: equipment['id'] for equipment in data.equipments}
+    end = datetime.fromisoformat(data.REFERENCE_DATE).replace(tzinfo=timezone.utc)
+    for row in data.equipment_presence_data:
+        start = end - timedelta(days=row['duration'])
+        index.add_interval(row['client'], ids.get(row['equipment'], row['equipment']), start.timestamp(), end.timestamp())
+
+
+def get_presence_index():
+    """
+    Retourne l'index des présences chez les clients, initialisé au premier accès
+    """
+    global _presence_index
+    if _presence_index is None:
+        store = get_store()
+        with _store_lock:
+            if _presence_index is None:
+                if isinstance(store, SqliteStore):
+                    # Présences conservées dans la base : historique chargé à sa création seulement
+                    index = SqlitePresenceIndex(store)
+                    if store.created:
+                        _seed_presence_index(index)
+                else:
+                    index = PresenceIndex()
+                    _seed_presence_index(index)
+                _presence_index = index
+    return _presence_index
+
+
+def _seed_usage_accumulator(accumulator):
+    """
+    Charge l'historique des distances : le jour de référence, le reste de la semaine la veille
+    et le reste du mois sept jours avant, ce qui redonne les totaux jour/semaine/mois
+    """
+    from api.models import data
+
+    ids = {equipment['name']: equipment['id'] for equipment in data.equipments}
+    reference = date.fromisoformat(data.REFERENCE_DATE)
+    for row in data.equipment_usage_data:
+        equipment_id = ids.get(row['equipment'], row['equipment'])
+        accumulator.add_day(equipment_id, reference, float(row['day']))
+        accumulator.add_day(equipment_id, reference - timedelta(days=1), float(row['week'] - row['day']))
+        accumulator.add_day(equipment_id, reference - timedelta(days=7), float(row['month'] - row['week']))
+
+
+def _replay_positions(accumulator, positions, reads):
+    """
+    Ajoute aux distances les positions déjà enregistrées (table positions et lectures de tags localisées)
+    """
+    reads = reads[(reads['equipmentId'].notna() & reads['lat'].notna() & reads['lon'].notna()).to_numpy()]
+    if not len(positions) and not len(reads):
+        return
+    accumulator.add_positions(
+        np.concatenate([positions['equipmentId'].to_numpy('int64'), reads['equipmentId'].to_numpy('int64')]),
+        np.concatenate([positions['ts'].to_numpy(), reads['ts'].to_numpy()]),
+        np.concatenate([positions['lat'].to_numpy('float64'), reads['lat'].to_numpy('float64')]),
+        np.concatenate([positions['lon'].to_numpy('float64'), reads['lon'].to_numpy('float64')]),
+    )
+
+
+def get_usage_accumulator():
+    """
+    Retourne les distances parcourues par engin, initialisées au premier accès
+    """
+    global _usage_accumulator
+    if _usage_accumulator is None:
+        store = get_store()
+        positions, reads = store.table('positions'), store.table('tag_reads')
+        with _store_lock:
+            if _usage_accumulator is None:
+                accumulator = UsageAccumulator()
+                _seed_usage_accumulator(accumulator)
+                _replay_positions(accumulator, positions, reads)
+                _usage_accumulator = accumulator
+    return _usage_accumulator
+
+
+def get_visit_index():
+    """
+    Retourne l'index des visites chez les clients, construit au premier accès depuis la table client_visits
+    """
+    global _visit_index
+    if _visit_index is None:
+        visits = get_store().table('client_visits')
+        with _store_lock:
+            if _visit_index is None:
+                _visit_index = VisitIndex.from_frame(visits)
+    return _visit_index
+
+
+def preload_data():
+    """
+    Initialise le stockage et toutes les structures dérivées, tables en attente comprises,
+    pour qu'elles soient construites une seule fois avant la création des processus de travail
+    """
+    store = get_store()
+    for name in store.tables():
+        store.table(name)
+    get_counters()
+    get_stock_rollup()
+    get_presence_index()
+    get_usage_accumulator()
+    get_visit_index()
+    return store
+
+
+def reset_data(store=None, counters=None, stock_rollup=None, presence_index=None, usage_accumulator=None,
+               visit_index=None):
+    """
+    Remplace le stockage (par celui fourni, ou par les données initiales au prochain accès)
+    et les structures qui en sont dérivées (reconstruites au prochain accès si elles ne sont pas fournies)
+    """
+    global _store, _counters, _stock_rollup, _presence_index, _usage_accumulator, _visit_index
+    with _store_lock:
+        _store = store
+        _counters = counters
+        _stock_rollup = stock_rollup
+        _presence_index = presence_index
+        _usage_accumulator = usage_accumulator
+        _visit_index = visit_index
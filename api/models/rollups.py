@@ -0,0 +1,135 @@
+
+# Agrégats temporels des mouvements de stock, maintenus incrémentalement
+import bisect
+import threading
+
+# Granularités disponibles pour les requêtes
+BUCKETS = ('hour', 'day', 'week', 'month')
+
+# Noms des mois, pour les libellés et l'historique mensuel
+MONTH_NAMES = [
+    'Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin',
+    'Juillet', 'Août', 'Septembre', 'Octobre', 'Novembre', 'Décembre'
+]
+
+# Indices des champs d'un agrégat : entrées, sorties, somme et nombre des durées de stockage
+INCOMING, OUTGOING, STORAGE_SUM, STORAGE_COUNT = range(4)
+
+
+def _empty_bucket():
+    return [0, 0, 0.0, 0]
+
+
+def bucket_key(bucket, day):
+    """
+    Clé de l'agrégat contenant un jour : la date, (année ISO, semaine) ou (année, mois)
+    """
+    if bucket == 'week':
+        iso = day.isocalendar()
+        return (iso[0], iso[1])
+    if bucket == 'month':
+        return (day.year, day.month)
+    return day
+
+
+def storage_totals(outgoing, storage_time):
+    """
+    Somme et nombre des durées de stockage pour des sorties de stock : chaque unité sortie compte
+    une fois, qu'elle provienne d'un mouvement reçu ou d'un historique agrégé (durée moyenne)
+    """
+    if storage_time is None or not outgoing:
+        return 0.0, 0
+    return storage_time * outgoing, outgoing
+
+
+def _merge(target, source):
+    """
+    Additionne un agrégat dans un autre (tous les champs sont additifs)
+    """
+    for index, value in enumerate(source):
+        target[index] += value
+
+
+class StockRollup:
+    """
+    Agrégats de mouvements de stock par heure et par jour.
+    Les vues semaine et mois sont obtenues en fusionnant les agrégats journaliers,
+    sans relire les mouvements bruts. La durée moyenne de stockage est conservée
+    sous forme de somme et de nombre pour rester exacte après fusion.
+    L'historique déjà agrégé (jour, semaine, mois) est conservé à sa granularité d'origine
+    et ajouté aux mouvements reçus, sans être refusionné dans les granularités supérieures.
+    Dans les deux cas, la durée moyenne de stockage est pondérée par les quantités sorties
+    (storage_totals) : la durée de stockage d'une entrée est ignorée.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hours = {}
+        self._hour_keys = []
+        self._days = {}
+        self._day_keys = []
+        # Agrégats historiques par granularité : clé (date, (année, semaine) ou (année, mois)) -> agrégat
+        self._history = {'day': {}, 'week': {}, 'month': {}}
+
+    @staticmethod
+    def _bucket(buckets, keys, key):
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = _empty_bucket()
+            buckets[key] = bucket
+            bisect.insort(keys, key)
+        return bucket
+
+    def add_movement(self, ts, direction, quantity=1, storage_time=None):
+        """
+        Ajoute un mouvement (direction 'in' ou 'out') aux agrégats horaire et journalier
+        """
+        values = _empty_bucket()
+        values[INCOMING if direction == 'in' else OUTGOING] = quantity
+        values[STORAGE_SUM], values[STORAGE_COUNT] = storage_totals(values[OUTGOING], storage_time)
+        hour = ts.replace(minute=0, second=0, microsecond=0)
+        with self._lock:
+            _merge(self._bucket(self._hours, self._hour_keys, hour), values)
+            _merge(self._bucket(self._days, self._day_keys, ts.date()), values)
+
+    def add_history(self, bucket, key, incoming, outgoing, storage_sum, storage_count):
+        """
+        Ajoute un agrégat historique déjà calculé pour une granularité (day, week ou month)
+        """
+        with self._lock:
+            values = self._history[bucket].setdefault(key, _empty_bucket())
+            _merge(values, [incoming, outgoing, storage_sum, storage_count])
+
+    @staticmethod
+    def _range(buckets, keys, start, end):
+        low = bisect.bisect_left(keys, start) if start is not None else 0
+        high = bisect.bisect_right(keys, end) if end is not None else len(keys)
+        return [(key, list(buckets[key])) for key in keys[low:high]]
+
+    def query(self, bucket='day', start=None, end=None):
+        """
+        Retourne les agrégats (clé, [entrées, sorties, somme, nombre]) entre deux dates incluses
+        """
+        if bucket not in BUCKETS:
+            raise ValueError(f"Granularité inconnue: {bucket}")
+        with self._lock:
+            if bucket == 'hour':
+                return self._range(self._hours, self._hour_keys, start, end)
+            rows = self._range(
+                self._days, self._day_keys,
+                start.date() if start is not None else None,
+                end.date() if end is not None else None,
+            )
+            low = bucket_key(bucket, start.date()) if start is not None else None
+            high = bucket_key(bucket, end.date()) if end is not None else None
+            history = [
+                (key, list(values)) for key, values in self._history[bucket].items()
+                if (low is None or key >= low) and (high is None or key <= high)
+            ]
+
+        merged = {}
+        for key, values in history:
+            _merge(merged.setdefault(key, _empty_bucket()), values)
+        for day, values in rows:
+            _merge(merged.setdefault(bucket_key(bucket, day), _empty_bucket()), values)
+        return sorted(merged.items())
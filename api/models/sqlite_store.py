@@ -0,0 +1,516 @@
+# Stockage des tables du parc dans une base SQLite locale (déploiement mono-serveur)
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from api.models.store import SCHEMAS, coerce_frame, next_table_version
+
+# Valeur entière de NaT : les dates sont stockées en nanosecondes depuis l'epoch
+NAT = np.iinfo(np.int64).min
+
+# Types SQLite des colonnes selon leur type pandas (texte par défaut)
+SQL_TYPES = {
+    'int64': 'INTEGER',
+    'Int64': 'INTEGER',
+    'bool': 'INTEGER',
+    'float64': 'REAL',
+}
+
+# Colonnes clés des tables mises à jour par upsert (index unique)
+TABLE_KEYS = {
+    'equipments': 'id',
+    'tags': 'tagId',
+    'client_visits': 'client',
+}
+
+# Index secondaires : nom -> (table, colonnes)
+INDEXES = {
+    'tag_reads_equipment_ts': ('tag_reads', ['equipmentId', 'ts']),
+    'tag_reads_client_ts': ('tag_reads', ['client', 'ts']),
+    'positions_equipment_ts': ('positions', ['equipmentId', 'ts']),
+    'status_changes_equipment_ts': ('status_changes', ['id', 'ts']),
+    'stock_movements_ts': ('stock_movements', ['ts']),
+    'equipments_status': ('equipments', ['status']),
+    'client_visits_last_visit': ('client_visits', ['lastVisit']),
+    'presence_client_start': ('presence', ['client', 'start_ts']),
+    'presence_equipment_start': ('presence', ['equipment', 'start_ts']),
+}
+
+# Présences des engins chez les clients (secondes depuis l'epoch, fin nulle tant que l'engin est présent).
+# Un engin n'a qu'une présence ouverte par client.
+PRESENCE_DDL = [
+    'CREATE TABLE IF NOT EXISTS presence (client TEXT NOT NULL, equipment NOT NULL, start_ts REAL NOT NULL, end_ts REAL)',
+    'CREATE UNIQUE INDEX IF NOT EXISTS presence_open ON presence (client, equipment) WHERE end_ts IS NULL',
+]
+
+# Compteur d'écritures par table, incrémenté dans chaque transaction d'écriture : un processus détecte
+# ainsi les tables modifiées par un autre processus partageant la base
+VERSIONS_DDL = (
+    'CREATE TABLE IF NOT EXISTS table_versions '
+    '(name TEXT PRIMARY KEY, version INTEGER NOT NULL, modified_at REAL NOT NULL)'
+)
+
+# Fenêtre [:start, :end) commune aux requêtes de présence; l'intervalle ouvert se termine à :now
+PRESENCE_WINDOW = (
+    '(:start IS NULL OR COALESCE(end_ts, :now) > :start) AND (:end IS NULL OR start_ts < :end)'
+)
+PRESENCE_SECONDS = (
+    'MAX(0.0, MIN(COALESCE(end_ts, :now), COALESCE(:end, COALESCE(end_ts, :now))) '
+    '- MAX(start_ts, COALESCE(:start, start_ts)))'
+)
+# Durées par couple (client, engin), clients puis engins dans l'ordre d'apparition
+PRESENCE_TOTALS = (
+    f'SELECT client, equipment, SUM({PRESENCE_SECONDS}), MIN(MIN(rowid)) OVER (PARTITION BY client) AS first_seen '
+    f'FROM presence WHERE {PRESENCE_WINDOW} GROUP BY client, equipment ORDER BY first_seen, MIN(rowid)'
+)
+PRESENCE_CLIENT_TOTALS = (
+    f'SELECT client, equipment, SUM({PRESENCE_SECONDS}) FROM presence '
+    f'WHERE client = :client AND {PRESENCE_WINDOW} GROUP BY equipment ORDER BY MIN(rowid)'
+)
+PRESENCE_ENTER = 'INSERT OR IGNORE INTO presence (client, equipment, start_ts) VALUES (?, ?, ?)'
+PRESENCE_EXIT = (
+    'UPDATE presence SET end_ts = ? WHERE client = ? AND equipment = ? AND end_ts IS NULL AND start_ts <= ?'
+)
+PRESENCE_ADD = 'INSERT INTO presence (client, equipment, start_ts, end_ts) VALUES (?, ?, ?, ?)'
+PRESENCE_OPEN_START = 'SELECT start_ts FROM presence WHERE client = ? AND equipment = ? AND end_ts IS NULL'
+# Présences terminées d'un couple (client, engin) qui chevauchent [start, end], à fusionner
+PRESENCE_OVERLAPS = (
+    'SELECT rowid, start_ts, end_ts FROM presence WHERE client = ? AND equipment = ? '
+    'AND end_ts IS NOT NULL AND start_ts <= ? AND end_ts >= ? ORDER BY rowid'
+)
+PRESENCE_CLIENTS = 'SELECT client FROM presence GROUP BY client ORDER BY MIN(rowid)'
+PRESENCE_OPEN_CLIENTS = (
+    'SELECT client FROM presence GROUP BY client HAVING SUM(end_ts IS NULL) > 0 ORDER BY MIN(rowid)'
+)
+
+
+def quote(identifier):
+    """
+    Protège un nom de table ou de colonne dans une requête SQL
+    """
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _is_datetime(dtype):
+    return dtype.startswith('datetime64')
+
+
+def to_sql_value(value, dtype):
+    """
+    Convertit une valeur Python ou pandas vers sa représentation SQLite
+    """
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if _is_datetime(dtype):
+        return pd.Timestamp(value).as_unit('ns').value
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _column_values(series, dtype):
+    """
+    Valeurs d'une colonne prêtes à être insérées (None pour les valeurs manquantes)
+    """
+    if _is_datetime(dtype):
+        values = series.to_numpy(dtype='datetime64[ns]').view('int64')
+        return [None if value == NAT else value for value in values.tolist()]
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def rows_to_frame(rows, columns, schema):
+    """
+    Construit une table typée selon le schéma à partir de lignes lues en SQL
+    """
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    data = {}
+    for column, column_values in zip(columns, values):
+        if _is_datetime(schema[column]):
+            data[column] = np.array(
+                [NAT if value is None else value for value in column_values], dtype='int64'
+            ).view('datetime64[ns]')
+        else:
+            data[column] = list(column_values)
+    frame = pd.DataFrame(data, columns=columns)
+    return coerce_frame(frame, {column: schema[column] for column in columns})
+
+
+class SqliteStore:
+    """
+    Stockage des tables dans une base SQLite (journal WAL), avec la même interface que ColumnarStore.
+    Chaque thread réutilise sa propre connexion, dont le cache de requêtes préparées sert
+    d'une requête HTTP à l'autre. Une table lue en entier est gardée tant que son compteur
+    d'écritures (table table_versions, commun à tous les processus) n'a pas changé.
+    """
+
+    def __init__(self, path, schemas=SCHEMAS, timeout=5.0, cached_statements=256):
+        self.path = path
+        self._schemas = dict(schemas)
+        self._timeout = timeout
+        self._cached_statements = cached_statements
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.RLock()
+        self._frames = {}
+        self._table_versions = {name: next_table_version() for name in self._schemas}
+        self._modified_at = {name: time.time() for name in self._schemas}
+        self._shared_versions = {}
+        self.version = 0
+        self.created = self._create_schema()
+        self._sync()
+        # Une connexion ne doit pas franchir un fork : chaque worker ouvre les siennes
+        os.register_at_fork(after_in_child=self._forget_connections)
+
+    def connection(self):
+        """
+        Retourne la connexion du thread courant, ouverte au premier appel
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=self._timeout, isolation_level=None,
+                check_same_thread=False, cached_statements=self._cached_statements,
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    @contextmanager
+    def transaction(self):
+        """
+        Exécute des écritures en une seule transaction, validée à la sortie du bloc
+        """
+        connection = self.connection()
+        with self._lock:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield connection
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+
+    def _create_schema(self):
+        """
+        Crée les tables et index manquants; retourne True si la base était vide
+        """
+        connection = self.connection()
+        created = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'equipments'"
+        ).fetchone() is None
+        with self.transaction() as connection:
+            for name, schema in self._schemas.items():
+                columns = ', '.join(
+                    f"{quote(column)} {'INTEGER' if _is_datetime(dtype) else SQL_TYPES.get(dtype, 'TEXT')}"
+                    for column, dtype in schema.items()
+                )
+                connection.execute(f'CREATE TABLE IF NOT EXISTS {quote(name)} ({columns})')
+            for statement in PRESENCE_DDL:
+                connection.execute(statement)
+            connection.execute(VERSIONS_DDL)
+            connection.executemany(
+                'INSERT OR IGNORE INTO table_versions (name, version, modified_at) VALUES (?, 0, ?)',
+                [(name, time.time()) for name in self._schemas],
+            )
+            for name, key in TABLE_KEYS.items():
+                connection.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS {name}_key ON {quote(name)} ({quote(key)})')
+            for index, (name, columns) in INDEXES.items():
+                connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {index} ON {quote(name)} ({', '.join(map(quote, columns))})"
+                )
+        return created
+
+    def tables(self):
+        """
+        Liste les noms des tables disponibles
+        """
+        return list(self._schemas)
+
+    def schema(self, name):
+        """
+        Retourne le schéma d'une table
+        """
+        return self._schemas[name]
+
+    def table_version(self, name):
+        """
+        Retourne le numéro de version d'une table, renouvelé à chaque écriture (y compris
+        par un autre processus)
+        """
+        self._sync()
+        return self._table_versions[name]
+
+    def modified_at(self, name):
+        """
+        Retourne l'horodatage (epoch) de la dernière écriture dans une table
+        """
+        return self._modified_at[name]
+
+    def _count_write(self, connection, name):
+        """
+        Incrémente le compteur d'écritures partagé d'une table (dans la transaction d'écriture)
+        et retourne sa nouvelle valeur
+        """
+        connection.execute(
+            'UPDATE table_versions SET version = version + 1, modified_at = ? WHERE name = ?', (time.time(), name)
+        )
+        return connection.execute('SELECT version FROM table_versions WHERE name = ?', (name,)).fetchone()[0]
+
+    def _sync(self):
+        """
+        Renouvelle la version des tables modifiées par une autre connexion. PRAGMA data_version
+        ne change que si une autre connexion a validé une écriture : les compteurs ne sont relus
+        que dans ce cas.
+        """
+        connection = self.connection()
+        data_version = connection.execute('PRAGMA data_version').fetchone()[0]
+        if data_version == getattr(self._local, 'data_version', None):
+            return
+        self._local.data_version = data_version
+        rows = connection.execute('SELECT name, version, modified_at FROM table_versions').fetchall()
+        with self._lock:
+            for name, version, modified_at in rows:
+                if name in self._schemas and version > self._shared_versions.get(name, -1):
+                    self._shared_versions[name] = version
+                    self._table_versions[name] = next_table_version()
+                    self._modified_at[name] = modified_at
+                    self.version += 1
+
+    def _touch(self, name, shared_version):
+        """
+        Enregistre une écriture validée dans une table
+        """
+        with self._lock:
+            self._shared_versions[name] = max(shared_version, self._shared_versions.get(name, -1))
+            self._table_versions[name] = next_table_version()
+            self._modified_at[name] = time.time()
+            self.version += 1
+
+    def query(self, sql, params=()):
+        """
+        Exécute une requête en lecture et retourne ses lignes
+        """
+        return self.connection().execute(sql, params).fetchall()
+
+    def query_frame(self, name, sql, params=(), columns=None):
+        """
+        Exécute une requête sur une table et retourne le résultat typé selon son schéma
+        (colonnes sélectionnées dans l'ordre de columns, toutes par défaut)
+        """
+        columns = list(columns or self._schemas[name])
+        return rows_to_frame(self.query(sql, params), columns, self._schemas[name])
+
+    def iter_frames(self, name, sql, params=(), chunk_rows=10000, columns=None):
+        """
+        Comme query_frame, mais le résultat est lu par blocs de chunk_rows lignes au fil de
+        l'itération (mémoire constante). Au moins un bloc, éventuellement vide, est retourné.
+        """
+        columns = list(columns or self._schemas[name])
+        cursor = self.connection().execute(sql, params)
+        try:
+            rows = cursor.fetchmany(chunk_rows)
+            yield rows_to_frame(rows, columns, self._schemas[name])
+            while len(rows) == chunk_rows:
+                rows = cursor.fetchmany(chunk_rows)
+                if rows:
+                    yield rows_to_frame(rows, columns, self._schemas[name])
+        finally:
+            cursor.close()
+
+    def table(self, name):
+        """
+        Retourne la table demandée (à ne pas modifier en place)
+        """
+        version = self.table_version(name)
+        cached = self._frames.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        columns = ', '.join(map(quote, self._schemas[name]))
+        frame = self.query_frame(name, f'SELECT {columns} FROM {quote(name)} ORDER BY rowid')
+        self._frames[name] = (version, frame)
+        return frame
+
+    def _insert(self, connection, name, frame):
+        schema = self._schemas[name]
+        columns = list(schema)
+        values = [_column_values(frame[column], schema[column]) for column in columns]
+        connection.executemany(
+            f"INSERT INTO {quote(name)} ({', '.join(map(quote, columns))}) VALUES ({', '.join('?' * len(columns))})",
+            zip(*values),
+        )
+
+    def load(self, name, rows):
+        """
+        Remplace le contenu d'une table à partir d'une liste de dictionnaires ou d'un DataFrame
+        """
+        frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame.from_records(rows)
+        frame = coerce_frame(frame, self._schemas[name])
+        with self.transaction() as connection:
+            connection.execute(f'DELETE FROM {quote(name)}')
+            self._insert(connection, name, frame)
+            shared_version = self._count_write(connection, name)
+        self._touch(name, shared_version)
+        self._frames[name] = (self._table_versions[name], frame)
+
+    def restore(self, tables):
+        """
+        Remplace des tables par des DataFrames déjà conformes au schéma
+        """
+        for name, frame in tables.items():
+            if name in self._schemas:
+                self.load(name, frame)
+
+    def append(self, name, rows):
+        """
+        Ajoute des lignes à la fin d'une table
+        """
+        frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame.from_records(rows)
+        if frame.empty:
+            return 0
+        frame = coerce_frame(frame, self._schemas[name])
+        with self.transaction() as connection:
+            self._insert(connection, name, frame)
+            shared_version = self._count_write(connection, name)
+        self._touch(name, shared_version)
+        return len(frame)
+
+    def upsert(self, name, key, rows):
+        """
+        Enregistre des mises à jour partielles de lignes identifiées par la colonne clé :
+        les valeurs renseignées remplacent les anciennes, les clés inconnues sont ajoutées
+        """
+        if not rows:
+            return
+        if TABLE_KEYS.get(name) != key:
+            raise ValueError(f"Clé de mise à jour incohérente pour {name}: {key}")
+        schema = self._schemas[name]
+        # Un INSERT ... ON CONFLICT par ensemble de colonnes renseignées
+        groups = {}
+        for row in rows:
+            columns = tuple(column for column in row if column in schema)
+            groups.setdefault(columns, []).append(
+                tuple(to_sql_value(row[column], schema[column]) for column in columns)
+            )
+        with self.transaction() as connection:
+            for columns, values in groups.items():
+                updates = ', '.join(
+                    f'{quote(column)} = COALESCE(excluded.{quote(column)}, {quote(column)})'
+                    for column in columns if column != key
+                )
+                conflict = f'DO UPDATE SET {updates}' if updates else 'DO NOTHING'
+                connection.executemany(
+                    f"INSERT INTO {quote(name)} ({', '.join(map(quote, columns))}) "
+                    f"VALUES ({', '.join('?' * len(columns))}) ON CONFLICT ({quote(key)}) {conflict}",
+                    values,
+                )
+            shared_version = self._count_write(connection, name)
+        self._touch(name, shared_version)
+
+    def _forget_connections(self):
+        self._connections = []
+        self._local = threading.local()
+
+    def close(self):
+        """
+        Ferme les connexions de tous les threads
+        """
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+            self._local = threading.local()
+
+
+class SqlitePresenceIndex:
+    """
+    Présences des engins chez les clients dans la table presence de la base, avec la même
+    interface que PresenceIndex : les durées par fenêtre sont calculées en SQL
+    (horodatages en secondes depuis l'epoch)
+    """
+
+    def __init__(self, store):
+        self._store = store
+
+    def _window(self, start, end, now):
+        return {'start': start, 'end': end, 'now': time.time() if now is None else now}
+
+    def _merge(self, connection, client, equipment, start, end):
+        """
+        Fusionne les présences terminées qui chevauchent [start, end] (événements arrivés en
+        retard) pour que les durées ne soient pas comptées deux fois
+        """
+        rows = connection.execute(PRESENCE_OVERLAPS, (client, equipment, end, start)).fetchall()
+        if len(rows) < 2:
+            return
+        connection.execute(
+            'UPDATE presence SET start_ts = ?, end_ts = ? WHERE rowid = ?',
+            (min(row[1] for row in rows), max(row[2] for row in rows), rows[0][0]),
+        )
+        connection.executemany('DELETE FROM presence WHERE rowid = ?', [(row[0],) for row in rows[1:]])
+
+    def enter(self, client, equipment, ts):
+        """
+        Ouvre une présence; une entrée répétée sans sortie est ignorée
+        """
+        with self._store.transaction() as connection:
+            connection.execute(PRESENCE_ENTER, (client, equipment, ts))
+
+    def exit(self, client, equipment, ts):
+        """
+        Ferme la présence ouverte; une sortie sans entrée est ignorée
+        """
+        with self._store.transaction() as connection:
+            row = connection.execute(PRESENCE_OPEN_START, (client, equipment)).fetchone()
+            if row is None or row[0] > ts:
+                return
+            connection.execute(PRESENCE_EXIT, (ts, client, equipment, ts))
+            self._merge(connection, client, equipment, row[0], ts)
+
+    def add_interval(self, client, equipment, start, end):
+        """
+        Ajoute une présence déjà terminée (historique)
+        """
+        with self._store.transaction() as connection:
+            connection.execute(PRESENCE_ADD, (client, equipment, start, end))
+            self._merge(connection, client, equipment, start, end)
+
+    def clients(self):
+        """
+        Liste les clients connus, dans l'ordre d'apparition
+        """
+        return [client for client, in self._store.query(PRESENCE_CLIENTS)]
+
+    def equipments_at(self, client, start=None, end=None, now=None):
+        """
+        Liste les équipements présents chez un client pendant la fenêtre
+        """
+        return [equipment for _, equipment, _ in self.totals(client, start, end, now)]
+
+    def totals(self, client=None, start=None, end=None, now=None):
+        """
+        Retourne (client, équipement, durée en secondes) pour chaque couple présent pendant la fenêtre
+        """
+        params = self._window(start, end, now)
+        if client is not None:
+            return self._store.query(PRESENCE_CLIENT_TOTALS, dict(params, client=client))
+        return [row[:3] for row in self._store.query(PRESENCE_TOTALS, params)]
+
+    def client_total(self, client, start=None, end=None, now=None):
+        """
+        Durée de présence cumulée (secondes) de tous les engins chez un client sur la fenêtre
+        """
+        return sum(seconds for _, _, seconds in self.totals(client, start, end, now))
+
+    def open_clients(self):
+        """
+        Liste les clients chez qui au moins un engin est actuellement présent
+        """
+        return [client for client, in self._store.query(PRESENCE_OPEN_CLIENTS)]
@@ -0,0 +1,332 @@
+
+# Stockage colonnaire des données de télémétrie
+import itertools
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Schémas typés des tables : nom de colonne -> type pandas
+SCHEMAS = {
+    'equipments': {
+        'id': 'int64',
+        'name': 'string',
+        'type': 'category',
+        'status': 'category',
+        'location': 'category',
+        'client': 'category',
+        'lastUsed': 'datetime64[ns]',
+        'onSite': 'bool',
+    },
+    'tags': {
+        'tagId': 'string',
+        'equipmentId': 'Int64',
+        'battery': 'float64',
+        'needsMaintenance': 'bool',
+    },
+    'monthly_data': {
+        'name': 'string',
+        'Engin Tagged': 'int64',
+        'Engin Enter': 'int64',
+        'Engin Exit': 'int64',
+    },
+    'analytical_data': {
+        'name': 'string',
+        'Utilisation': 'int64',
+        'Maintenance': 'int64',
+        'Idle': 'int64',
+    },
+    'ai_predictions': {
+        'name': 'string',
+        'Actual': 'Int64',
+        'Predicted': 'Int64',
+    },
+    'tag_reads': {
+        'tagId': 'string',
+        'equipmentId': 'Int64',
+        'ts': 'datetime64[ns]',
+        'event': 'category',
+        'location': 'category',
+        'client': 'category',
+        'battery': 'float64',
+        'lat': 'float64',
+        'lon': 'float64',
+    },
+    'status_changes': {
+        'id': 'int64',
+        'ts': 'datetime64[ns]',
+        'status': 'category',
+    },
+    'positions': {
+        'equipmentId': 'int64',
+        'ts': 'datetime64[ns]',
+        'lat': 'float64',
+        'lon': 'float64',
+    },
+    'stock_movements': {
+        'ts': 'datetime64[ns]',
+        'direction': 'category',
+        'quantity': 'int64',
+        'storageTime': 'float64',
+    },
+    'client_visits': {
+        'client': 'category',
+        'visitCount': 'int64',
+        'lastVisit': 'datetime64[ns]',
+    },
+}
+
+# Versions de table uniques pour tout le processus : un stockage recréé ne réutilise jamais
+# une version déjà vue par les caches qui en dépendent
+_table_versions = itertools.count(1)
+
+
+def next_table_version():
+    """
+    Retourne un nouveau numéro de version de table, jamais attribué dans ce processus
+    """
+    return next(_table_versions)
+
+
+def coerce_frame(frame, schema):
+    """
+    Convertit un DataFrame vers les types déclarés dans le schéma
+    """
+    columns = {}
+    for column, dtype in schema.items():
+        values = frame[column] if column in frame else pd.Series([None] * len(frame), index=frame.index)
+        if dtype == 'category':
+            # Catégories dans l'ordre d'apparition pour conserver l'ordre des réponses
+            categories = pd.unique(values.dropna().astype(str))
+            columns[column] = pd.Categorical(values, categories=categories)
+        elif dtype.startswith('datetime64'):
+            columns[column] = pd.to_datetime(values)
+        else:
+            columns[column] = values.astype(dtype)
+    return pd.DataFrame(columns, index=pd.RangeIndex(len(frame)))
+
+
+def _conforms(frame, schema):
+    """
+    Indique si les colonnes d'un DataFrame ont exactement les types déclarés dans le schéma
+    """
+    for column, dtype in schema.items():
+        if column not in frame:
+            return False
+        if dtype == 'category':
+            if not isinstance(frame[column].dtype, pd.CategoricalDtype):
+                return False
+        elif frame[column].dtype != pd.api.types.pandas_dtype(dtype):
+            return False
+    return True
+
+
+def concat_frames(frames, schema):
+    """
+    Concatène des tables de même schéma en conservant les colonnes catégorielles
+    """
+    frames = [frame for frame in frames if len(frame)] or frames[:1]
+    if len(frames) == 1:
+        return frames[0]
+    for column, dtype in schema.items():
+        if dtype != 'category':
+            continue
+        categories = pd.unique(np.concatenate([
+            frame[column].cat.categories.to_numpy(dtype=object) for frame in frames
+        ]))
+        frames = [frame.assign(**{column: frame[column].cat.set_categories(categories)}) for frame in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+def empty_frame(schema):
+    """
+    Crée une table vide respectant le schéma
+    """
+    return coerce_frame(pd.DataFrame({column: [] for column in schema}), schema)
+
+
+class ColumnarStore:
+    """
+    Stockage colonnaire en mémoire : une table pandas typée par jeu de données.
+    Les lectures récupèrent une référence immuable, les écritures remplacent la table.
+    """
+
+    def __init__(self, schemas=SCHEMAS):
+        self._schemas = dict(schemas)
+        self._tables = {name: empty_frame(schema) for name, schema in self._schemas.items()}
+        self._pending_chunks = {}
+        self._pending_updates = {}
+        self._lock = threading.RLock()
+        self._table_versions = {name: 0 for name in self._schemas}
+        self._modified_at = {name: time.time() for name in self._schemas}
+        self.version = 0
+
+    def tables(self):
+        """
+        Liste les noms des tables disponibles
+        """
+        return list(self._schemas)
+
+    def schema(self, name):
+        """
+        Retourne le schéma d'une table
+        """
+        return self._schemas[name]
+
+    def table_version(self, name):
+        """
+        Retourne le numéro de version d'une table, incrémenté à chaque écriture
+        """
+        return self._table_versions[name]
+
+    def modified_at(self, name):
+        """
+        Retourne l'horodatage (epoch) de la dernière écriture dans une table
+        """
+        return self._modified_at[name]
+
+    def _touch(self, name):
+        """
+        Enregistre une écriture dans une table (à appeler sous verrou)
+        """
+        self._table_versions[name] = next_table_version()
+        self._modified_at[name] = time.time()
+        self.version += 1
+
+    def table(self, name):
+        """
+        Retourne la table demandée (à ne pas modifier en place)
+        """
+        if name in self._pending_chunks:
+            self._flush_chunks(name)
+        if name in self._pending_updates:
+            self._flush_updates(name)
+        return self._tables[name]
+
+    def load(self, name, rows):
+        """
+        Remplace le contenu d'une table à partir d'une liste de dictionnaires ou d'un DataFrame
+        """
+        frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame.from_records(rows)
+        frame = coerce_frame(frame, self._schemas[name])
+        with self._lock:
+            self._pending_chunks.pop(name, None)
+            self._pending_updates.pop(name, None)
+            self._tables[name] = frame
+            self._touch(name)
+
+    def restore(self, tables):
+        """
+        Remplace des tables par des DataFrames relus d'un instantané. Les colonnes d'un type
+        différent du schéma (instantanés antérieurs) sont converties.
+        """
+        with self._lock:
+            for name, frame in tables.items():
+                if name not in self._schemas:
+                    continue
+                if not _conforms(frame, self._schemas[name]):
+                    frame = coerce_frame(frame, self._schemas[name])
+                self._pending_chunks.pop(name, None)
+                self._pending_updates.pop(name, None)
+                self._tables[name] = frame
+                self._touch(name)
+
+    def append(self, name, rows):
+        """
+        Ajoute des lignes à la fin d'une table (écriture en mode ajout seul).
+        Les lots sont typés immédiatement et concaténés en une fois à la prochaine lecture.
+        """
+        frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame.from_records(rows)
+        if frame.empty:
+            return 0
+        chunk = coerce_frame(frame, self._schemas[name])
+        with self._lock:
+            if name in self._pending_updates:
+                self._flush_updates(name)
+            self._pending_chunks.setdefault(name, []).append(chunk)
+            self._touch(name)
+        return len(chunk)
+
+    def _flush_chunks(self, name):
+        """
+        Concatène les lots en attente d'une table
+        """
+        with self._lock:
+            chunks = self._pending_chunks.pop(name, None)
+            if chunks:
+                self._tables[name] = concat_frames([self._tables[name]] + chunks, self._schemas[name])
+
+    def upsert(self, name, key, rows):
+        """
+        Enregistre des mises à jour partielles de lignes identifiées par la colonne clé.
+        Les mises à jour sont appliquées en bloc à la prochaine lecture de la table.
+        """
+        if not rows:
+            return
+        with self._lock:
+            pending_key, pending = self._pending_updates.setdefault(name, (key, []))
+            if pending_key != key:
+                raise ValueError(f"Clé de mise à jour incohérente pour {name}: {key}")
+            pending.extend(rows)
+            self._touch(name)
+
+    def _flush_updates(self, name):
+        """
+        Applique de manière vectorisée les mises à jour en attente d'une table
+        """
+        with self._lock:
+            if name not in self._pending_updates:
+                return
+            if name in self._pending_chunks:
+                self._flush_chunks(name)
+            key, rows = self._pending_updates.pop(name)
+            frame = self._tables[name]
+            # Dernière valeur renseignée par colonne pour chaque clé
+            changes = pd.DataFrame.from_records(rows).groupby(key, sort=False).last()
+            positions = pd.Index(frame[key]).get_indexer(changes.index)
+            known = positions >= 0
+
+            updated = frame.copy()
+            for column in changes.columns:
+                if column not in updated:
+                    continue
+                values = changes[column]
+                mask = known & values.notna().to_numpy()
+                if not mask.any():
+                    continue
+                new_values = values[mask]
+                if isinstance(updated[column].dtype, pd.CategoricalDtype):
+                    missing = pd.Index(pd.unique(new_values.astype(str))).difference(updated[column].cat.categories)
+                    if len(missing):
+                        updated[column] = updated[column].cat.add_categories(missing)
+                elif pd.api.types.is_datetime64_any_dtype(updated[column].dtype):
+                    new_values = pd.to_datetime(new_values)
+                else:
+                    # Les valeurs regroupées peuvent être de type objet : la colonne garde le type du schéma
+                    new_values = new_values.astype(self._schemas[name][column])
+                updated.iloc[positions[mask], updated.columns.get_loc(column)] = new_values.to_numpy()
+
+            if not known.all():
+                added = coerce_frame(changes[~known].reset_index(), self._schemas[name])
+                updated = concat_frames([updated, added], self._schemas[name])
+            self._tables[name] = updated
+
+
+def frame_to_records(frame, date_format='%Y-%m-%d'):
+    """
+    Convertit une table en liste de dictionnaires sérialisables en JSON
+    """
+    if frame.empty:
+        return []
+    output = {}
+    for column in frame.columns:
+        series = frame[column]
+        if pd.api.types.is_datetime64_any_dtype(series.dtype):
+            series = series.dt.strftime(date_format)
+        output[column] = series.astype(object).where(series.notna(), None)
+    records = pd.DataFrame(output).to_dict('records')
+    if any(output[column].isna().any() for column in output):
+        # Les valeurs manquantes sont omises, comme dans les jeux de données d'origine
+        records = [{key: value for key, value in row.items() if value is not None} for row in records]
+    return records
@@ -0,0 +1,201 @@
+
+# Distances parcourues par les engins, calculées à partir des positions GPS
+import math
+import threading
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from api.models.store import next_table_version
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Déplacements plus courts que ce seuil (km) entre deux positions sont attribués au bruit GPS
+JITTER_THRESHOLD_KM = 0.005
+
+# Fenêtres glissantes, en jours, terminées au dernier jour de données
+WINDOWS = {'day': 1, 'week': 7, 'month': 30}
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Distance orthodromique (km) entre deux séries de points, calculée de manière vectorisée
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(values) for values in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _point_distance_km(lat1, lon1, lat2, lon2):
+    """
+    Distance orthodromique (km) entre deux points, version scalaire de haversine_km
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, max(0.0, a))))
+
+
+def segment_distances(equipment, ts, lat, lon, jitter_km=JITTER_THRESHOLD_KM):
+    """
+    Trie les positions par engin puis par date et calcule la distance de chaque segment.
+    Retourne les tableaux triés et la distance menant à chaque position (0 pour la première
+    position d'un engin et pour les positions sous le seuil de bruit).
+    Une position à moins de jitter_km du dernier point retenu n'est pas retenue : la distance
+    suivante est mesurée depuis ce point, si bien qu'un engin lent mais régulier accumule
+    ses petits déplacements au lieu de rester à 0 km.
+    """
+    order = np.lexsort((ts, equipment))
+    equipment, ts, lat, lon = equipment[order], ts[order], lat[order], lon[order]
+    distances = np.zeros(len(equipment))
+    if len(equipment) > 1:
+        steps = haversine_km(lat[:-1], lon[:-1], lat[1:], lon[1:])
+        same = equipment[1:] == equipment[:-1]
+        distances[1:] = np.where(same, steps, 0.0)
+        # Cas courant vectorisé (chaque position est retenue); seules les suites de positions
+        # sous le seuil sont reprises une à une depuis le dernier point retenu
+        starts = (np.flatnonzero(same & (steps < jitter_km)) + 1).tolist()
+        if starts:
+            keys, lats, lons = equipment.tolist(), lat.tolist(), lon.tolist()
+        resume = 0
+        for start in starts:
+            if start < resume:
+                continue
+            anchor = row = start - 1
+            row += 1
+            while row < len(keys) and keys[row] == keys[anchor]:
+                distance = _point_distance_km(lats[anchor], lons[anchor], lats[row], lons[row])
+                if distance >= jitter_km:
+                    distances[row] = distance
+                    row += 1
+                    break
+                distances[row] = 0.0
+                row += 1
+            resume = row
+    return equipment, ts, lat, lon, distances
+
+
+class UsageAccumulator:
+    """
+    Distances journalières par engin, mises à jour par lots de positions.
+    La dernière position connue de chaque engin relie les lots entre eux, et les totaux
+    jour/semaine/mois ne lisent que les agrégats journaliers de la fenêtre.
+    """
+
+    def __init__(self, jitter_km=JITTER_THRESHOLD_KM):
+        self.jitter_km = jitter_km
+        self._lock = threading.Lock()
+        self._daily = {}
+        self._last = {}
+        self.latest_day = None
+        # Changée à chaque modification, pour invalider les calculs dérivés; unique dans le processus
+        # (comme les versions de table) pour qu'un accumulateur recréé n'en réutilise aucune
+        self.version = next_table_version()
+
+    def add_day(self, equipment, day, distance):
+        """
+        Ajoute une distance journalière déjà calculée (historique)
+        """
+        with self._lock:
+            days = self._daily.setdefault(equipment, {})
+            days[day] = days.get(day, 0.0) + distance
+            if self.latest_day is None or day > self.latest_day:
+                self.latest_day = day
+            self.version = next_table_version()
+
+    def add_positions(self, equipment, ts, lat, lon):
+        """
+        Intègre un lot de positions (tableaux numpy de même longueur, ts en datetime64[ns])
+        """
+        equipment = np.asarray(equipment, dtype=np.int64)
+        ts = np.asarray(ts, dtype='datetime64[ns]')
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        if not len(equipment):
+            return
+
+        with self._lock:
+            # Rattachement du lot à la dernière position connue de chaque engin;
+            # les positions antérieures à cette dernière position sont ignorées
+            if self._last:
+                known = np.fromiter(self._last.keys(), dtype=np.int64, count=len(self._last))
+                order = np.argsort(known)
+                known = known[order]
+                last = [self._last[key] for key in known.tolist()]
+                positions = np.minimum(np.searchsorted(known, equipment), len(known) - 1)
+                has_last = known[positions] == equipment
+                last_ts = np.array([value[0] for value in last], dtype='datetime64[ns]')
+                keep = ~has_last | (ts >= last_ts[positions])
+                equipment, ts, lat, lon = equipment[keep], ts[keep], lat[keep], lon[keep]
+
+                linked = np.unique(positions[keep & has_last]) if keep.any() else np.array([], dtype=np.int64)
+                equipment = np.concatenate([known[linked], equipment])
+                ts = np.concatenate([last_ts[linked], ts])
+                lat = np.concatenate([np.array([last[index][1] for index in linked.tolist()]), lat])
+                lon = np.concatenate([np.array([last[index][2] for index in linked.tolist()]), lon])
+
+            equipment, ts, lat, lon, distances = segment_distances(equipment, ts, lat, lon, self.jitter_km)
+
+            moved = distances > 0
+            if moved.any():
+                totals = pd.Series(distances[moved]).groupby(
+                    [equipment[moved], ts[moved].astype('datetime64[D]')], sort=False
+                ).sum()
+                for (key, day), distance in totals.items():
+                    day = pd.Timestamp(day).date()
+                    days = self._daily.setdefault(int(key), {})
+                    days[day] = days.get(day, 0.0) + float(distance)
+            if len(ts):
+                latest = pd.Timestamp(ts.max()).date()
+                if self.latest_day is None or latest > self.latest_day:
+                    self.latest_day = latest
+            self.version = next_table_version()
+
+            # Dernière position de chaque engin (date) et dernier point retenu (coordonnées), pour le lot suivant
+            if len(equipment):
+                first = np.r_[True, equipment[1:] != equipment[:-1]]
+                anchors = np.flatnonzero((distances > 0) | first)
+                last_anchors = anchors[np.r_[equipment[anchors][1:] != equipment[anchors][:-1], True]]
+                last_rows = np.flatnonzero(np.r_[equipment[1:] != equipment[:-1], True])
+                for row, anchor in zip(last_rows.tolist(), last_anchors.tolist()):
+                    self._last[int(equipment[row])] = (ts[row], float(lat[anchor]), float(lon[anchor]))
+
+    def totals(self):
+        """
+        Retourne {engin: {'day', 'week', 'month'}} sur les fenêtres terminées au dernier jour de données
+        """
+        with self._lock:
+            if self.latest_day is None:
+                return {}
+            anchor = self.latest_day
+            window_days = [anchor - timedelta(days=offset) for offset in range(max(WINDOWS.values()))]
+            totals = {}
+            for equipment, days in self._daily.items():
+                values = [days.get(day, 0.0) for day in window_days]
+                totals[equipment] = {name: sum(values[:length]) for name, length in WINDOWS.items()}
+            return totals
+
+    def distances(self, start=None, end=None):
+        """
+        Retourne {engin: km} parcourus entre deux dates incluses (bornes facultatives)
+        """
+        with self._lock:
+            return {
+                equipment: sum(
+                    distance for day, distance in days.items()
+                    if (start is None or day >= start) and (end is None or day <= end)
+                )
+                for equipment, days in self._daily.items()
+            }
+
+    def daily_rows(self, start, end):
+        """
+        Retourne les distances journalières (engin, jour, km) entre deux dates incluses
+        """
+        with self._lock:
+            return [
+                (equipment, day, distance)
+                for equipment, days in self._daily.items()
+                for day, distance in days.items()
+                if start <= day <= end
+            ]
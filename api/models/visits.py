@@ -0,0 +1,88 @@
+# Index des visites chez les clients : nombre de visites et dernière visite par client
+import heapq
+import threading
+
+import pandas as pd
+
+
+class VisitIndex:
+    """
+    Fréquence de visite des clients à partir des événements de visite. Chaque client garde
+    son nombre de visites et la date de sa dernière visite (mis à jour en O(1) par événement);
+    un tas trié par date de dernière visite (O(log n) par nouvelle date, les entrées périmées
+    étant ignorées puis écartées) retrouve les clients non visités depuis une date sans parcourir
+    tous les clients.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # client -> [nombre de visites, dernière visite]
+        self._clients = {}
+        # Tas de (dernière visite, client); une entrée dont la date n'est plus celle du client est périmée
+        self._recency = []
+
+    @classmethod
+    def from_frame(cls, visits):
+        """
+        Construit l'index à partir de la table client_visits
+        """
+        index = cls()
+        for client, count, last_visit in zip(
+            visits['client'].tolist(), visits['visitCount'].tolist(), visits['lastVisit'].tolist()
+        ):
+            if pd.isna(client) or pd.isna(last_visit):
+                continue
+            index._clients[client] = [int(count), last_visit.to_pydatetime()]
+            index._recency.append((last_visit.to_pydatetime(), client))
+        heapq.heapify(index._recency)
+        return index
+
+    def _current(self, entry):
+        """
+        Indique si une entrée du tas porte encore la dernière visite de son client
+        """
+        return self._clients[entry[1]][1] == entry[0]
+
+    def record(self, client, ts):
+        """
+        Enregistre une visite; une visite plus ancienne que la dernière n'avance pas sa date
+        """
+        with self._lock:
+            state = self._clients.get(client)
+            if state is None:
+                self._clients[client] = [1, ts]
+                heapq.heappush(self._recency, (ts, client))
+                return
+            state[0] += 1
+            if ts > state[1]:
+                # L'ancienne entrée reste dans le tas, périmée
+                state[1] = ts
+                heapq.heappush(self._recency, (ts, client))
+                if len(self._recency) > 2 * len(self._clients):
+                    self._recency = [(last_visit, client) for client, (_, last_visit) in self._clients.items()]
+                    heapq.heapify(self._recency)
+
+    def rows(self, clients=None):
+        """
+        Retourne (client, nombre de visites, dernière visite), dans l'ordre d'apparition des clients
+        """
+        with self._lock:
+            if clients is None:
+                return [(client, count, last_visit) for client, (count, last_visit) in self._clients.items()]
+            return [(client, *self._clients[client]) for client in clients if client in self._clients]
+
+    def stale(self, before):
+        """
+        Retourne les clients dont la dernière visite est antérieure à before, du plus ancien au plus récent
+        """
+        with self._lock:
+            # Entrées antérieures à before retirées dans l'ordre du tas : les périmées sont écartées,
+            # les autres remises en place
+            found = []
+            while self._recency and self._recency[0][0] < before:
+                entry = heapq.heappop(self._recency)
+                if self._current(entry):
+                    found.append(entry)
+            for entry in found:
+                heapq.heappush(self._recency, entry)
+            return [(client, self._clients[client][0], last_visit) for last_visit, client in found]
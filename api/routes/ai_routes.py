@@ -1,8 +1,8 @@
 
-from api.controllers.ai_controller import analyze_with_ai_controller
+from api.routes.lazy_view import LazyView
 
 def register_ai_routes(app):
     """
     Enregistre les routes liées à l'IA
     """
-    app.add_url_rule('/api/analyze-with-ai', 'analyze_with_ai', analyze_with_ai_controller, methods=['POST'])
+    app.add_url_rule('/api/analyze-with-ai', 'analyze_with_ai', LazyView('api.controllers.ai_controller.analyze_with_ai_controller'), methods=['POST'])
@@ -0,0 +1,7 @@
+from api.routes.lazy_view import LazyView
+
+def register_dashboard_routes(app):
+    """
+    Enregistre la route des tableaux de bord composés (toutes les tuiles d'une page en une requête)
+    """
+    app.add_url_rule('/api/dashboard/<dashboard_type>', 'get_dashboard', LazyView('api.controllers.dashboard_controller.get_dashboard_controller'), methods=['GET'])
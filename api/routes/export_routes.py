@@ -0,0 +1,7 @@
+from api.routes.lazy_view import LazyView
+
+def register_export_routes(app):
+    """
+    Enregistre la route d'export des jeux de données
+    """
+    app.add_url_rule('/api/export/<dataset>', 'export_dataset', LazyView('api.controllers.export_controller.export_dataset_controller'), methods=['GET'])
@@ -0,0 +1,10 @@
+from api.routes.lazy_view import LazyView
+
+def register_ingest_routes(app):
+    """
+    Enregistre les routes d'ingestion des événements du parc
+    """
+    app.add_url_rule('/api/ingest/status-changes', 'ingest_status_changes', LazyView('api.controllers.ingest_controller.ingest_status_changes_controller'), methods=['POST'])
+    app.add_url_rule('/api/ingest/tag-reads', 'ingest_tag_reads', LazyView('api.controllers.ingest_controller.ingest_tag_reads_controller'), methods=['POST'])
+    app.add_url_rule('/api/ingest/stock-movements', 'ingest_stock_movements', LazyView('api.controllers.ingest_controller.ingest_stock_movements_controller'), methods=['POST'])
+    app.add_url_rule('/api/ingest/positions', 'ingest_positions', LazyView('api.controllers.ingest_controller.ingest_positions_controller'), methods=['POST'])
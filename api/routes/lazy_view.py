@@ -0,0 +1,18 @@
+from werkzeug.utils import cached_property, import_string
+
+class LazyView:
+    """
+    Vue chargée au premier appel : le contrôleur (et les services, pandas, OpenAI qu'il importe)
+    n'est importé que lorsque la route est utilisée
+    """
+
+    def __init__(self, import_name):
+        self.__module__, self.__name__ = import_name.rsplit('.', 1)
+        self.import_name = import_name
+
+    @cached_property
+    def view(self):
+        return import_string(self.import_name)
+
+    def __call__(self, *args, **kwargs):
+        return self.view(*args, **kwargs)
@@ -0,0 +1,7 @@
+from api.routes.lazy_view import LazyView
+
+def register_metrics_routes(app):
+    """
+    Enregistre la route d'export des métriques
+    """
+    app.add_url_rule('/api/metrics', 'get_metrics', LazyView('api.controllers.metrics_controller.get_metrics_controller'), methods=['GET'])
@@ -0,0 +1,7 @@
+from api.routes.lazy_view import LazyView
+
+def register_stream_routes(app):
+    """
+    Enregistre la route d'abonnement aux mises à jour en direct
+    """
+    app.add_url_rule('/api/stream', 'stream', LazyView('api.controllers.stream_controller.stream_controller'), methods=['GET'])
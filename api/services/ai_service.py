@@ -1,167 +1,327 @@
 
 # Service pour la génération de réponses IA et insights
+import hashlib
 import json
 import random
+import re
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
-def generate_simulated_ai_response(prompt):
+from api.config.openai_config import (
+    AI_CACHE_MAX_ENTRIES, AI_CACHE_TTL, OPENAI_MAX_CONCURRENCY, OPENAI_MODEL, OPENAI_TIMEOUT, get_openai_client
+)
+from api.services.cache_service import ResponseCache
+from api.services.metrics_service import metrics
+from api.services.insight_service import (
+    activity_by_day, activity_last_week, maintenance_by_month, tag_health, tag_status_by_week,
+    time_by_activity, utilization_by_weekday
+)
+
+SYSTEM_PROMPT = (
+    "Tu es un assistant spécialisé dans l'analyse de données pour une entreprise de gestion d'équipements. "
+    "Tu dois analyser les données et générer des visualisations pertinentes."
+)
+
+# Réponses de l'IA déjà obtenues, indexées par empreinte du prompt normalisé
+completion_cache = ResponseCache(max_entries=AI_CACHE_MAX_ENTRIES)
+
+# Appels en cours vers l'API, partagés par les requêtes portant sur le même prompt
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=OPENAI_MAX_CONCURRENCY, thread_name_prefix='openai')
+
+def prompt_key(prompt, model=OPENAI_MODEL):
+    """
+    Empreinte d'un prompt normalisé (casse et espaces ignorés) pour un modèle donné
+    """
+    normalized = ' '.join(prompt.split()).lower()
+    return hashlib.blake2b(f'{model}\n{normalized}'.encode('utf-8'), digest_size=16).hexdigest()
+
+def _request_completion(client, prompt):
+    """
+    Appel bloquant à l'API OpenAI, exécuté dans le pool de connexions partagé
+    """
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        response = client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7,
+            max_tokens=800
+        )
+        outcome = 'ok'
+        return response.choices[0].message.content
+    finally:
+        metrics.observe(
+            'ai_upstream_duration_seconds', (('call', 'completion'), ('outcome', outcome)), time.perf_counter() - start
+        )
+
+def _release(key, future):
+    """
+    Retire un appel terminé des appels en cours et met en cache sa réponse s'il a réussi
+    """
+    with _in_flight_lock:
+        if _in_flight.get(key) is future:
+            del _in_flight[key]
+    if not future.cancelled() and future.exception() is None and future.result():
+        completion_cache.set(key, future.result(), AI_CACHE_TTL)
+
+def complete_prompt(prompt, timeout=OPENAI_TIMEOUT):
+    """
+    Retourne la réponse de l'IA pour un prompt, depuis le cache si possible.
+    Les requêtes simultanées sur un même prompt partagent un seul appel à l'API.
+    Retourne None si OpenAI n'est pas configuré, en cas d'erreur ou de dépassement du délai.
+    """
+    client = get_openai_client()
+    if client is None:
+        metrics.increment('ai_fallbacks_total', (('reason', 'unconfigured'),))
+        return None
+
+    key = prompt_key(prompt)
+    cached = completion_cache.get(key)
+    if cached is not None:
+        return cached
+
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        leader = future is None
+        if leader:
+            future = _executor.submit(_request_completion, client, prompt)
+            _in_flight[key] = future
+    if leader:
+        # Hors du verrou : le rappel s'exécute immédiatement si l'appel est déjà terminé
+        future.add_done_callback(lambda done: _release(key, done))
+
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        print(f"Délai dépassé ({timeout}s) lors de l'appel à l'API OpenAI")
+        metrics.increment('ai_fallbacks_total', (('reason', 'timeout'),))
+    except Exception as e:
+        print(f"Erreur lors de l'appel à l'API OpenAI: {str(e)}")
+        metrics.increment('ai_fallbacks_total', (('reason', 'error'),))
+    return None
+
+def stream_completion(prompt):
+    """
+    Retourne un itérateur sur les fragments de texte de la réponse de l'IA, au fil de leur génération.
+    Une réponse déjà en cache est renvoyée en un seul fragment; la réponse complète est mise en cache.
+    Retourne None si OpenAI n'est pas configuré.
+    """
+    client = get_openai_client()
+    if client is None:
+        metrics.increment('ai_fallbacks_total', (('reason', 'unconfigured'),))
+        return None
+
+    key = prompt_key(prompt)
+    cached = completion_cache.get(key)
+    if cached is not None:
+        return iter([cached])
+    return _stream_completion(client, key, prompt)
+
+def _stream_completion(client, key, prompt):
+    start = time.perf_counter()
+    parts = []
+    finished = False
+    try:
+        stream = client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7,
+            max_tokens=800,
+            stream=True
+        )
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.delta.content:
+                    if not parts:
+                        metrics.observe('ai_upstream_first_token_seconds', (), time.perf_counter() - start)
+                    parts.append(choice.delta.content)
+                    yield choice.delta.content
+                finished = finished or choice.finish_reason is not None
+        finally:
+            stream.close()
+    finally:
+        metrics.observe(
+            'ai_upstream_duration_seconds', (('call', 'stream'), ('outcome', 'ok' if finished else 'error')),
+            time.perf_counter() - start
+        )
+    # Une réponse interrompue n'est pas mise en cache
+    if parts and finished:
+        completion_cache.set(key, ''.join(parts), AI_CACHE_TTL)
+
+def iter_text_chunks(text):
+    """
+    Découpe un texte en fragments d'un mot (espaces conservés), pour diffuser une réponse simulée
+    """
+    start = 0
+    for index, char in enumerate(text):
+        if char == ' ':
+            yield text[start:index + 1]
+            start = index + 1
+    if start < len(text):
+        yield text[start:]
+
+# Mots-clés reconnus dans les prompts (sans accents, en minuscules) -> intention
+INTENT_KEYWORDS = {
+    'tag': ('tag',),
+    'maintenance': ('maintenance',),
+    'last_week': ('semaine precedente', 'semaine derniere'),
+    'usage': ('utilisation', 'usage'),
+    'time': ('temps', 'duree'),
+    'prediction': ('prediction',),
+}
+
+_KEYWORD_INTENTS = {keyword: intent for intent, keywords in INTENT_KEYWORDS.items() for keyword in keywords}
+
+# Alternative unique de tous les mots-clés; l'assertion avant trouve aussi les occurrences imbriquées
+_KEYWORD_PATTERN = re.compile(
+    '(?=(' + '|'.join(re.escape(keyword) for keyword in sorted(_KEYWORD_INTENTS, key=len, reverse=True)) + '))'
+)
+
+def normalize_prompt(prompt):
+    """
+    Met un prompt en minuscules et retire ses accents
+    """
+    decomposed = unicodedata.normalize('NFKD', prompt.casefold())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+def classify_prompt(prompt):
+    """
+    Retourne l'ensemble des intentions détectées dans un prompt, en une seule passe sur le texte
+    """
+    return frozenset(_KEYWORD_INTENTS[match.group(1)] for match in _KEYWORD_PATTERN.finditer(normalize_prompt(prompt)))
+
+def _select(table, intents, default):
+    """
+    Retourne la première entrée d'une table (intention, valeur) dont l'intention a été détectée
+    """
+    for intent, value in table:
+        if intent in intents:
+            return value
+    return default
+
+# Phrase d'analyse des réponses simulées, par ordre de priorité des intentions
+SIMULATED_ANALYSES = [
+    ('tag', "L'analyse des tags montre que certains équipements n'ont pas été correctement suivis. "),
+    ('maintenance', "Les cycles de maintenance pourraient être optimisés pour réduire les temps d'arrêt. "),
+    ('last_week', "La semaine dernière, nous avons observé une baisse d'activité de 15% par rapport à la normale. "),
+]
+DEFAULT_SIMULATED_ANALYSIS = (
+    "L'utilisation des équipements montre des tendances intéressantes. Je recommande d'optimiser les cycles de maintenance. "
+)
+
+SIMULATED_REMARKS = [
+    "L'efficacité globale du parc d'équipements est de 78%.",
+    "3 équipements nécessitent une maintenance dans les 7 prochains jours.",
+    "La zone B montre une activité plus intense que les autres zones."
+]
+
+# Premier graphique (titre, requête sur les données du parc), par ordre de priorité des intentions
+PRIMARY_CHARTS = [
+    ('usage', ("Analyse de l'utilisation des équipements", utilization_by_weekday)),
+    ('maintenance', ("Périodes de maintenance par type d'équipement", maintenance_by_month)),
+    ('tag', ("Statut des tags par semaine", tag_status_by_week)),
+    ('last_week', ("Activité de la semaine dernière", activity_last_week)),
+]
+DEFAULT_PRIMARY_CHART = ("Activité des engins par jour", activity_by_day)
+
+DEFAULT_SECONDARY_CHART = ("Répartition du temps par activité", time_by_activity)
+
+def _last_week_causes():
+    # Aucune donnée ne renseigne les causes d'arrêt : répartition indicative
+    return [
+        {"name": "Météo", "value": 45},
+        {"name": "Pannes", "value": 30},
+        {"name": "Personnel", "value": 25}
+    ]
+
+# Second graphique (titre, requête), par ordre de priorité des intentions
+SECONDARY_CHARTS = [
+    ('time', DEFAULT_SECONDARY_CHART),
+    ('tag', ("État des tags", tag_health)),
+    ('last_week', ("Causes de baisse d'activité", _last_week_causes)),
+]
+
+PRIMARY_COLORS = ["#1E88E5", "#E91E63", "#66BB6A"]
+SECONDARY_COLORS = ["#4CAF50", "#FFC107", "#F44336"]
+
+# Recommandations, par ordre de priorité des intentions
+RECOMMENDATIONS = [
+    ('maintenance', [
+        "Optimisez vos cycles de maintenance pour réduire les temps d'arrêt",
+        "Implementez un système de maintenance prédictive pour anticiper les pannes",
+        "Formez davantage de techniciens pour réduire les délais de maintenance"
+    ]),
+    ('tag', [
+        "Remplacez les tags montrant des signes de faiblesse de batterie",
+        "Vérifiez régulièrement l'état des tags après des conditions météorologiques difficiles",
+        "Utilisez un système de rotation des tags pour maximiser la durée de vie des batteries"
+    ]),
+    ('last_week', [
+        "Planifiez les travaux extérieurs en fonction des prévisions météorologiques",
+        "Renforcez la maintenance préventive avant les périodes de forte activité",
+        "Mettez en place un système de personnel de réserve pour les jours de forte demande"
+    ]),
+]
+DEFAULT_RECOMMENDATIONS = [
+    "Optimisez vos cycles de maintenance pour réduire les temps d'arrêt",
+    "Redistribuez les équipements entre les zones pour équilibrer l'utilisation",
+    "Augmentez le nombre de tags disponibles pour améliorer le suivi"
+]
+
+def generate_simulated_ai_response(prompt, intents=None):
     """
     Fonction génératrice de réponse simulée pour l'IA
     """
     print(f"Génération d'une réponse simulée pour le prompt: {prompt}")
-    
+    if intents is None:
+        intents = classify_prompt(prompt)
+
     response_text = f"Analyse des données pour '{prompt}'. "
-    
-    if "tags" in prompt.lower() or "tag" in prompt.lower():
-        response_text += "L'analyse des tags montre que certains équipements n'ont pas été correctement suivis. "
-    elif "maintenance" in prompt.lower():
-        response_text += "Les cycles de maintenance pourraient être optimisés pour réduire les temps d'arrêt. "
-    elif "semaine précédente" in prompt.lower() or "semaine dernière" in prompt.lower():
-        response_text += "La semaine dernière, nous avons observé une baisse d'activité de 15% par rapport à la normale. "
-    else:
-        response_text += "L'utilisation des équipements montre des tendances intéressantes. Je recommande d'optimiser les cycles de maintenance. "
-    
-    remarks = [
-        response_text,
-        "L'efficacité globale du parc d'équipements est de 78%.",
-        "3 équipements nécessitent une maintenance dans les 7 prochains jours.",
-        "La zone B montre une activité plus intense que les autres zones."
-    ]
-    
-    return remarks
+    response_text += _select(SIMULATED_ANALYSES, intents, DEFAULT_SIMULATED_ANALYSIS)
+    return [response_text] + SIMULATED_REMARKS
 
-def create_visualizations(prompt):
+def create_visualizations(prompt, intents=None):
     """
     Fonction pour créer les visualisations en fonction du prompt
     """
-    # Personnaliser les visualisations en fonction du prompt
-    title1 = "Analyse standard"
-    title2 = "Répartition standard"
-    data1 = []
-    data2 = []
-    colors1 = ["#1E88E5", "#E91E63", "#66BB6A"]
-    colors2 = ["#4CAF50", "#FFC107", "#F44336"]
-    
-    # Personnaliser les visualisations en fonction du prompt
-    if "utilisation" in prompt.lower() or "usage" in prompt.lower():
-        title1 = "Analyse de l'utilisation des équipements"
-        data1 = [
-            {"name": "Lun", "Bulldozer": 35, "Excavatrice": 28, "Chargeuse": 20},
-            {"name": "Mar", "Bulldozer": 32, "Excavatrice": 25, "Chargeuse": 22},
-            {"name": "Mer", "Bulldozer": 30, "Excavatrice": 27, "Chargeuse": 24},
-            {"name": "Jeu", "Bulldozer": 34, "Excavatrice": 29, "Chargeuse": 26},
-            {"name": "Ven", "Bulldozer": 36, "Excavatrice": 31, "Chargeuse": 28},
-        ]
-    elif "maintenance" in prompt.lower():
-        title1 = "Périodes de maintenance par type d'équipement"
-        data1 = [
-            {"name": "Jan", "Bulldozer": 5, "Excavatrice": 3, "Chargeuse": 2},
-            {"name": "Fév", "Bulldozer": 3, "Excavatrice": 4, "Chargeuse": 3},
-            {"name": "Mar", "Bulldozer": 2, "Excavatrice": 5, "Chargeuse": 4},
-            {"name": "Avr", "Bulldozer": 4, "Excavatrice": 2, "Chargeuse": 5},
-            {"name": "Mai", "Bulldozer": 6, "Excavatrice": 3, "Chargeuse": 2},
-        ]
-    elif "tag" in prompt.lower():
-        title1 = "Statut des tags par semaine"
-        data1 = [
-            {"name": "Semaine 1", "Actifs": 42, "Inactifs": 8, "En panne": 2},
-            {"name": "Semaine 2", "Actifs": 40, "Inactifs": 9, "En panne": 3},
-            {"name": "Semaine 3", "Actifs": 38, "Inactifs": 10, "En panne": 4},
-            {"name": "Semaine 4", "Actifs": 41, "Inactifs": 7, "En panne": 4},
-        ]
-    elif "semaine précédente" in prompt.lower() or "semaine dernière" in prompt.lower():
-        title1 = "Activité de la semaine dernière"
-        data1 = [
-            {"name": "Lundi", "Activité": 65, "Moyenne mensuelle": 72},
-            {"name": "Mardi", "Activité": 62, "Moyenne mensuelle": 70},
-            {"name": "Mercredi", "Activité": 58, "Moyenne mensuelle": 68},
-            {"name": "Jeudi", "Activité": 55, "Moyenne mensuelle": 67},
-            {"name": "Vendredi", "Activité": 60, "Moyenne mensuelle": 65},
-        ]
-    else:
-        title1 = "Activité des engins par jour"
-        data1 = [
-            {"name": "Lundi", "Actifs": 18, "En pause": 7, "En maintenance": 5},
-            {"name": "Mardi", "Actifs": 20, "En pause": 5, "En maintenance": 5},
-            {"name": "Mercredi", "Actifs": 22, "En pause": 4, "En maintenance": 4},
-            {"name": "Jeudi", "Actifs": 21, "En pause": 5, "En maintenance": 4},
-            {"name": "Vendredi", "Actifs": 19, "En pause": 6, "En maintenance": 5},
-        ]
-    
-    # Personnaliser le second graphique
-    if "temps" in prompt.lower() or "durée" in prompt.lower():
-        title2 = "Répartition du temps par activité"
-        data2 = [
-            {"name": "Opérationnel", "value": 65},
-            {"name": "En attente", "value": 20},
-            {"name": "Maintenance", "value": 15}
-        ]
-    elif "tag" in prompt.lower():
-        title2 = "État des tags"
-        data2 = [
-            {"name": "Fonctionnels", "value": 82},
-            {"name": "Faible batterie", "value": 12},
-            {"name": "Défectueux", "value": 6}
-        ]
-    elif "semaine précédente" in prompt.lower() or "semaine dernière" in prompt.lower():
-        title2 = "Causes de baisse d'activité"
-        data2 = [
-            {"name": "Météo", "value": 45},
-            {"name": "Pannes", "value": 30},
-            {"name": "Personnel", "value": 25}
-        ]
-    else:
-        title2 = "Répartition du temps par activité"
-        data2 = [
-            {"name": "Opérationnel", "value": 65},
-            {"name": "En attente", "value": 20},
-            {"name": "Maintenance", "value": 15}
-        ]
-    
-    custom_insights = [
+    if intents is None:
+        intents = classify_prompt(prompt)
+
+    title1, query1 = _select(PRIMARY_CHARTS, intents, DEFAULT_PRIMARY_CHART)
+    title2, query2 = _select(SECONDARY_CHARTS, intents, DEFAULT_SECONDARY_CHART)
+    return [
         {
             "title": title1,
-            "type": "bar" if "prédiction" not in prompt.lower() else "line",
-            "data": data1,
-            "colors": colors1
+            "type": "line" if 'prediction' in intents else "bar",
+            "data": query1(),
+            "colors": PRIMARY_COLORS
         },
         {
             "title": title2,
             "type": "pie",
-            "data": data2,
-            "colors": colors2
+            "data": query2(),
+            "colors": SECONDARY_COLORS
         }
     ]
-    
-    return custom_insights
 
-def generate_recommendations(prompt):
+def generate_recommendations(prompt, intents=None):
     """
     Fonction pour générer des recommandations basées sur le prompt
     """
-    recommendations = []
-    if "maintenance" in prompt.lower():
-        recommendations = [
-            "Optimisez vos cycles de maintenance pour réduire les temps d'arrêt",
-            "Implementez un système de maintenance prédictive pour anticiper les pannes",
-            "Formez davantage de techniciens pour réduire les délais de maintenance"
-        ]
-    elif "tag" in prompt.lower():
-        recommendations = [
-            "Remplacez les tags montrant des signes de faiblesse de batterie",
-            "Vérifiez régulièrement l'état des tags après des conditions météorologiques difficiles",
-            "Utilisez un système de rotation des tags pour maximiser la durée de vie des batteries"
-        ]
-    elif "semaine précédente" in prompt.lower() or "semaine dernière" in prompt.lower():
-        recommendations = [
-            "Planifiez les travaux extérieurs en fonction des prévisions météorologiques",
-            "Renforcez la maintenance préventive avant les périodes de forte activité",
-            "Mettez en place un système de personnel de réserve pour les jours de forte demande"
-        ]
-    else:
-        recommendations = [
-            "Optimisez vos cycles de maintenance pour réduire les temps d'arrêt",
-            "Redistribuez les équipements entre les zones pour équilibrer l'utilisation",
-            "Augmentez le nombre de tags disponibles pour améliorer le suivi"
-        ]
-    
-    return recommendations
+    if intents is None:
+        intents = classify_prompt(prompt)
+    return _select(RECOMMENDATIONS, intents, DEFAULT_RECOMMENDATIONS)
@@ -0,0 +1,191 @@
+# Service de cache des réponses de l'API (durée de vie, taille bornée LRU, invalidation)
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Response, g, request
+
+from api.config.cache_config import CACHE_DEFAULT_TTL, CACHE_MAX_ENTRIES, CACHE_TTLS
+
+# Tables dont les réponses dépendent aussi de la date du jour (UTC) : jours écoulés depuis la
+# dernière visite d'un client. Leurs réponses changent à minuit sans écriture dans la table.
+DAILY_TABLES = ('client_visits',)
+
+# Corps de réponse déjà encodé, avec ses en-têtes de validation HTTP
+EncodedBody = namedtuple('EncodedBody', ['body', 'mimetype', 'etag', 'last_modified'])
+
+class ResponseCache:
+    """
+    Cache LRU de réponses avec durée de vie par entrée et invalidation par table
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """
+        Retourne la valeur en cache pour une clé, ou None si absente ou expirée
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, _, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl, depends_on=()):
+        """
+        Enregistre une valeur pour une durée donnée, liée aux tables dont elle dépend
+        """
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, frozenset(depends_on), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, tables=None):
+        """
+        Supprime les entrées dépendant des tables indiquées (toutes si tables vaut None)
+        """
+        with self._lock:
+            if tables is None:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                tables = set(tables)
+                stale = [key for key, (_, depends_on, _) in self._entries.items() if depends_on & tables]
+                for key in stale:
+                    del self._entries[key]
+                removed = len(stale)
+            self.invalidations += removed
+            return removed
+
+    def stats(self):
+        """
+        Retourne les compteurs d'utilisation du cache
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'maxEntries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRatio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+# Cache partagé par tous les contrôleurs
+response_cache = ResponseCache()
+
+# Fonctions appelées avec les tables modifiées après chaque écriture (diffusion en direct)
+_invalidation_listeners = []
+
+def on_invalidate(listener):
+    """
+    Enregistre une fonction appelée avec les tables modifiées à chaque invalidation
+    """
+    _invalidation_listeners.append(listener)
+
+def invalidate_tables(tables):
+    """
+    Invalide les réponses en cache construites à partir des tables modifiées
+    """
+    removed = response_cache.invalidate(tables)
+    for listener in _invalidation_listeners:
+        listener(tables)
+    return removed
+
+def current_day():
+    """
+    Retourne la date du jour (UTC) et l'horodatage (epoch) de son début
+    """
+    now = datetime.now(timezone.utc)
+    return now.date(), now.replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+def _data_version(depends_on):
+    """
+    Retourne la version des tables dont dépend une réponse et la date de leur dernière écriture.
+    Pour les tables de DAILY_TABLES, la date du jour fait partie de la version et minuit compte
+    comme une modification (pas de 304 sur une réponse de la veille).
+    """
+    # Import différé : le dépôt charge pandas, inutile au démarrage de l'application
+    from api.models.repository import get_store
+
+    store = get_store()
+    version = tuple(store.table_version(name) for name in depends_on)
+    modified_at = max((store.modified_at(name) for name in depends_on), default=time.time())
+    if set(depends_on).intersection(DAILY_TABLES):
+        day, day_start = current_day()
+        version += (day,)
+        modified_at = max(modified_at, day_start)
+    return version, modified_at
+
+def _request_key(version):
+    """
+    Construit la clé de cache d'une requête : route, paramètres de requête triés et version des données
+    """
+    args = tuple(sorted(request.args.items(multi=True)))
+    return (request.endpoint, tuple(sorted((request.view_args or {}).items())), args, version)
+
+def _encode(response, modified_at):
+    """
+    Fige le corps d'une réponse avec son ETag fort et sa date de dernière modification
+    """
+    body = response.get_data()
+    etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    last_modified = datetime.fromtimestamp(int(modified_at), tz=timezone.utc)
+    return EncodedBody(body, response.mimetype, etag, last_modified)
+
+def _conditional_response(encoded):
+    """
+    Construit la réponse à partir du corps encodé, ou un 304 si le client possède déjà cette version
+    """
+    response = Response(encoded.body, status=200, mimetype=encoded.mimetype)
+    response.set_etag(encoded.etag)
+    response.last_modified = encoded.last_modified
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+def cached_response(depends_on=()):
+    """
+    Décorateur de contrôleur : met en cache le corps encodé des réponses 200 par version des données,
+    et répond 304 aux requêtes conditionnelles (If-None-Match, If-Modified-Since) déjà à jour
+    """
+    def decorator(controller):
+        @wraps(controller)
+        def wrapper(*args, **kwargs):
+            version, modified_at = _data_version(depends_on)
+            key = _request_key(version)
+            encoded = response_cache.get(key)
+            g.cache_result = 'miss' if encoded is None else 'hit'
+            if encoded is None:
+                response = controller(*args, **kwargs)
+                if not isinstance(response, Response) or response.status_code != 200 or response.is_streamed:
+                    return response
+                encoded = _encode(response, modified_at)
+                ttl = CACHE_TTLS.get(request.endpoint, CACHE_DEFAULT_TTL)
+                response_cache.set(key, encoded, ttl, depends_on)
+            return _conditional_response(encoded)
+        return wrapper
+    return decorator
@@ -0,0 +1,72 @@
+# Service de composition des tableaux de bord : toutes les tuiles d'une page en une seule réponse
+from api.services.equipment_service import get_distribution, get_status_distribution, get_zone_distribution
+from api.services.stats_service import (
+    DashboardData, get_monthly_data, get_analytical_data, get_ai_predictions, get_global_stats,
+    get_equipment_presence, get_client_ranking, get_stock_analysis,
+    get_client_visits, get_dashboard_stats
+)
+
+# Tables lues par les indicateurs des tableaux de bord (voir get_dashboard_stats)
+DASHBOARD_STATS_TABLES = ('tag_reads', 'positions', 'equipments', 'client_visits')
+
+# Tuiles de chaque tableau de bord : nom -> (construction à partir des agrégats partagés, tables lues)
+DASHBOARD_TILES = {
+    'overview': {
+        'stats': (get_global_stats, ('equipments', 'tags')),
+        'statusDistribution': (lambda data: get_status_distribution(data.snapshot), ('equipments',)),
+        'zoneDistribution': (lambda data: get_zone_distribution(data.snapshot), ('equipments',)),
+        'typeDistribution': (lambda data: get_distribution('type'), ('equipments',)),
+        'monthlyData': (lambda data: get_monthly_data(), ('monthly_data',)),
+        'analyticalData': (lambda data: get_analytical_data(), ('analytical_data',)),
+        'aiPredictions': (lambda data: get_ai_predictions(), ('ai_predictions',)),
+    },
+    'equipment-presence': {
+        'stats': (lambda data: get_dashboard_stats('equipment-presence', data), DASHBOARD_STATS_TABLES),
+        'presence': (lambda data: get_equipment_presence(data=data), ('tag_reads', 'equipments')),
+        'clientRanking': (lambda data: get_client_ranking(data=data), DASHBOARD_STATS_TABLES),
+    },
+    'client-ranking': {
+        'stats': (lambda data: get_dashboard_stats('client-ranking', data), DASHBOARD_STATS_TABLES),
+        'clientRanking': (lambda data: get_client_ranking(data=data), DASHBOARD_STATS_TABLES),
+        'clientVisits': (lambda data: get_client_visits(), ('client_visits',)),
+    },
+    'equipment-usage': {
+        'stats': (lambda data: get_dashboard_stats('equipment-usage', data), DASHBOARD_STATS_TABLES),
+        'usage': (lambda data: data.usage_rows, ('tag_reads', 'positions', 'equipments')),
+    },
+    'stock-analysis': {
+        'stats': (lambda data: get_dashboard_stats('stock-analysis', data), ('stock_movements',)),
+        'daily': (lambda data: get_stock_analysis('daily'), ('stock_movements',)),
+        'weekly': (lambda data: get_stock_analysis('weekly'), ('stock_movements',)),
+        'monthly': (lambda data: get_stock_analysis('monthly'), ('stock_movements',)),
+    },
+    'client-visits': {
+        'stats': (lambda data: get_dashboard_stats('client-visits', data), DASHBOARD_STATS_TABLES),
+        'clientVisits': (lambda data: get_client_visits(), ('client_visits',)),
+    },
+}
+
+def dashboard_tables(dashboard_type):
+    """
+    Retourne les tables lues par l'ensemble des tuiles d'un tableau de bord
+    """
+    return tuple(sorted({table for _, tables in DASHBOARD_TILES[dashboard_type].values() for table in tables}))
+
+def get_dashboard(dashboard_type, tiles=None, data=None):
+    """
+    Construit toutes les tuiles d'un tableau de bord (ou la sélection demandée) en une passe :
+    les agrégats communs à plusieurs tuiles ne sont calculés qu'une fois
+    """
+    if dashboard_type not in DASHBOARD_TILES:
+        raise ValueError(f"Tableau de bord inconnu: {dashboard_type}")
+    definition = DASHBOARD_TILES[dashboard_type]
+    unknown = [tile for tile in tiles or () if tile not in definition]
+    if unknown:
+        raise ValueError(f"Tuiles inconnues pour {dashboard_type}: {', '.join(unknown)}")
+
+    data = data or DashboardData()
+    return {
+        name: build(data)
+        for name, (build, _) in definition.items()
+        if not tiles or name in tiles
+    }
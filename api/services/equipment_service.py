@@ -1,45 +1,210 @@
-
 # Service pour la gestion des équipements
-from api.models.data import equipments
+import base64
+import binascii
+import threading
+
+import numpy as np
+import pandas as pd
+
+from api.models.repository import get_counters, get_frame, get_records, get_sql_store, get_store
+from api.models.sqlite_store import quote
+from api.models.store import frame_to_records
+
+# Dimensions catégorielles disponibles pour les répartitions : nom public -> colonne
+DISTRIBUTION_DIMENSIONS = {
+    'status': 'status',
+    'location': 'location',
+    'zone': 'location',
+    'type': 'type',
+    'client': 'client',
+}
+
+# Taille de page par défaut et maximale pour la pagination par curseur
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Nombre de lignes converties à la fois en mode flux
+STREAM_CHUNK_ROWS = 1000
+
+_sorted_cache = {'version': None, 'frame': None}
+_sorted_lock = threading.Lock()
 
 def get_equipment_list():
     """
     Récupère la liste de tous les équipements
     """
-    return equipments
+    return get_records('equipments')
+
+def encode_cursor(equipment_id):
+    """
+    Encode l'identifiant du dernier équipement renvoyé en curseur opaque
+    """
+    return base64.urlsafe_b64encode(str(int(equipment_id)).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Décode un curseur de pagination en identifiant d'équipement
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Curseur invalide: {cursor}")
+
+def _equipments_by_id():
+    """
+    Retourne la table des équipements triée par identifiant, recalculée seulement quand la table change
+    """
+    store = get_store()
+    frame = store.table('equipments')
+    version = store.table_version('equipments')
+    with _sorted_lock:
+        if _sorted_cache['version'] != version:
+            _sorted_cache['frame'] = frame.sort_values('id', kind='stable', ignore_index=True)
+            _sorted_cache['version'] = version
+        return _sorted_cache['frame']
+
+def _query_equipments_sql(store, statuses, locations, fields, cursor, limit):
+    """
+    Version SQL de query_equipments : filtres, tri et pagination exécutés par la base
+    """
+    columns = ['id'] + [field for field in fields or store.schema('equipments') if field != 'id']
+    clauses, params = [], []
+    if cursor is not None:
+        clauses.append('id > ?')
+        params.append(decode_cursor(cursor))
+    for column, values in (('status', statuses), ('location', locations)):
+        if values:
+            clauses.append(f"{quote(column)} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    sql = f"SELECT {', '.join(map(quote, columns))} FROM equipments"
+    if clauses:
+        sql += ' WHERE ' + ' AND '.join(clauses)
+    sql += ' ORDER BY id'
+    if limit is not None:
+        sql += ' LIMIT ?'
+        params.append(limit + 1)
+    frame = store.query_frame('equipments', sql, params, columns)
+
+    next_cursor = None
+    if limit is not None and len(frame) > limit:
+        frame = frame.iloc[:limit]
+        next_cursor = encode_cursor(frame['id'].iloc[-1])
+    if fields:
+        frame = frame[list(fields)]
+    return frame, next_cursor
 
-def get_status_distribution():
+def query_equipments(statuses=None, locations=None, fields=None, cursor=None, limit=None):
     """
-    Calcule la répartition des équipements par statut
+    Filtre, projette et pagine les équipements par identifiant croissant.
+    Retourne la table résultante et le curseur de la page suivante (None en fin de liste).
     """
-    active = sum(1 for eq in equipments if eq['status'] == 'Actif')
-    maintenance = sum(1 for eq in equipments if eq['status'] == 'Maintenance')
-    inactive = sum(1 for eq in equipments if eq['status'] == 'Inactif')
-    
-    total = len(equipments)
-    
-    data = [
-        {'name': 'Actif', 'value': (active / total) * 100},
-        {'name': 'Maintenance', 'value': (maintenance / total) * 100},
-        {'name': 'Inactif', 'value': (inactive / total) * 100}
+    if fields:
+        unknown = [field for field in fields if field not in get_store().schema('equipments')]
+        if unknown:
+            raise ValueError(f"Champs inconnus: {', '.join(unknown)}")
+    store = get_sql_store()
+    if store is not None:
+        return _query_equipments_sql(store, statuses, locations, fields, cursor, limit)
+
+    frame = _equipments_by_id()
+
+    if cursor is not None:
+        start = np.searchsorted(frame['id'].to_numpy(), decode_cursor(cursor), side='right')
+        frame = frame.iloc[start:]
+
+    mask = np.ones(len(frame), dtype=bool)
+    if statuses:
+        mask &= frame['status'].isin(statuses).to_numpy()
+    if locations:
+        mask &= frame['location'].isin(locations).to_numpy()
+    if not mask.all():
+        frame = frame[mask]
+
+    next_cursor = None
+    if limit is not None and len(frame) > limit:
+        frame = frame.iloc[:limit]
+        next_cursor = encode_cursor(frame['id'].iloc[-1])
+
+    if fields:
+        frame = frame[list(fields)]
+    return frame, next_cursor
+
+def iter_equipment_records(frame, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    Convertit les équipements en dictionnaires par blocs, pour une mémoire constante en mode flux
+    """
+    for start in range(0, len(frame), chunk_rows):
+        yield from frame_to_records(frame.iloc[start:start + chunk_rows])
+
+def _group_codes(series):
+    """
+    Associe chaque ligne à un code de groupe (-1 pour les valeurs manquantes)
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), list(series.cat.categories)
+    codes, labels = pd.factorize(series, use_na_sentinel=True)
+    return codes, list(labels)
+
+def _format_distribution(labels, counts, total):
+    """
+    Construit la réponse (nom, pourcentage, nombre) à partir des comptages par groupe
+    """
+    if total == 0:
+        return []
+    counts = np.asarray(counts, dtype=np.int64)
+    percentages = counts / total * 100
+    return [
+        {'name': label, 'value': float(percentage), 'count': int(count)}
+        for label, count, percentage in zip(labels, counts, percentages)
+        if count > 0
     ]
-    
-    return data
-
-def get_zone_distribution():
-    """
-    Calcule la répartition des équipements par zone
-    """
-    zones = {}
-    
-    for eq in equipments:
-        location = eq['location']
-        if location in zones:
-            zones[location] += 1
-        else:
-            zones[location] = 1
-    
-    total = len(equipments)
-    data = [{'name': zone, 'value': (count / total) * 100} for zone, count in zones.items()]
-    
-    return data
+
+def compute_distribution(series):
+    """
+    Calcule en une seule passe le nombre et le pourcentage de lignes par valeur
+    """
+    if len(series) == 0:
+        return []
+
+    codes, labels = _group_codes(series)
+    counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+    return _format_distribution(labels, counts, len(series))
+
+def get_distribution(dimension):
+    """
+    Calcule la répartition des équipements selon une dimension catégorielle
+    """
+    if dimension not in DISTRIBUTION_DIMENSIONS:
+        raise ValueError(f"Dimension inconnue: {dimension}")
+    if DISTRIBUTION_DIMENSIONS[dimension] == 'status':
+        return get_status_distribution()
+    if DISTRIBUTION_DIMENSIONS[dimension] == 'location':
+        return get_zone_distribution()
+    column = DISTRIBUTION_DIMENSIONS[dimension]
+    store = get_sql_store()
+    if store is not None:
+        # Comptage par groupe dans la base, valeurs dans l'ordre d'apparition
+        rows = store.query(f'SELECT {quote(column)}, COUNT(*) FROM equipments GROUP BY 1 ORDER BY MIN(rowid)')
+        counted = [(label, count) for label, count in rows if label is not None]
+        return _format_distribution(
+            [label for label, _ in counted], [count for _, count in counted], sum(count for _, count in rows)
+        )
+    frame = get_frame('equipments')
+    return compute_distribution(frame[column])
+
+def get_status_distribution(snapshot=None):
+    """
+    Calcule la répartition des équipements par statut à partir des compteurs matérialisés
+    """
+    snapshot = snapshot or get_counters().snapshot()
+    counts = snapshot['statusCounts']
+    return _format_distribution(list(counts), list(counts.values()), snapshot['totalEngines'])
+
+def get_zone_distribution(snapshot=None):
+    """
+    Calcule la répartition des équipements par zone à partir des compteurs matérialisés
+    """
+    snapshot = snapshot or get_counters().snapshot()
+    counts = snapshot['zoneCounts']
+    return _format_distribution(list(counts), list(counts.values()), snapshot['totalEngines'])
@@ -0,0 +1,263 @@
+# Service d'export des jeux de données : lignes lues par blocs et sérialisées au fil de l'envoi
+import importlib
+import io
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from api.models.repository import get_sql_store, get_store
+from api.models.sqlite_store import quote, to_sql_value
+from api.models.store import frame_to_records
+from api.services.stats_service import (
+    get_equipment_presence, get_client_ranking, get_equipment_usage, get_stock_analysis, get_client_visits
+)
+
+# Lignes lues et sérialisées par bloc (un groupe de lignes par bloc en Parquet)
+EXPORT_CHUNK_ROWS = 10000
+
+# Précision des horodatages ISO 8601 dans les fichiers CSV et NDJSON
+EXPORT_DATE_UNIT = 's'
+
+# Formats d'export -> type MIME de la réponse
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+# Historiques et séries lus directement dans le stockage : jeu -> (table, colonne filtrée par from et to)
+TABLE_DATASETS = {
+    'stock-movements': ('stock_movements', 'ts'),
+    'presence-history': ('tag_reads', 'ts'),
+    'positions': ('positions', 'ts'),
+    'status-changes': ('status_changes', 'ts'),
+    'monthly-data': ('monthly_data', None),
+    'analytical-data': ('analytical_data', None),
+    'ai-predictions': ('ai_predictions', None),
+}
+
+
+def _stale_days(args):
+    """
+    Lit le paramètre stale_days de l'export des visites (entier positif facultatif)
+    """
+    value = args.get('stale_days')
+    if value is None:
+        return None
+    if not value.isdigit():
+        raise ValueError(f"stale_days doit être un entier positif: {value}")
+    return int(value)
+
+
+# Jeux calculés par le service des statistiques : jeu -> fonction(paramètres, début, fin)
+COMPUTED_DATASETS = {
+    'equipment-presence': lambda args, start, end: get_equipment_presence(args.get('client'), start, end),
+    'client-ranking': lambda args, start, end: get_client_ranking(args.get('metric', 'duration'), None, start, end),
+    'equipment-usage': lambda args, start, end: get_equipment_usage(),
+    'stock-analysis': lambda args, start, end: get_stock_analysis(
+        args.get('period', 'daily'), args.get('bucket'), start, end
+    ),
+    'client-visits': lambda args, start, end: get_client_visits(_stale_days(args)),
+}
+
+
+def export_datasets():
+    """
+    Liste les jeux de données exportables
+    """
+    return list(TABLE_DATASETS) + list(COMPUTED_DATASETS)
+
+
+@lru_cache(maxsize=None)
+def _pyarrow():
+    """
+    Importe pyarrow et pyarrow.parquet une seule fois; retourne None s'ils ne sont pas utilisables
+    (non installés, ou compilés pour une autre version de numpy)
+    """
+    try:
+        return importlib.import_module('pyarrow'), importlib.import_module('pyarrow.parquet')
+    except Exception as e:
+        print(f"Export parquet indisponible: {str(e)}")
+        return None
+
+
+def parquet_available():
+    """
+    Indique si l'export Parquet est possible (pyarrow, dépendance facultative, s'importe réellement)
+    """
+    return _pyarrow() is not None
+
+
+def _iter_frame(frame, column, start, end, chunk_rows):
+    """
+    Découpe une table en blocs, filtrés bloc par bloc sur la fenêtre [start, end].
+    Un bloc vide est retourné si aucune ligne ne correspond, pour conserver les colonnes.
+    """
+    sent = False
+    for offset in range(0, len(frame), chunk_rows):
+        chunk = frame.iloc[offset:offset + chunk_rows]
+        if column is not None and start is not None:
+            chunk = chunk[(chunk[column] >= start).to_numpy()]
+        if column is not None and end is not None:
+            chunk = chunk[(chunk[column] <= end).to_numpy()]
+        if len(chunk):
+            sent = True
+            yield chunk
+    if not sent:
+        yield frame.iloc[:0]
+
+
+def _iter_table_sql(store, table, column, start, end, chunk_rows):
+    """
+    Version SQL : lignes de la fenêtre lues par blocs avec un curseur, dans l'ordre d'insertion
+    """
+    conditions, params = [], []
+    if column is not None and start is not None:
+        conditions.append(f'{quote(column)} >= ?')
+        params.append(to_sql_value(start, 'datetime64[ns]'))
+    if column is not None and end is not None:
+        conditions.append(f'{quote(column)} <= ?')
+        params.append(to_sql_value(end, 'datetime64[ns]'))
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+    columns = ', '.join(map(quote, store.schema(table)))
+    sql = f'SELECT {columns} FROM {quote(table)}{where} ORDER BY rowid'
+    return store.iter_frames(table, sql, params, chunk_rows)
+
+
+def export_chunks(dataset, args=None, start=None, end=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Retourne les blocs (DataFrames) d'un jeu de données entre deux dates facultatives.
+    Les paramètres sont vérifiés dès l'appel; les tables sont lues au fil de l'itération.
+    """
+    if dataset in TABLE_DATASETS:
+        table, column = TABLE_DATASETS[dataset]
+        store = get_sql_store()
+        if store is not None:
+            return _iter_table_sql(store, table, column, start, end, chunk_rows)
+        # Référence de la table à l'instant de la requête : les écritures suivantes ne la modifient pas
+        return _iter_frame(get_store().table(table), column, start, end, chunk_rows)
+    if dataset in COMPUTED_DATASETS:
+        records = COMPUTED_DATASETS[dataset](args or {}, start, end)
+        return _iter_frame(pd.DataFrame.from_records(records), None, None, None, chunk_rows)
+    raise ValueError(f"Jeu de données inconnu: {dataset}")
+
+
+def _format_dates(chunk):
+    """
+    Convertit les colonnes d'horodatages en texte ISO 8601 de manière vectorisée
+    (bien plus rapide qu'un strftime par valeur); les valeurs manquantes deviennent None
+    """
+    columns = [column for column, dtype in chunk.dtypes.items() if pd.api.types.is_datetime64_any_dtype(dtype)]
+    if not columns:
+        return chunk
+    chunk = chunk.copy()
+    for column in columns:
+        series = chunk[column]
+        values = np.datetime_as_string(series.to_numpy(), unit=EXPORT_DATE_UNIT).astype(object)
+        values[series.isna().to_numpy()] = None
+        chunk[column] = values
+    return chunk
+
+
+def iter_csv(chunks):
+    """
+    Sérialise les blocs en CSV, l'en-tête étant écrit avec le premier bloc
+    """
+    header = True
+    for chunk in chunks:
+        yield _format_dates(chunk).to_csv(index=False, header=header, lineterminator='\n')
+        header = False
+
+
+def iter_ndjson(chunks, dumps):
+    """
+    Sérialise les blocs en NDJSON (un objet JSON par ligne)
+    """
+    for chunk in chunks:
+        yield ''.join(dumps(record) + '\n' for record in frame_to_records(_format_dates(chunk)))
+
+
+class _ParquetSink(io.RawIOBase):
+    """
+    Fichier en écriture seule dont les octets sont récupérés au fur et à mesure; la position
+    reste celle du fichier complet, utilisée par l'écrivain Parquet pour ses métadonnées
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def _arrow_schema(pa, frame):
+    """
+    Schéma Arrow déduit des types des colonnes (et non des valeurs), identique pour tous les blocs
+    """
+    fields = []
+    for column, dtype in frame.dtypes.items():
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            arrow_type = pa.timestamp('ns')
+        elif pd.api.types.is_bool_dtype(dtype):
+            arrow_type = pa.bool_()
+        elif pd.api.types.is_integer_dtype(dtype):
+            arrow_type = pa.int64()
+        elif pd.api.types.is_float_dtype(dtype):
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(str(column), arrow_type))
+    return pa.schema(fields)
+
+
+def iter_parquet(chunks):
+    """
+    Écrit chaque bloc comme un groupe de lignes Parquet et envoie les octets produits au fil de
+    l'écriture; le pied de fichier (métadonnées) termine le flux
+    """
+    pa, pq = _pyarrow()
+    sink = _ParquetSink()
+    writer = None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                schema = _arrow_schema(pa, chunk)
+                writer = pq.ParquetWriter(sink, schema)
+            categories = [column for column, dtype in chunk.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+            if categories:
+                chunk = chunk.astype({column: object for column in categories})
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            yield sink.drain()
+    finally:
+        if writer is not None:
+            writer.close()
+    yield sink.drain()
+
+
+def iter_export(chunks, export_format, dumps):
+    """
+    Retourne le contenu d'un export, produit bloc par bloc dans le format demandé
+    """
+    if export_format == 'csv':
+        return iter_csv(chunks)
+    if export_format == 'ndjson':
+        return iter_ndjson(chunks, dumps)
+    if export_format == 'parquet':
+        return iter_parquet(chunks)
+    raise ValueError(f"Format d'export non supporté: {export_format}")
@@ -0,0 +1,432 @@
+# Service d'ingestion des événements du parc (changements de statut, lectures de tags)
+import csv
+import json
+import zlib
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from api.models.repository import (
+    get_counters, get_presence_index, get_stock_rollup, get_store, get_usage_accumulator, get_visit_index
+)
+from api.services.cache_service import invalidate_tables
+from api.services.persistence_service import write_ahead
+
+# Colonnes d'une lecture de tag, dans l'ordre de la table tag_reads
+TAG_READ_COLUMNS = ['tagId', 'equipmentId', 'ts', 'event', 'location', 'client', 'battery', 'lat', 'lon']
+TAG_READ_EVENTS = {'read', 'enter', 'exit'}
+
+# Colonnes d'un mouvement de stock, dans l'ordre de la table stock_movements
+STOCK_MOVEMENT_COLUMNS = ['ts', 'direction', 'quantity', 'storageTime']
+STOCK_DIRECTIONS = {'in', 'out'}
+
+# Colonnes d'une position GPS, dans l'ordre de la table positions
+POSITION_COLUMNS = ['equipmentId', 'ts', 'lat', 'lon']
+
+# Nombre d'événements accumulés avant une écriture groupée dans le stockage
+INGEST_BATCH_SIZE = 5000
+
+# Taille des blocs lus sur le flux HTTP
+STREAM_CHUNK_SIZE = 64 * 1024
+
+def _timestamp(value):
+    """
+    Convertit un horodatage facultatif (epoch ou texte ISO) en datetime UTC naïf, maintenant par défaut
+    """
+    if value is None or value == '':
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc).replace(tzinfo=None)
+    # Un texte avec fuseau (Z, +02:00) est ramené en UTC; sans fuseau, il est considéré comme UTC
+    return pd.to_datetime(value, utc=True).tz_convert(None).to_pydatetime()
+
+def _parse_timestamps(values):
+    """
+    Convertit les horodatages d'un lot en datetime UTC naïfs, qu'ils portent un fuseau ou non;
+    les valeurs illisibles deviennent NaT et sont rejetées avant toute mise à jour des agrégats
+    """
+    return pd.to_datetime(values, errors='coerce', format='mixed', utc=True).dt.tz_convert(None)
+
+def _apply_status_change(equipment_id, status, location, on_site, ts):
+    """
+    Applique un changement de statut, de zone ou de présence d'un équipement (ts déjà résolu)
+    """
+    update = {'id': equipment_id}
+    tables = []
+    if status is not None:
+        update['status'] = status
+        get_store().append('status_changes', [{'id': equipment_id, 'ts': ts, 'status': status}])
+        tables.append('status_changes')
+    if location is not None:
+        update['location'] = location
+    if on_site is not None:
+        update['onSite'] = on_site
+
+    if get_counters().apply_status_change(equipment_id, status=status, location=location, on_site=on_site):
+        get_store().upsert('equipments', 'id', [update])
+        tables.append('equipments')
+    if tables:
+        invalidate_tables(tables)
+
+def record_status_change(equipment_id, status=None, location=None, on_site=None, ts=None):
+    """
+    Enregistre un changement de statut, de zone ou de présence d'un équipement
+    """
+    record_status_changes([{'id': equipment_id, 'status': status, 'location': location, 'onSite': on_site, 'ts': ts}])
+
+def _apply_tag_read(tag_id, equipment_id=None, battery=None, needs_maintenance=None):
+    """
+    Applique une lecture de tag (affectation à un équipement, niveau de batterie)
+    """
+    counters = get_counters()
+    if equipment_id is not None and not counters.has_equipment(equipment_id):
+        raise ValueError(f"Équipement inconnu: {equipment_id}")
+    update = {'tagId': tag_id}
+    if equipment_id is not None:
+        update['equipmentId'] = equipment_id
+    if battery is not None:
+        update['battery'] = battery
+
+    if not counters.apply_tag_read(tag_id, equipment_id=equipment_id, battery=battery,
+                                   needs_maintenance=needs_maintenance):
+        return
+    update['needsMaintenance'] = counters.tag_needs_maintenance(tag_id)
+    get_store().upsert('tags', 'tagId', [update])
+    invalidate_tables(['tags'])
+
+def record_tag_read(tag_id, equipment_id=None, battery=None, needs_maintenance=None):
+    """
+    Enregistre une lecture de tag (affectation à un équipement, niveau de batterie)
+    """
+    read = [tag_id, equipment_id, battery, needs_maintenance]
+    with write_ahead('tag_read', [read]):
+        _apply_tag_read(*read)
+
+def _normalize_status_change(change):
+    """
+    Valide un changement de statut; l'horodatage est résolu ici pour que le journal soit rejoué à l'identique.
+    Un équipement inconnu est refusé : aucune ligne d'équipement sans nom n'est créée.
+    """
+    equipment_id = int(change['id'])
+    if not get_counters().has_equipment(equipment_id):
+        raise ValueError(f"Équipement inconnu: {equipment_id}")
+    return [
+        equipment_id, change.get('status'), change.get('location'), change.get('onSite'),
+        _timestamp(change.get('ts')),
+    ]
+
+def _apply_status_changes(changes):
+    for change in changes:
+        _apply_status_change(*change)
+
+def record_status_changes(changes):
+    """
+    Enregistre une liste de changements de statut, tous validés avant d'être appliqués
+    """
+    changes = [_normalize_status_change(change) for change in changes]
+    with write_ahead('status_changes', changes):
+        _apply_status_changes(changes)
+    return len(changes)
+
+def _optional_text(value):
+    """
+    Normalise une valeur texte facultative (chaîne vide -> None)
+    """
+    if value is None or value == '':
+        return None
+    return str(value)
+
+def _optional_int(value):
+    """
+    Normalise un entier facultatif
+    """
+    if value is None or value == '':
+        return None
+    return int(value)
+
+def _optional_float(value):
+    """
+    Normalise un nombre décimal facultatif
+    """
+    if value is None or value == '':
+        return None
+    return float(value)
+
+def _normalize_tag_read(row):
+    """
+    Valide une lecture de tag et la convertit au format de la table tag_reads
+    """
+    if not isinstance(row, dict):
+        raise ValueError("Lecture de tag invalide")
+    tag_id = _optional_text(row.get('tagId'))
+    ts = row.get('ts')
+    if tag_id is None or ts is None or ts == '':
+        raise ValueError("Les champs tagId et ts sont obligatoires")
+    if isinstance(ts, (int, float)):
+        ts = datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None)
+    event = _optional_text(row.get('event')) or 'read'
+    if event not in TAG_READ_EVENTS:
+        raise ValueError(f"Événement inconnu: {event}")
+    return (
+        tag_id,
+        _optional_int(row.get('equipmentId')),
+        ts,
+        event,
+        _optional_text(row.get('location')),
+        _optional_text(row.get('client')),
+        _optional_float(row.get('battery')),
+        _optional_float(row.get('lat')),
+        _optional_float(row.get('lon')),
+    )
+
+def _write_tag_read_batch(batch):
+    """
+    Écrit un lot de lectures dans le stockage et met à jour les compteurs; seules les lignes
+    de tags et d'équipements dont une valeur change sont mises à jour.
+    Retourne le nombre de lectures acceptées et rejetées (horodatage illisible, équipement inconnu).
+    """
+    counters = get_counters()
+    frame = pd.DataFrame.from_records(batch, columns=TAG_READ_COLUMNS)
+    frame['ts'] = _parse_timestamps(frame['ts'])
+    known = frame['equipmentId'].isna() | frame['equipmentId'].isin(counters.equipment_ids())
+    frame = frame[(frame['ts'].notna() & known).to_numpy()]
+    if frame.empty:
+        return 0, len(batch)
+
+    presence = get_presence_index()
+    visits = get_visit_index()
+    visited = {}
+    tag_updates = []
+    equipment_updates = []
+    for tag_id, equipment_id, ts, event, location, client, battery in zip(
+        frame['tagId'], frame['equipmentId'], frame['ts'], frame['event'],
+        frame['location'], frame['client'], frame['battery']
+    ):
+        equipment_id = None if pd.isna(equipment_id) else int(equipment_id)
+        battery = None if pd.isna(battery) else float(battery)
+        if counters.apply_tag_read(tag_id, equipment_id=equipment_id, battery=battery):
+            tag_update = {'tagId': tag_id, 'needsMaintenance': counters.tag_needs_maintenance(tag_id)}
+            if equipment_id is not None:
+                tag_update['equipmentId'] = equipment_id
+            if battery is not None:
+                tag_update['battery'] = battery
+            tag_updates.append(tag_update)
+
+        if equipment_id is None:
+            continue
+        if client is not None and event == 'enter':
+            presence.enter(client, equipment_id, ts.timestamp())
+            # Chaque entrée d'un engin chez un client compte comme une visite
+            visits.record(client, ts.to_pydatetime())
+            visited[client] = True
+        elif client is not None and event == 'exit':
+            presence.exit(client, equipment_id, ts.timestamp())
+        on_site = None if event == 'read' else event == 'enter'
+        if (location is not None or on_site is not None) and counters.apply_status_change(
+            equipment_id, location=location, on_site=on_site
+        ):
+            equipment_update = {'id': equipment_id}
+            if location is not None:
+                equipment_update['location'] = location
+            if on_site is not None:
+                equipment_update['onSite'] = on_site
+            equipment_updates.append(equipment_update)
+
+    located = (frame['equipmentId'].notna() & frame['lat'].notna() & frame['lon'].notna()).to_numpy()
+    if located.any():
+        get_usage_accumulator().add_positions(
+            frame['equipmentId'].to_numpy()[located].astype('int64'), frame['ts'].to_numpy()[located],
+            frame['lat'].to_numpy()[located].astype('float64'), frame['lon'].to_numpy()[located].astype('float64'),
+        )
+
+    store = get_store()
+    store.append('tag_reads', frame)
+    tables = ['tag_reads']
+    if tag_updates:
+        store.upsert('tags', 'tagId', tag_updates)
+        tables.append('tags')
+    if equipment_updates:
+        store.upsert('equipments', 'id', equipment_updates)
+        tables.append('equipments')
+    if visited:
+        store.upsert('client_visits', 'client', [
+            {'client': client, 'visitCount': count, 'lastVisit': last_visit}
+            for client, count, last_visit in visits.rows(visited)
+        ])
+        tables.append('client_visits')
+    invalidate_tables(tables)
+    return len(frame), len(batch) - len(frame)
+
+def _ingest_batches(kind, rows, normalize, write_batch, batch_size):
+    """
+    Valide un flux d'événements et l'écrit par lots, sans matérialiser le flux complet.
+    Chaque lot validé est journalisé avant d'être appliqué.
+    """
+    def write_logged(batch):
+        with write_ahead(kind, batch):
+            return write_batch(batch)
+
+    accepted = rejected = batches = 0
+    batch = []
+    for row in rows:
+        try:
+            batch.append(normalize(row))
+        except (TypeError, ValueError, OverflowError):
+            rejected += 1
+            continue
+        if len(batch) >= batch_size:
+            written, invalid = write_logged(batch)
+            accepted, rejected, batches = accepted + written, rejected + invalid, batches + 1
+            batch = []
+    if batch:
+        written, invalid = write_logged(batch)
+        accepted, rejected, batches = accepted + written, rejected + invalid, batches + 1
+    return {'accepted': accepted, 'rejected': rejected, 'batches': batches}
+
+def ingest_tag_reads(rows, batch_size=INGEST_BATCH_SIZE):
+    """
+    Ingère un flux de lectures de tags par lots
+    """
+    return _ingest_batches('tag_reads', rows, _normalize_tag_read, _write_tag_read_batch, batch_size)
+
+def _normalize_stock_movement(row):
+    """
+    Valide un mouvement de stock et le convertit au format de la table stock_movements
+    """
+    if not isinstance(row, dict):
+        raise ValueError("Mouvement de stock invalide")
+    ts = row.get('ts')
+    if ts is None or ts == '':
+        raise ValueError("Le champ ts est obligatoire")
+    if isinstance(ts, (int, float)):
+        ts = datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None)
+    direction = _optional_text(row.get('direction'))
+    if direction not in STOCK_DIRECTIONS:
+        raise ValueError(f"Direction inconnue: {direction}")
+    quantity = _optional_int(row.get('quantity'))
+    if quantity is None:
+        quantity = 1
+    if quantity <= 0:
+        raise ValueError("La quantité doit être positive")
+    return (ts, direction, quantity, _optional_float(row.get('storageTime')))
+
+def _write_stock_movement_batch(batch):
+    """
+    Écrit un lot de mouvements de stock et met à jour les agrégats temporels
+    """
+    frame = pd.DataFrame.from_records(batch, columns=STOCK_MOVEMENT_COLUMNS)
+    frame['ts'] = _parse_timestamps(frame['ts'])
+    frame = frame[frame['ts'].notna().to_numpy()]
+    if frame.empty:
+        return 0, len(batch)
+
+    rollup = get_stock_rollup()
+    for ts, direction, quantity, storage_time in zip(
+        frame['ts'], frame['direction'], frame['quantity'], frame['storageTime']
+    ):
+        rollup.add_movement(
+            ts.to_pydatetime(), direction, int(quantity),
+            None if pd.isna(storage_time) else float(storage_time),
+        )
+
+    get_store().append('stock_movements', frame)
+    invalidate_tables(['stock_movements'])
+    return len(frame), len(batch) - len(frame)
+
+def ingest_stock_movements(rows, batch_size=INGEST_BATCH_SIZE):
+    """
+    Ingère un flux de mouvements de stock (entrées et sorties) par lots
+    """
+    return _ingest_batches('stock_movements', rows, _normalize_stock_movement, _write_stock_movement_batch, batch_size)
+
+def _normalize_position(row):
+    """
+    Valide une position GPS et la convertit au format de la table positions
+    """
+    if not isinstance(row, dict):
+        raise ValueError("Position invalide")
+    equipment_id = _optional_int(row.get('equipmentId'))
+    ts = row.get('ts')
+    lat = _optional_float(row.get('lat'))
+    lon = _optional_float(row.get('lon'))
+    if equipment_id is None or ts is None or ts == '' or lat is None or lon is None:
+        raise ValueError("Les champs equipmentId, ts, lat et lon sont obligatoires")
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError("Coordonnées hors limites")
+    if isinstance(ts, (int, float)):
+        ts = datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None)
+    return (equipment_id, ts, lat, lon)
+
+def _write_position_batch(batch):
+    """
+    Écrit un lot de positions et ajoute les distances parcourues en une passe vectorisée.
+    Les positions d'un équipement inconnu sont rejetées.
+    """
+    frame = pd.DataFrame.from_records(batch, columns=POSITION_COLUMNS)
+    frame['ts'] = _parse_timestamps(frame['ts'])
+    known = frame['equipmentId'].isin(get_counters().equipment_ids())
+    frame = frame[(frame['ts'].notna() & known).to_numpy()]
+    if frame.empty:
+        return 0, len(batch)
+
+    get_usage_accumulator().add_positions(
+        frame['equipmentId'].to_numpy(), frame['ts'].to_numpy(), frame['lat'].to_numpy(), frame['lon'].to_numpy()
+    )
+    get_store().append('positions', frame)
+    invalidate_tables(['positions'])
+    return len(frame), len(batch) - len(frame)
+
+def ingest_positions(rows, batch_size=INGEST_BATCH_SIZE):
+    """
+    Ingère un flux de positions GPS des engins par lots
+    """
+    return _ingest_batches('positions', rows, _normalize_position, _write_position_batch, batch_size)
+
+# Application des lots du journal lors de la reprise : type d'enregistrement -> fonction d'écriture
+WAL_REPLAYERS = {
+    'status_changes': _apply_status_changes,
+    'tag_read': lambda reads: [_apply_tag_read(*read) for read in reads],
+    'tag_reads': _write_tag_read_batch,
+    'stock_movements': _write_stock_movement_batch,
+    'positions': _write_position_batch,
+}
+
+def iter_stream_lines(stream, gzip=False, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Découpe un flux binaire en lignes texte, bloc par bloc (décompression gzip facultative)
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzip else None
+    remainder = b''
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        if decompressor is not None:
+            chunk = decompressor.decompress(chunk)
+        lines = (remainder + chunk).split(b'\n')
+        remainder = lines.pop()
+        for line in lines:
+            yield line.decode('utf-8').rstrip('\r')
+    if decompressor is not None:
+        remainder += decompressor.flush()
+    for line in remainder.split(b'\n'):
+        if line:
+            yield line.decode('utf-8').rstrip('\r')
+
+def parse_ndjson(lines):
+    """
+    Analyse des lignes JSON (une lecture par ligne); les lignes invalides donnent None
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+def parse_csv(lines):
+    """
+    Analyse des lignes CSV dont la première ligne contient les noms de colonnes
+    """
+    return csv.DictReader(line for line in lines if line.strip())
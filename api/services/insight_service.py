@@ -0,0 +1,245 @@
+# Requêtes sur les données du parc utilisées par les graphiques de l'analyse IA
+import threading
+from datetime import timedelta
+from functools import wraps
+
+import pandas as pd
+
+from api.models.counters import TAG_BATTERY_THRESHOLD
+from api.models.repository import get_counters, get_frame, get_store, get_usage_accumulator
+from api.models.usage import WINDOWS
+
+WEEKDAY_SHORT_NAMES = ['Lun', 'Mar', 'Mer', 'Jeu', 'Ven', 'Sam', 'Dim']
+WEEKDAY_NAMES = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
+MONTH_SHORT_NAMES = ['Jan', 'Fév', 'Mar', 'Avr', 'Mai', 'Juin', 'Juil', 'Août', 'Sep', 'Oct', 'Nov', 'Déc']
+
+# Profondeur des historiques affichés
+INSIGHT_DAYS = 7
+INSIGHT_WEEKS = 4
+INSIGHT_MONTHS = 5
+
+# Statuts des équipements -> activité affichée dans la répartition du temps
+STATUS_ACTIVITIES = {
+    'Actif': 'Opérationnel',
+    'Inactif': 'En attente',
+    'Maintenance': 'Maintenance',
+}
+
+_memo = {}
+_memo_lock = threading.Lock()
+# Types des équipements : (version de la table, types, ordre des types, version des types)
+_types = None
+
+def _equipment_types():
+    """
+    Type de chaque équipement (indexé par identifiant), liste des types dans l'ordre du parc et
+    version de ce classement, qui ne change pas avec les statuts, lieux ou dates d'utilisation
+    """
+    global _types
+    table_version = get_store().table_version('equipments')
+    with _memo_lock:
+        cached = _types
+    if cached is not None and cached[0] == table_version:
+        return cached[1:]
+    frame = get_frame('equipments')
+    types = pd.Series(frame['type'].astype(object).to_numpy(), index=frame['id'].to_numpy())
+    order = [value for value in frame['type'].cat.categories if value in set(types)]
+    if cached is not None and order == cached[2] and types.equals(cached[1]):
+        types_version = cached[3]
+    else:
+        types_version = table_version
+    with _memo_lock:
+        _types = (table_version, types, order, types_version)
+    return types, order, types_version
+
+def _status_key():
+    """
+    Indicateurs des compteurs lus par les requêtes de répartition des statuts
+    """
+    snapshot = get_counters().snapshot()
+    return snapshot['totalEngines'], tuple(snapshot['statusCounts'].items())
+
+def _memoized(tables=(), types=False, usage=False, statuses=False):
+    """
+    Décorateur : conserve le dernier résultat d'une requête tant que ce qu'elle lit n'a pas changé :
+    les tables indiquées et, selon les options, les types des équipements (types), les distances
+    parcourues (usage) ou les nombres d'équipements par statut des compteurs (statuses)
+    """
+    def decorator(query):
+        @wraps(query)
+        def wrapper():
+            store = get_store()
+            version = tuple(store.table_version(name) for name in tables)
+            if types:
+                version += (_equipment_types()[2],)
+            if usage:
+                version += (get_usage_accumulator().version,)
+            if statuses:
+                version += _status_key()
+            with _memo_lock:
+                cached = _memo.get(query.__name__)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            result = query()
+            with _memo_lock:
+                _memo[query.__name__] = (version, result)
+            return result
+        return wrapper
+    return decorator
+
+def _recent_days(count):
+    """
+    Les derniers jours de données (du plus ancien au plus récent), ou une liste vide sans données
+    """
+    latest = get_usage_accumulator().latest_day
+    if latest is None:
+        return []
+    return [latest - timedelta(days=offset) for offset in range(count - 1, -1, -1)]
+
+def _daily_distances(days):
+    """
+    Distances journalières (colonnes equipment, day, distance) sur une liste de jours consécutifs
+    """
+    rows = get_usage_accumulator().daily_rows(days[0], days[-1]) if days else []
+    return pd.DataFrame.from_records(rows, columns=['equipment', 'day', 'distance'])
+
+@_memoized(types=True, usage=True)
+def utilization_by_weekday():
+    """
+    Distance parcourue (km) par type d'équipement pour chacun des derniers jours
+    """
+    days = _recent_days(INSIGHT_DAYS)
+    if not days:
+        return []
+    types, type_order, _ = _equipment_types()
+    frame = _daily_distances(days)
+    frame['type'] = frame['equipment'].map(types)
+    totals = frame.pivot_table(index='day', columns='type', values='distance', aggfunc='sum')
+    totals = totals.reindex(index=days, columns=type_order).fillna(0.0).round(1)
+    return [
+        dict({'name': WEEKDAY_SHORT_NAMES[day.weekday()]}, **row)
+        for day, row in zip(days, totals.to_dict('records'))
+    ]
+
+@_memoized(usage=True)
+def activity_last_week():
+    """
+    Distance totale parcourue chaque jour de la dernière semaine, comparée à la moyenne journalière du mois
+    """
+    days = _recent_days(WINDOWS['month'])
+    if not days:
+        return []
+    frame = _daily_distances(days)
+    per_day = frame.groupby('day')['distance'].sum().reindex(days, fill_value=0.0)
+    average = round(float(per_day.mean()), 1)
+    week = per_day.iloc[-INSIGHT_DAYS:]
+    return [
+        {'name': WEEKDAY_NAMES[day.weekday()], 'Activité': round(float(distance), 1), 'Moyenne mensuelle': average}
+        for day, distance in week.items()
+    ]
+
+@_memoized(usage=True, statuses=True)
+def activity_by_day():
+    """
+    Nombre d'engins ayant roulé, à l'arrêt et en maintenance pour chacun des derniers jours
+    """
+    days = _recent_days(INSIGHT_DAYS)
+    if not days:
+        return []
+    snapshot = get_counters().snapshot()
+    total = snapshot['totalEngines']
+    maintenance = snapshot['statusCounts'].get('Maintenance', 0)
+    frame = _daily_distances(days)
+    moving = frame[frame['distance'] > 0].groupby('day')['equipment'].nunique().reindex(days, fill_value=0)
+    return [
+        {
+            'name': WEEKDAY_NAMES[day.weekday()],
+            'Actifs': int(active),
+            'En pause': max(0, total - int(active) - maintenance),
+            'En maintenance': maintenance,
+        }
+        for day, active in moving.items()
+    ]
+
+@_memoized(('status_changes',), types=True)
+def maintenance_by_month():
+    """
+    Nombre de passages en maintenance par mois et par type d'équipement
+    """
+    changes = get_frame('status_changes')
+    changes = changes[(changes['status'] == 'Maintenance').to_numpy()]
+    if changes.empty:
+        return []
+    types, type_order, _ = _equipment_types()
+    months = changes['ts'].dt.to_period('M')
+    last = months.max()
+    periods = pd.period_range(last - (INSIGHT_MONTHS - 1), last, freq='M')
+    counts = pd.crosstab(months, changes['id'].map(types).to_numpy())
+    counts = counts.reindex(index=periods, columns=type_order, fill_value=0)
+    return [
+        dict({'name': MONTH_SHORT_NAMES[period.month - 1]}, **{name: int(count) for name, count in row.items()})
+        for period, row in zip(periods, counts.to_dict('records'))
+    ]
+
+@_memoized(('tag_reads', 'tags'))
+def tag_status_by_week():
+    """
+    Tags lus, non lus et à batterie faible par semaine (état actuel du parc de tags sans lecture)
+    """
+    tags = get_frame('tags')
+    total = len(tags)
+    reads = get_frame('tag_reads')
+    if reads.empty:
+        assigned = int(tags['equipmentId'].notna().sum())
+        return [{
+            'name': 'Actuel',
+            'Actifs': assigned,
+            'Inactifs': total - assigned,
+            'En panne': int(tags['needsMaintenance'].sum()),
+        }]
+
+    weeks = reads['ts'].dt.to_period('W')
+    last = weeks.max()
+    periods = pd.period_range(last - (INSIGHT_WEEKS - 1), last, freq='W')
+    active = reads['tagId'].groupby(weeks).nunique().reindex(periods, fill_value=0)
+    low = reads['battery'].to_numpy() < TAG_BATTERY_THRESHOLD
+    failing = reads['tagId'][low].groupby(weeks[low]).nunique().reindex(periods, fill_value=0)
+    return [
+        {
+            'name': f'Semaine {period.start_time.isocalendar()[1]}',
+            'Actifs': int(count),
+            'Inactifs': max(0, total - int(count)),
+            'En panne': int(failed),
+        }
+        for period, count, failed in zip(periods, active.to_numpy(), failing.to_numpy())
+    ]
+
+@_memoized(('tags',))
+def tag_health():
+    """
+    Répartition des tags : fonctionnels, batterie faible, signalés pour maintenance
+    """
+    tags = get_frame('tags')
+    low = (tags['battery'] < TAG_BATTERY_THRESHOLD).to_numpy()
+    flagged = tags['needsMaintenance'].to_numpy() & ~low
+    return [
+        {'name': 'Fonctionnels', 'value': int(len(tags) - low.sum() - flagged.sum())},
+        {'name': 'Faible batterie', 'value': int(low.sum())},
+        {'name': 'Défectueux', 'value': int(flagged.sum())},
+    ]
+
+@_memoized(statuses=True)
+def time_by_activity():
+    """
+    Répartition (%) des équipements par activité, à partir des compteurs de statuts
+    """
+    snapshot = get_counters().snapshot()
+    total = snapshot['totalEngines']
+    counts = {activity: 0 for activity in dict.fromkeys(STATUS_ACTIVITIES.values())}
+    for status, count in snapshot['statusCounts'].items():
+        if status in STATUS_ACTIVITIES:
+            counts[STATUS_ACTIVITIES[status]] += count
+    return [
+        {'name': activity, 'value': int(round(count * 100 / total)) if total else 0}
+        for activity, count in counts.items()
+    ]
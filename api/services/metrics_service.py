@@ -0,0 +1,178 @@
+# Service de métriques de l'API (latences, volumes, tailles de réponse) au format Prometheus
+import bisect
+import threading
+import time
+
+from flask import g, request
+
+# Bornes des histogrammes : durées en secondes, tailles en octets
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Quantiles estimés à partir des histogrammes de latence
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Description des métriques : nom -> (type Prometheus, aide)
+METRIC_HELP = {
+    'api_requests_total': ('counter', "Nombre de requêtes par route, méthode et code de statut"),
+    'api_request_duration_seconds': ('histogram', "Durée de traitement des requêtes par route"),
+    'api_request_duration_quantile_seconds': ('gauge', "Quantiles de durée estimés à partir de l'histogramme"),
+    'api_response_size_bytes': ('histogram', "Taille des réponses non diffusées en flux, par route"),
+    'api_cache_lookups_total': ('counter', "Consultations du cache des réponses par route et résultat"),
+    'ai_upstream_duration_seconds': ('histogram', "Durée des appels à l'API OpenAI par type d'appel et issue"),
+    'ai_upstream_first_token_seconds': ('histogram', "Délai avant le premier fragment des réponses diffusées"),
+    'ai_fallbacks_total': ('counter', "Réponses simulées servies à la place de l'IA, par raison"),
+    'api_stream_subscribers': ('gauge', "Abonnés connectés aux mises à jour en direct"),
+    'api_stream_events_total': ('counter', "Mises à jour envoyées aux abonnés, par sujet"),
+    'api_stream_conflated_total': ('counter', "Mises à jour remplacées par une plus récente avant leur envoi (client lent)"),
+}
+
+class Histogram:
+    """
+    Histogramme à bornes fixes (compteurs par intervalle, somme et nombre d'observations)
+    """
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """
+        Estime un quantile par interpolation linéaire dans l'intervalle qui le contient
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                if index == len(self.bounds):
+                    return lower
+                return lower + (self.bounds[index] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.bounds[-1]
+
+def _format_labels(labels):
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}' if labels else ''
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class MetricsRegistry:
+    """
+    Compteurs et histogrammes étiquetés; chaque enregistrement ne coûte qu'une recherche
+    dichotomique et quelques additions sous verrou
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def increment(self, name, labels=(), amount=1):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value, buckets=DURATION_BUCKETS):
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = Histogram(buckets)
+                self._histograms[key] = histogram
+            histogram.observe(value)
+
+    def render(self):
+        """
+        Exporte les métriques au format texte de Prometheus
+        """
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = []
+            quantiles = []
+            for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                histograms.append((name, labels, histogram.bounds, list(histogram.counts), histogram.sum, histogram.count))
+                if name == 'api_request_duration_seconds':
+                    quantiles.append((labels, [(q, histogram.quantile(q)) for q in QUANTILES]))
+
+        families = {}
+        for (name, labels), value in counters:
+            families.setdefault(name, []).append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        for name, labels, bounds, counts, total, count in histograms:
+            lines = families.setdefault(name, [])
+            cumulative = 0
+            for bound, bucket_count in zip(bounds + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else _format_value(bound)
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", le),))} {cumulative}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(total)}')
+            lines.append(f'{name}_count{_format_labels(labels)} {count}')
+        for labels, values in quantiles:
+            lines = families.setdefault('api_request_duration_quantile_seconds', [])
+            for q, value in values:
+                lines.append(
+                    f'api_request_duration_quantile_seconds{_format_labels(labels + (("quantile", str(q)),))} '
+                    f'{_format_value(value)}'
+                )
+
+        return render_families(families)
+
+def render_families(families, help_texts=METRIC_HELP):
+    """
+    Assemble des familles de métriques (nom -> lignes d'échantillons) avec leurs en-têtes HELP et TYPE
+    """
+    output = []
+    for name, lines in families.items():
+        metric_type, help_text = help_texts.get(name, ('untyped', name))
+        output.append(f'# HELP {name} {help_text}')
+        output.append(f'# TYPE {name} {metric_type}')
+        output.extend(lines)
+    return '\n'.join(output) + '\n' if output else ''
+
+def gauge_lines(name, samples):
+    """
+    Lignes d'échantillons d'une métrique à partir de couples (étiquettes, valeur)
+    """
+    return [f'{name}{_format_labels(labels)} {_format_value(value)}' for labels, value in samples]
+
+# Registre partagé par toute l'application
+metrics = MetricsRegistry()
+
+def _start_timer():
+    g.metrics_start = time.perf_counter()
+
+def _record_request(response):
+    start = g.pop('metrics_start', None)
+    if start is None:
+        return response
+    endpoint = request.endpoint or 'unknown'
+    labels = (('endpoint', endpoint),)
+    metrics.observe('api_request_duration_seconds', labels, time.perf_counter() - start)
+    metrics.increment(
+        'api_requests_total', labels + (('method', request.method), ('status', str(response.status_code)))
+    )
+    if not response.is_streamed and response.content_length is not None:
+        metrics.observe('api_response_size_bytes', labels, response.content_length, SIZE_BUCKETS)
+    cache_result = g.pop('cache_result', None)
+    if cache_result is not None:
+        metrics.increment('api_cache_lookups_total', labels + (('result', cache_result),))
+    return response
+
+def register_request_metrics(app):
+    """
+    Mesure la durée, le code de statut et la taille de réponse de chaque requête.
+    Pour une réponse diffusée en flux, la durée s'arrête à l'envoi des en-têtes.
+    """
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
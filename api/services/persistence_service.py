@@ -0,0 +1,182 @@
+# Service de persistance : journalisation des écritures, reprise au démarrage et instantanés périodiques
+import atexit
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+from api.config.persistence_config import (
+    FLEET_DATA_DIR, WAL_FSYNC, SNAPSHOT_WAL_BYTES, SNAPSHOT_INTERVAL, SNAPSHOT_KEEP
+)
+from api.config.storage_config import STORAGE_BACKEND
+from api.models.counters import FleetCounters
+from api.models.persistence import (
+    WriteAheadLog, dump_state, load_snapshot, load_state, prune_snapshots, read_snapshot, write_snapshot
+)
+from api.models.presence import PresenceIndex
+from api.models.repository import (
+    get_counters, get_presence_index, get_stock_rollup, get_store, get_usage_accumulator, reset_data
+)
+from api.models.rollups import StockRollup
+from api.models.store import ColumnarStore
+from api.models.usage import UsageAccumulator
+
+# Agrégats dérivés inclus dans les instantanés : nom -> (classe, accesseur)
+AGGREGATES = {
+    'counters': (FleetCounters, get_counters),
+    'stock_rollup': (StockRollup, get_stock_rollup),
+    'presence_index': (PresenceIndex, get_presence_index),
+    'usage_accumulator': (UsageAccumulator, get_usage_accumulator),
+}
+
+# Sérialise les écritures journalisées avec la capture des instantanés
+_write_lock = threading.RLock()
+_wal = None
+_recovered = False
+_snapshot_running = False
+_state = {'snapshotLsn': 0, 'snapshotAt': time.monotonic(), 'replayed': 0}
+
+
+def enabled():
+    # Le stockage SQLite est déjà durable : journal et instantanés ne concernent que le stockage en mémoire
+    return FLEET_DATA_DIR is not None and STORAGE_BACKEND == 'memory'
+
+
+def recover():
+    """
+    Restaure l'état au premier appel : dernier instantané projeté en mémoire, puis rejeu
+    des seuls enregistrements du journal qui lui sont postérieurs
+    """
+    global _recovered
+    if _recovered or not enabled():
+        return
+    with _write_lock:
+        if _recovered:
+            return
+        from api.services.ingest_service import WAL_REPLAYERS
+
+        start = time.perf_counter()
+        snapshot = read_snapshot(FLEET_DATA_DIR)
+        lsn = 0
+        if snapshot is not None:
+            lsn, tables, aggregates = snapshot
+            store = ColumnarStore()
+            store.restore(tables)
+            reset_data(store, **{
+                name: load_state(cls, aggregates[name]) for name, (cls, _) in AGGREGATES.items() if name in aggregates
+            })
+
+        replayed = 0
+        for record_lsn, kind, rows in WriteAheadLog(FLEET_DATA_DIR).records(lsn):
+            try:
+                WAL_REPLAYERS[kind](rows)
+            except Exception as e:
+                # Lot déjà en échec lors de son écriture initiale : il n'avait pas été appliqué
+                print(f"Lot {record_lsn} du journal ignoré: {str(e)}")
+            lsn = record_lsn
+            replayed += 1
+        _state.update(snapshotLsn=snapshot[0] if snapshot else 0, replayed=replayed, lsn=lsn)
+        _recovered = True
+        print(f"Reprise des données: instantané {_state['snapshotLsn']}, {replayed} lots rejoués "
+              f"en {time.perf_counter() - start:.2f} s")
+
+
+def _open_wal():
+    """
+    Ouvre le journal en écriture au premier lot (après le fork des workers : un seul processus l'obtient)
+    """
+    global _wal
+    if _wal is None:
+        wal = WriteAheadLog(FLEET_DATA_DIR, fsync=WAL_FSYNC)
+        wal.open(min_lsn=_state.get('lsn', 0))
+        _wal = wal
+        atexit.register(_close)
+    return _wal
+
+
+@contextmanager
+def write_ahead(kind, rows):
+    """
+    Journalise un lot d'écritures déjà validées avant de l'appliquer, sous le verrou d'écriture.
+    Sans répertoire de données, le lot est simplement appliqué.
+    """
+    if not enabled():
+        yield
+        return
+    recover()
+    with _write_lock:
+        _open_wal().append(kind, rows)
+        yield
+    _schedule_snapshot()
+
+
+def _schedule_snapshot():
+    """
+    Lance un instantané en arrière-plan lorsque le journal est devenu volumineux ou ancien
+    """
+    global _snapshot_running
+    wal = _wal
+    due = wal.bytes_written >= SNAPSHOT_WAL_BYTES or (
+        wal.bytes_written and time.monotonic() - _state['snapshotAt'] >= SNAPSHOT_INTERVAL
+    )
+    if not due:
+        return
+    with _write_lock:
+        if _snapshot_running:
+            return
+        _snapshot_running = True
+    threading.Thread(target=_snapshot_in_background, name='fleet-snapshot', daemon=True).start()
+
+
+def _snapshot_in_background():
+    global _snapshot_running
+    try:
+        take_snapshot()
+    except Exception as e:
+        print(f"Erreur lors de l'écriture de l'instantané: {str(e)}")
+    finally:
+        _snapshot_running = False
+
+
+def take_snapshot():
+    """
+    Écrit un instantané de l'état courant et supprime le journal qu'il couvre.
+    Seule la capture (références des tables, sérialisation des agrégats) bloque les écritures.
+    """
+    if not enabled():
+        return None
+    recover()
+    start = time.perf_counter()
+    with _write_lock:
+        wal = _open_wal()
+        store = get_store()
+        tables = {name: store.table(name) for name in store.tables()}
+        aggregates = {name: dump_state(accessor()) for name, (_, accessor) in AGGREGATES.items()}
+        lsn = wal.lsn
+        wal.rotate()
+        _state['snapshotAt'] = time.monotonic()
+    path = write_snapshot(FLEET_DATA_DIR, lsn, tables, aggregates)
+    # Le journal couvert n'est supprimé qu'une fois l'instantané relu avec succès
+    try:
+        load_snapshot(path)
+    except (OSError, ValueError, KeyError):
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+    prune_snapshots(FLEET_DATA_DIR, keep=SNAPSHOT_KEEP)
+    wal.discard(lsn)
+    _state['snapshotLsn'] = lsn
+    print(f"Instantané {lsn} écrit en {time.perf_counter() - start:.2f} s: {path}")
+    return lsn
+
+
+def _close():
+    """
+    À l'arrêt du processus : instantané des écritures non couvertes, puis fermeture du journal
+    """
+    if _wal is None:
+        return
+    try:
+        if _wal.lsn > _state['snapshotLsn']:
+            take_snapshot()
+    finally:
+        _wal.close()
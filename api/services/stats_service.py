@@ -1,108 +1,512 @@
 
 # Service pour la gestion des statistiques
-from api.models.data import (
-    monthly_data, analytical_data, ai_predictions, equipment_presence_data,
-    client_ranking_data, equipment_usage_data, stock_analysis_data, client_visit_data
+import heapq
+from datetime import datetime, timedelta, timezone
+from functools import cached_property
+
+from api.models.repository import (
+    get_counters, get_frame, get_presence_index, get_records, get_sql_store, get_stock_rollup,
+    get_usage_accumulator, get_visit_index
 )
+from api.models.rollups import INCOMING, OUTGOING, STORAGE_SUM, STORAGE_COUNT, MONTH_NAMES
+from api.models.sqlite_store import to_sql_value
+
+# Périodes historiques de l'analyse des stocks -> granularité des agrégats
+STOCK_PERIODS = {
+    'daily': 'day',
+    'weekly': 'week',
+    'monthly': 'month',
+}
+
+SECONDS_PER_DAY = 86400
+
+# Période de référence (jours) pour les indicateurs de présence
+PRESENCE_REFERENCE_DAYS = 30
+
+# Distance mensuelle de référence (km) d'un engin pour les indicateurs d'utilisation
+USAGE_REFERENCE_KM = 300
+
+# Quantité de référence (entrées ou sorties cumulées) et durée de stockage de référence (jours)
+# pour les indicateurs de stock
+STOCK_REFERENCE_QUANTITY = 1500
+STOCK_REFERENCE_DAYS = 5
+
+# Total de visites de référence et nombre de visites de référence par client pour les indicateurs de visite
+VISITS_REFERENCE_TOTAL = 100
+VISITS_REFERENCE_COUNT = 25
+
+# Métriques de classement des clients : nom public -> champ de l'agrégat
+RANKING_METRICS = {
+    'duration': 'totalDuration',
+    'visits': 'visits',
+    'distance': 'distance',
+    'equipment': 'equipmentCount',
+}
+
+def _ratio_stat(count, total):
+    """
+    Formate un indicateur de type "x/y" avec sa progression en pourcentage
+    """
+    progress = int(count * 100 / total) if total else 0
+    return {'value': f'{count}/{total}', 'progress': progress}
+
+class DashboardData:
+    """
+    Agrégats intermédiaires partagés par plusieurs indicateurs (noms des engins, présences,
+    distances, compteurs), calculés au premier accès puis réutilisés pour la même requête
+    """
+
+    @cached_property
+    def snapshot(self):
+        return get_counters().snapshot()
+
+    @cached_property
+    def names(self):
+        return _equipment_names()
+
+    @cached_property
+    def presence_rows(self):
+        return get_presence_index().totals()
+
+    @cached_property
+    def usage_totals(self):
+        return get_usage_accumulator().totals()
+
+    @cached_property
+    def client_aggregates(self):
+        return _client_aggregates(data=self)
+
+    @cached_property
+    def usage_rows(self):
+        return get_equipment_usage(self)
 
 def get_monthly_data():
     """
     Récupère les données mensuelles
     """
-    return monthly_data
+    return get_records('monthly_data')
 
 def get_analytical_data():
     """
     Récupère les données analytiques
     """
-    return analytical_data
+    return get_records('analytical_data')
 
 def get_ai_predictions():
     """
     Récupère les prédictions IA
     """
-    return ai_predictions
+    return get_records('ai_predictions')
 
-def get_global_stats():
+def get_global_stats(data=None):
     """
     Récupère des statistiques globales
     """
+    snapshot = (data or DashboardData()).snapshot
+    engines = snapshot['totalEngines']
+    tags = snapshot['totalTags']
+    return {
+        'taggedEngines': _ratio_stat(snapshot['taggedEngines'], engines),
+        'usedTags': _ratio_stat(snapshot['usedTags'], tags),
+        'enginesOnSite': _ratio_stat(snapshot['enginesOnSite'], engines),
+        'tagsToMaintain': _ratio_stat(snapshot['tagsToMaintain'], tags)
+    }
+
+def _epoch(value):
+    """
+    Convertit une date (naïve = UTC) en secondes depuis l'epoch
+    """
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def _format_number(value):
+    """
+    Formate un nombre avec au plus une décimale ("12.4", "22")
+    """
+    return f'{value:.1f}'.rstrip('0').rstrip('.')
+
+def _equipment_names():
+    """
+    Associe les identifiants d'équipements à leur nom (l'identifiant en texte si le nom manque)
+    """
+    store = get_sql_store()
+    if store is not None:
+        return dict(store.query('SELECT id, COALESCE(name, CAST(id AS TEXT)) FROM equipments ORDER BY rowid'))
+    frame = get_frame('equipments')
+    return {
+        equipment: name if isinstance(name, str) else str(equipment)
+        for equipment, name in zip(frame['id'].tolist(), frame['name'].tolist())
+    }
+
+def _window_visit_counts(start, end):
+    """
+    Nombre de visites (client, nombre) dans une fenêtre, comptées à partir des entrées
+    d'engins chez les clients enregistrées dans tag_reads
+    """
+    store = get_sql_store()
+    if store is not None:
+        conditions = ["event = 'enter'", 'client IS NOT NULL', 'equipmentId IS NOT NULL']
+        params = []
+        if start is not None:
+            conditions.append('ts >= ?')
+            params.append(to_sql_value(start, 'datetime64[ns]'))
+        if end is not None:
+            conditions.append('ts <= ?')
+            params.append(to_sql_value(end, 'datetime64[ns]'))
+        return store.query(
+            f"SELECT client, COUNT(*) FROM tag_reads WHERE {' AND '.join(conditions)} "
+            'GROUP BY client ORDER BY MIN(rowid)', params
+        )
+    reads = get_frame('tag_reads')
+    mask = (reads['event'] == 'enter') & reads['client'].notna() & reads['equipmentId'].notna()
+    if start is not None:
+        mask &= reads['ts'] >= start
+    if end is not None:
+        mask &= reads['ts'] <= end
+    clients = reads.loc[mask.to_numpy(), 'client'].astype(str)
+    return list(clients.groupby(clients, sort=False).size().items())
+
+def _client_visit_counts(start=None, end=None):
+    """
+    Nombre de visites (client, nombre) dans l'ordre d'apparition des clients, sur une
+    fenêtre facultative
+    """
+    if start is not None or end is not None:
+        return _window_visit_counts(start, end)
+    store = get_sql_store()
+    if store is not None:
+        return store.query(
+            'SELECT client, SUM(visitCount) FROM client_visits WHERE client IS NOT NULL '
+            'GROUP BY client ORDER BY MIN(rowid)'
+        )
+    visits = get_frame('client_visits').dropna(subset=['client'])
+    return list(zip(visits['client'].tolist(), visits['visitCount'].tolist()))
+
+def _presence_rows(data, client=None, start=None, end=None):
+    """
+    Durées de présence par client et engin, partagées entre indicateurs lorsque la requête n'est pas filtrée
+    """
+    if client is None and start is None and end is None:
+        return data.presence_rows
+    return get_presence_index().totals(client, _epoch(start), _epoch(end))
+
+def get_equipment_presence(client=None, start=None, end=None, data=None):
+    """
+    Récupère les durées de présence des engins chez les clients, éventuellement
+    pour un client et une fenêtre de dates
+    """
+    data = data or DashboardData()
+    names = data.names
+    rows = _presence_rows(data, client, start, end)
+    return [
+        {
+            "client": name,
+            "equipment": names.get(equipment, str(equipment)),
+            "duration": round(seconds / SECONDS_PER_DAY, 1),
+            "unit": "jours"
+        }
+        for name, equipment, seconds in rows
+    ]
+
+def _presence_dashboard_stats(data=None):
+    """
+    Calcule les indicateurs du tableau de bord de présence à partir de l'index des présences
+    """
+    data = data or DashboardData()
+    index = get_presence_index()
+    rows = data.presence_rows
+    durations = [seconds / SECONDS_PER_DAY for _, _, seconds in rows]
+    total = sum(durations)
+    average = total / len(durations) if durations else 0
+    longest = max(durations, default=0)
+
+    clients = set(index.clients()) | {client for client, _ in _client_visit_counts()}
+    active = len({client for client, _, _ in rows})
+    engines = len({equipment for _, equipment, _ in rows})
+    capacity = engines * PRESENCE_REFERENCE_DAYS
+
     return {
-        'taggedEngines': {'value': '10/10', 'progress': 100},
-        'usedTags': {'value': '10/16', 'progress': 62},
-        'enginesOnSite': {'value': '10/10', 'progress': 100},
-        'tagsToMaintain': {'value': '0/16', 'progress': 0}
+        'stat1': {'title': 'Durée moyenne', 'value': f'{_format_number(average)} jours',
+                  'progress': min(100, int(average * 100 / PRESENCE_REFERENCE_DAYS))},
+        'stat2': {'title': 'Plus longue présence', 'value': f'{_format_number(longest)} jours',
+                  'progress': min(100, int(longest * 100 / PRESENCE_REFERENCE_DAYS))},
+        'stat3': {'title': 'Clients actifs', 'value': f'{active}/{len(clients)}',
+                  'progress': int(active * 100 / len(clients)) if clients else 0},
+        'stat4': {'title': 'Total jours', 'value': _format_number(total),
+                  'progress': min(100, int(total * 100 / capacity)) if capacity else 0}
     }
 
-def get_equipment_presence():
+def _equipment_distances(data, start=None, end=None):
+    """
+    Distance parcourue (km) par équipement sur le mois, ou entre deux dates, indexée par identifiant
+    """
+    if start is not None or end is not None:
+        return get_usage_accumulator().distances(
+            start.date() if start is not None else None, end.date() if end is not None else None
+        )
+    return {equipment: totals['month'] for equipment, totals in data.usage_totals.items()}
+
+def _client_aggregates(start=None, end=None, data=None):
+    """
+    Agrège par client la durée de présence, le nombre d'engins, les visites et la distance.
+    La distance d'un engin est répartie entre les clients au prorata de son temps de présence.
+    Avec une fenêtre, les quatre métriques sont restreintes à cette fenêtre.
+    """
+    data = data or DashboardData()
+    rows = _presence_rows(data, start=start, end=end)
+    aggregates = {}
+    equipment_seconds = {}
+    for client, equipment, seconds in rows:
+        aggregate = aggregates.setdefault(client, {'seconds': 0.0, 'equipmentCount': 0, 'visits': 0, 'distance': 0.0})
+        aggregate['seconds'] += seconds
+        aggregate['equipmentCount'] += 1
+        equipment_seconds[equipment] = equipment_seconds.get(equipment, 0.0) + seconds
+
+    distances = _equipment_distances(data, start, end)
+    for client, equipment, seconds in rows:
+        if equipment_seconds[equipment] > 0:
+            share = seconds / equipment_seconds[equipment]
+            aggregates[client]['distance'] += distances.get(equipment, 0.0) * share
+
+    for client, count in _client_visit_counts(start, end):
+        aggregate = aggregates.setdefault(client, {'seconds': 0.0, 'equipmentCount': 0, 'visits': 0, 'distance': 0.0})
+        aggregate['visits'] += int(count)
+
+    return [
+        {
+            'client': client,
+            'totalDuration': round(aggregate['seconds'] / SECONDS_PER_DAY, 1),
+            'unit': 'jours',
+            'equipmentCount': aggregate['equipmentCount'],
+            'visits': aggregate['visits'],
+            'distance': round(aggregate['distance'], 1)
+        }
+        for client, aggregate in aggregates.items()
+    ]
+
+def get_client_ranking(metric='duration', limit=None, start=None, end=None, data=None):
     """
-    Récupère les données de durée de présence des engins chez les clients
+    Classe les clients selon une métrique (duration, visits, distance, equipment) sur une
+    fenêtre facultative. Avec limit, seuls les K premiers sont extraits via un tas borné.
     """
-    return equipment_presence_data
+    if metric not in RANKING_METRICS:
+        raise ValueError(f"Métrique inconnue: {metric}")
+    field = RANKING_METRICS[metric]
+    data = data or DashboardData()
+    if start is None and end is None:
+        aggregates = data.client_aggregates
+    else:
+        aggregates = _client_aggregates(start, end, data)
+
+    key = lambda row: row[field]
+    if limit is not None and limit < len(aggregates):
+        ranking = heapq.nlargest(limit, aggregates, key=key)
+    else:
+        ranking = sorted(aggregates, key=key, reverse=True)
 
-def get_client_ranking():
+    return [dict(row, rank=rank) for rank, row in enumerate(ranking, start=1)]
+
+def _client_ranking_dashboard_stats(data=None):
     """
-    Récupère les données de classement des clients
+    Calcule les indicateurs du tableau de bord de classement des clients
     """
-    return client_ranking_data
+    data = data or DashboardData()
+    top = get_client_ranking('duration', limit=1, data=data)
+    rows = data.presence_rows
+    total_days = sum(seconds for _, _, seconds in rows) / SECONDS_PER_DAY
+    used = len({equipment for _, equipment, _ in rows})
+    engines = data.snapshot['totalEngines']
+    capacity = used * PRESENCE_REFERENCE_DAYS
+    occupation = min(100, int(total_days * 100 / capacity)) if capacity else 0
+
+    leader = top[0] if top else {'client': '-', 'totalDuration': 0}
+    return {
+        'stat1': {'title': 'Client principal', 'value': leader['client'], 'progress': 100 if top else 0},
+        'stat2': {'title': 'Durée totale', 'value': f"{_format_number(leader['totalDuration'])} jours",
+                  'progress': int(leader['totalDuration'] * 100 / total_days) if total_days else 0},
+        'stat3': {'title': 'Équipements utilisés', 'value': f'{used}/{engines}',
+                  'progress': int(used * 100 / engines) if engines else 0},
+        'stat4': {'title': 'Taux occupation', 'value': f'{occupation}%', 'progress': occupation}
+    }
 
-def get_equipment_usage():
+def get_equipment_usage(data=None):
     """
-    Récupère les données d'utilisation des engins
+    Récupère les distances parcourues par les engins sur le dernier jour, la semaine et le mois,
+    calculées à partir des positions GPS
     """
-    return equipment_usage_data
+    data = data or DashboardData()
+    names = data.names
+    totals = data.usage_totals
+    empty = {'day': 0.0, 'week': 0.0, 'month': 0.0}
+    equipments = list(names) + [equipment for equipment in totals if equipment not in names]
+    return [
+        {
+            "equipment": names.get(equipment, str(equipment)),
+            "day": round(totals.get(equipment, empty)['day'], 1),
+            "week": round(totals.get(equipment, empty)['week'], 1),
+            "month": round(totals.get(equipment, empty)['month'], 1),
+            "unit": "km"
+        }
+        for equipment in equipments
+    ]
 
-def get_stock_analysis(period='daily'):
+def _usage_dashboard_stats(data=None):
     """
-    Récupère les données d'analyse des stocks pour une période donnée
+    Calcule les indicateurs du tableau de bord d'utilisation à partir des distances mensuelles
     """
-    if period in stock_analysis_data:
-        return stock_analysis_data[period]
-    return stock_analysis_data['daily']
+    distances = [row['month'] for row in (data or DashboardData()).usage_rows]
+    engines = len(distances)
+    total = sum(distances)
+    longest = max(distances, default=0)
+    average = total / engines if engines else 0
+    active = sum(1 for distance in distances if distance > 0)
+    capacity = engines * USAGE_REFERENCE_KM
+
+    return {
+        'stat1': {'title': 'Distance totale', 'value': f'{_format_number(total)} km',
+                  'progress': min(100, int(total * 100 / capacity)) if capacity else 0},
+        'stat2': {'title': 'Plus grande distance', 'value': f'{_format_number(longest)} km',
+                  'progress': min(100, int(longest * 100 / USAGE_REFERENCE_KM))},
+        'stat3': {'title': 'Équipements actifs', 'value': f'{active}/{engines}',
+                  'progress': int(active * 100 / engines) if engines else 0},
+        'stat4': {'title': 'Distance moyenne', 'value': f'{_format_number(average)} km',
+                  'progress': min(100, int(average * 100 / USAGE_REFERENCE_KM))}
+    }
 
-def get_client_visits():
+def _stock_label(bucket, key):
     """
-    Récupère les données de fréquence de visite des clients
+    Construit le libellé d'un agrégat de stock selon sa granularité
     """
-    return client_visit_data
+    if bucket == 'hour':
+        return {'hour': key.strftime('%Y-%m-%d %H:00')}
+    if bucket == 'day':
+        return {'date': key.isoformat()}
+    if bucket == 'week':
+        return {'week': f'Semaine {key[1]}'}
+    return {'month': MONTH_NAMES[key[1] - 1]}
 
-def get_dashboard_stats(dashboard_type='equipment-presence'):
+def get_stock_analysis(period='daily', bucket=None, start=None, end=None):
     """
-    Récupère les statistiques d'un tableau de bord spécifique
+    Récupère les données d'analyse des stocks pour une période (daily, weekly, monthly)
+    ou une granularité (hour, day, week, month) entre deux dates facultatives
     """
-    stats = {
-        'equipment-presence': {
-            'stat1': {'title': 'Durée moyenne', 'value': '12.4 jours', 'progress': 62},
-            'stat2': {'title': 'Plus longue présence', 'value': '22 jours', 'progress': 88},
-            'stat3': {'title': 'Clients actifs', 'value': '5/8', 'progress': 63},
-            'stat4': {'title': 'Total jours', 'value': '62', 'progress': 78}
-        },
-        'client-ranking': {
-            'stat1': {'title': 'Client principal', 'value': 'Client A', 'progress': 100},
-            'stat2': {'title': 'Durée totale', 'value': '149 jours', 'progress': 85},
-            'stat3': {'title': 'Équipements utilisés', 'value': '16/20', 'progress': 80},
-            'stat4': {'title': 'Taux occupation', 'value': '78%', 'progress': 78}
-        },
-        'equipment-usage': {
-            'stat1': {'title': 'Distance totale', 'value': '697 km', 'progress': 70},
-            'stat2': {'title': 'Plus grande distance', 'value': '280 km', 'progress': 93},
-            'stat3': {'title': 'Équipements actifs', 'value': '4/5', 'progress': 80},
-            'stat4': {'title': 'Distance moyenne', 'value': '139 km', 'progress': 46}
-        },
-        'stock-analysis': {
-            'stat1': {'title': 'Produits entrants', 'value': '1095', 'progress': 73},
-            'stat2': {'title': 'Produits sortants', 'value': '1070', 'progress': 71},
-            'stat3': {'title': 'Temps stockage moyen', 'value': '3.2 jours', 'progress': 64},
-            'stat4': {'title': 'Taux rotation', 'value': '98%', 'progress': 98}
-        },
-        'client-visits': {
-            'stat1': {'title': 'Visites totales', 'value': '62', 'progress': 62},
-            'stat2': {'title': 'Client le plus visité', 'value': 'Client C', 'progress': 88},
-            'stat3': {'title': 'Clients non visités', 'value': '0/5', 'progress': 100},
-            'stat4': {'title': 'Visites moyennes', 'value': '12.4', 'progress': 52}
+    if bucket is None:
+        bucket = STOCK_PERIODS.get(period, STOCK_PERIODS['daily'])
+
+    data = []
+    for key, values in get_stock_rollup().query(bucket, start, end):
+        count = values[STORAGE_COUNT]
+        row = _stock_label(bucket, key)
+        row.update({
+            'incoming': values[INCOMING],
+            'outgoing': values[OUTGOING],
+            'avgStorageTime': round(values[STORAGE_SUM] / count, 2) if count else 0.0
+        })
+        data.append(row)
+    return data
+
+def _stock_dashboard_stats(data=None):
+    """
+    Calcule les indicateurs du tableau de bord des stocks à partir des agrégats mensuels
+    """
+    totals = [0, 0, 0.0, 0]
+    for _, values in get_stock_rollup().query('month'):
+        totals = [total + value for total, value in zip(totals, values)]
+    incoming, outgoing = totals[INCOMING], totals[OUTGOING]
+    average = totals[STORAGE_SUM] / totals[STORAGE_COUNT] if totals[STORAGE_COUNT] else 0
+    rotation = round(outgoing * 100 / incoming) if incoming else 0
+
+    return {
+        'stat1': {'title': 'Produits entrants', 'value': str(incoming),
+                  'progress': min(100, int(incoming * 100 / STOCK_REFERENCE_QUANTITY))},
+        'stat2': {'title': 'Produits sortants', 'value': str(outgoing),
+                  'progress': min(100, int(outgoing * 100 / STOCK_REFERENCE_QUANTITY))},
+        'stat3': {'title': 'Temps stockage moyen', 'value': f'{_format_number(average)} jours',
+                  'progress': min(100, int(average * 100 / STOCK_REFERENCE_DAYS))},
+        'stat4': {'title': 'Taux rotation', 'value': f'{rotation}%', 'progress': min(100, rotation)}
+    }
+
+def _client_visit_rows_sql(store, before=None):
+    """
+    Version SQL des visites : (client, nombre, dernière visite), les clients non visités
+    depuis before étant lus dans l'index sur lastVisit
+    """
+    if before is None:
+        sql = 'SELECT client, visitCount, lastVisit FROM client_visits WHERE lastVisit IS NOT NULL ORDER BY rowid'
+        params = ()
+    else:
+        sql = 'SELECT client, visitCount, lastVisit FROM client_visits WHERE lastVisit < ? ORDER BY lastVisit, client'
+        params = (to_sql_value(before, 'datetime64[ns]'),)
+    frame = store.query_frame('client_visits', sql, params, ['client', 'visitCount', 'lastVisit'])
+    return zip(frame['client'].tolist(), frame['visitCount'].tolist(), frame['lastVisit'].tolist())
+
+def get_client_visits(stale_days=None):
+    """
+    Récupère la fréquence de visite des clients, le nombre de jours depuis la dernière visite
+    étant calculé à la date du jour. Avec stale_days, seuls les clients non visités depuis
+    au moins ce nombre de jours sont retournés, du plus ancien au plus récent.
+    """
+    today = datetime.now(timezone.utc).date()
+    before = None
+    if stale_days is not None:
+        before = datetime.combine(today - timedelta(days=stale_days - 1), datetime.min.time())
+
+    store = get_sql_store()
+    if store is not None:
+        rows = _client_visit_rows_sql(store, before)
+    elif before is None:
+        rows = get_visit_index().rows()
+    else:
+        rows = get_visit_index().stale(before)
+    return [
+        {
+            'client': client,
+            'visitCount': int(count),
+            'lastVisit': last_visit.strftime('%Y-%m-%d'),
+            'daysElapsed': max(0, (today - last_visit.date()).days)
         }
+        for client, count, last_visit in rows
+    ]
+
+def _client_visits_dashboard_stats(data=None):
+    """
+    Calcule les indicateurs du tableau de bord des visites à partir de la fréquence de visite des clients
+    """
+    visits = get_client_visits()
+    total = sum(row['visitCount'] for row in visits)
+    average = total / len(visits) if visits else 0
+    top = max(visits, key=lambda row: row['visitCount'], default=None)
+
+    visited = {row['client'] for row in visits if row['visitCount']}
+    clients = set(get_presence_index().clients()) | {row['client'] for row in visits}
+    unvisited = len(clients - visited)
+
+    return {
+        'stat1': {'title': 'Visites totales', 'value': str(total),
+                  'progress': min(100, int(total * 100 / VISITS_REFERENCE_TOTAL))},
+        'stat2': {'title': 'Client le plus visité', 'value': top['client'] if top else '-',
+                  'progress': min(100, int(top['visitCount'] * 100 / VISITS_REFERENCE_COUNT)) if top else 0},
+        'stat3': {'title': 'Clients non visités', 'value': f'{unvisited}/{len(clients)}',
+                  'progress': int((len(clients) - unvisited) * 100 / len(clients)) if clients else 0},
+        'stat4': {'title': 'Visites moyennes', 'value': _format_number(average),
+                  'progress': min(100, int(average * 100 / VISITS_REFERENCE_COUNT))}
     }
-    
-    if dashboard_type in stats:
-        return stats[dashboard_type]
-    return stats['equipment-presence']
+
+# Indicateurs de chaque tableau de bord, calculés à partir des données
+DASHBOARD_STAT_BUILDERS = {
+    'equipment-presence': _presence_dashboard_stats,
+    'client-ranking': _client_ranking_dashboard_stats,
+    'equipment-usage': _usage_dashboard_stats,
+    'stock-analysis': _stock_dashboard_stats,
+    'client-visits': _client_visits_dashboard_stats,
+}
+
+def get_dashboard_stats(dashboard_type='equipment-presence', data=None):
+    """
+    Récupère les statistiques d'un tableau de bord spécifique (présence des engins par défaut)
+    """
+    builder = DASHBOARD_STAT_BUILDERS.get(dashboard_type, DASHBOARD_STAT_BUILDERS['equipment-presence'])
+    return builder(data)
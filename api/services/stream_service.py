@@ -0,0 +1,202 @@
+# Service de diffusion en direct (server-sent events) des agrégats des tableaux de bord
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+from api.config.stream_config import STREAM_MIN_INTERVAL
+from api.services.cache_service import DAILY_TABLES, current_day, on_invalidate
+from api.services.dashboard_service import DASHBOARD_STATS_TABLES, DASHBOARD_TILES, get_dashboard
+from api.services.equipment_service import get_status_distribution, get_zone_distribution
+from api.services.metrics_service import metrics
+from api.services.stats_service import (
+    DashboardData, get_global_stats, get_equipment_presence, get_client_ranking,
+    get_equipment_usage, get_stock_analysis, get_client_visits
+)
+
+# Sujets diffusables : nom -> (construction à partir des agrégats partagés, tables lues)
+TOPICS = {
+    'stats': (get_global_stats, ('equipments', 'tags')),
+    'status-distribution': (lambda data: get_status_distribution(data.snapshot), ('equipments',)),
+    'zone-distribution': (lambda data: get_zone_distribution(data.snapshot), ('equipments',)),
+    'equipment-presence': (lambda data: get_equipment_presence(data=data), ('tag_reads', 'equipments')),
+    'client-ranking': (lambda data: get_client_ranking(data=data), DASHBOARD_STATS_TABLES),
+    'equipment-usage': (get_equipment_usage, ('tag_reads', 'positions', 'equipments')),
+    'stock-analysis': (lambda data: get_stock_analysis(), ('stock_movements',)),
+    'client-visits': (lambda data: get_client_visits(), ('client_visits',)),
+}
+# Chaque tableau de bord composé est aussi un sujet (dashboard/<type>)
+TOPICS.update({
+    f'dashboard/{dashboard_type}': (
+        lambda data, dashboard_type=dashboard_type: get_dashboard(dashboard_type, data=data),
+        tuple({table for _, tables in tiles.values() for table in tables}),
+    )
+    for dashboard_type, tiles in DASHBOARD_TILES.items()
+})
+
+class Subscription:
+    """
+    Événements en attente d'un abonné. Seule la dernière valeur de chaque sujet est conservée :
+    un client lent reçoit moins de mises à jour, sans que la mémoire en attente ne grandisse.
+    """
+
+    def __init__(self, topics):
+        self.topics = frozenset(topics)
+        self._pending = OrderedDict()
+        self._condition = threading.Condition()
+
+    def offer(self, topic, event):
+        with self._condition:
+            if topic in self._pending:
+                metrics.increment('api_stream_conflated_total', (('topic', topic),))
+            self._pending[topic] = event
+            self._condition.notify()
+
+    def wait(self, timeout):
+        """
+        Attend des événements au plus timeout secondes et les retire de la file (liste vide sinon)
+        """
+        with self._condition:
+            if not self._pending:
+                self._condition.wait(timeout)
+            events = list(self._pending.values())
+            self._pending.clear()
+            return events
+
+class TopicBroadcaster:
+    """
+    Recalcule une seule fois les sujets touchés par une écriture et diffuse le résultat
+    à tous leurs abonnés, uniquement s'il a changé depuis la diffusion précédente
+    """
+
+    def __init__(self, min_interval=STREAM_MIN_INTERVAL):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._compute_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._subscribers = set()
+        self._dirty = set()
+        self._events = {}
+        self._thread = None
+        self._app = None
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def notify(self, tables):
+        """
+        Marque les sujets qui lisent les tables modifiées; le recalcul se fait dans le thread de diffusion
+        """
+        tables = set(tables)
+        with self._lock:
+            stale = {topic for topic, (_, depends_on) in TOPICS.items() if tables.intersection(depends_on)}
+            if not stale:
+                return
+            self._dirty |= stale
+            subscribed = any(subscription.topics & stale for subscription in self._subscribers)
+        if subscribed:
+            self._wakeup.set()
+
+    def subscribe(self, topics, app, limit=None):
+        """
+        Abonne un client aux sujets demandés; il reçoit d'abord leur valeur courante.
+        Retourne None si limit abonnés sont déjà inscrits (place vérifiée et prise en une fois).
+        """
+        subscription = Subscription(topics)
+        with self._lock:
+            if limit is not None and len(self._subscribers) >= limit:
+                return None
+            self._subscribers.add(subscription)
+        metrics.increment('api_stream_subscribers', amount=1)
+        try:
+            self._start(app)
+            with self._compute_lock:
+                with self._lock:
+                    stale = [topic for topic in topics if topic in self._dirty or topic not in self._events]
+                self._refresh(stale)
+                with self._lock:
+                    events = [(topic, self._events[topic][1]) for topic in topics]
+        except BaseException:
+            self.unsubscribe(subscription)
+            raise
+        for topic, event in events:
+            subscription.offer(topic, event)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription not in self._subscribers:
+                return
+            self._subscribers.discard(subscription)
+        metrics.increment('api_stream_subscribers', amount=-1)
+
+    def _refresh(self, topics):
+        """
+        Recalcule des sujets avec des agrégats partagés et diffuse ceux dont le contenu a changé.
+        Appelé sous _compute_lock.
+        """
+        if not topics:
+            return
+        with self._lock:
+            self._dirty.difference_update(topics)
+        data = DashboardData()
+        dumps = current_app.json.dumps
+        for topic in topics:
+            body = dumps(TOPICS[topic][0](data))
+            digest = hashlib.blake2b(body.encode(), digest_size=16).digest()
+            with self._lock:
+                previous = self._events.get(topic)
+                if previous is not None and previous[0] == digest:
+                    continue
+                event = f"event: {topic}\ndata: {body}\n\n"
+                self._events[topic] = (digest, event)
+                subscribers = [subscription for subscription in self._subscribers if topic in subscription.topics]
+            for subscription in subscribers:
+                subscription.offer(topic, event)
+            if subscribers:
+                metrics.increment('api_stream_events_total', (('topic', topic),), len(subscribers))
+
+    def _start(self, app):
+        """
+        Démarre le thread de diffusion au premier abonnement (après le fork des workers)
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._app = app
+            self._thread = threading.Thread(target=self._run, name='stream-broadcaster', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        with self._app.app_context():
+            day, day_start = current_day()
+            while True:
+                # Réveil au plus tard à minuit : les sujets qui dépendent de la date sont alors recalculés
+                self._wakeup.wait(max(0.0, day_start + 86400 - time.time()) + 1)
+                if current_day()[0] != day:
+                    day, day_start = current_day()
+                    self.notify(DAILY_TABLES)
+                if not self._wakeup.is_set():
+                    continue
+                # Les écritures reçues pendant l'intervalle minimal sont diffusées ensemble
+                time.sleep(self.min_interval)
+                self._wakeup.clear()
+                with self._lock:
+                    subscribed = set().union(*(subscription.topics for subscription in self._subscribers))
+                    stale = self._dirty & subscribed
+                    # Sujets sans abonné : leur valeur sera recalculée au prochain abonnement
+                    for topic in self._dirty - subscribed:
+                        self._events.pop(topic, None)
+                    self._dirty -= self._dirty - subscribed
+                try:
+                    with self._compute_lock:
+                        self._refresh(sorted(stale))
+                except Exception as e:
+                    print(f"Erreur lors de la diffusion des mises à jour: {str(e)}")
+
+# Diffuseur partagé par tous les abonnés du processus
+broadcaster = TopicBroadcaster()
+on_invalidate(broadcaster.notify)
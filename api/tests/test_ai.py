@@ -0,0 +1,162 @@
+# Tests de l'analyse IA : classification des prompts, appels partagés et diffusion en SSE
+import json
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from api.app import create_app
+from api.models.repository import reset_data
+from api.services import ai_service
+from api.services.ai_service import classify_prompt, complete_prompt, completion_cache
+from api.services.cache_service import response_cache
+
+
+class FakeCompletions:
+    """
+    Remplace client.chat.completions : compte les appels et renvoie une réponse fixe
+    """
+
+    def __init__(self, text, delay=0.0):
+        self.text = text
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def create(self, stream=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if stream:
+            return FakeStream(self.text)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.text))])
+
+
+class FakeStream:
+    """
+    Flux de fragments d'une réponse, un mot par fragment
+    """
+
+    def __init__(self, text):
+        words = text.split(' ')
+        self.chunks = [
+            SimpleNamespace(choices=[SimpleNamespace(
+                delta=SimpleNamespace(content=word + (' ' if index < len(words) - 1 else '')),
+                finish_reason='stop' if index == len(words) - 1 else None,
+            )])
+            for index, word in enumerate(words)
+        ]
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        pass
+
+
+def fake_client(completions):
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+
+def parse_events(body):
+    """
+    Découpe un flux server-sent events en liste (événement, données JSON)
+    """
+    events = []
+    for block in body.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines())
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+class ClassifyPromptTest(unittest.TestCase):
+
+    def test_accents_and_case_ignored(self):
+        """
+        Les mots-clés sont reconnus sans tenir compte de la casse ni des accents
+        """
+        self.assertEqual(classify_prompt('Durée de MAINTENANCE des Tags'), {'time', 'maintenance', 'tag'})
+        self.assertEqual(classify_prompt('Activité de la semaine dernière'), {'last_week'})
+
+    def test_no_intent(self):
+        """
+        Un prompt sans mot-clé n'a aucune intention
+        """
+        self.assertEqual(classify_prompt('Bonjour'), frozenset())
+
+
+class CompletePromptTest(unittest.TestCase):
+
+    def setUp(self):
+        completion_cache.invalidate()
+
+    def test_concurrent_requests_share_one_call(self):
+        """
+        Des requêtes simultanées sur un même prompt (casse et espaces près) partagent un seul appel,
+        puis la réponse est servie du cache
+        """
+        completions = FakeCompletions('Analyse du parc', delay=0.2)
+        results = []
+        with mock.patch.object(ai_service, 'get_openai_client', return_value=fake_client(completions)):
+            threads = [
+                threading.Thread(target=lambda prompt=prompt: results.append(complete_prompt(prompt)))
+                for prompt in ('Analyse  du parc', 'analyse du parc', 'ANALYSE DU PARC')
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(complete_prompt('Analyse du parc'), 'Analyse du parc')
+        self.assertEqual(results, ['Analyse du parc'] * 3)
+        self.assertEqual(completions.calls, 1)
+
+    def test_timeout_falls_back(self):
+        """
+        Un appel plus long que le délai retourne None (mode simulation)
+        """
+        completions = FakeCompletions('Trop tard', delay=0.3)
+        with mock.patch.object(ai_service, 'get_openai_client', return_value=fake_client(completions)):
+            self.assertIsNone(complete_prompt('Prompt lent', timeout=0.05))
+
+
+class AnalyzeWithAITest(unittest.TestCase):
+
+    def setUp(self):
+        reset_data()
+        response_cache.invalidate()
+        completion_cache.invalidate()
+        self.client = create_app().test_client()
+
+    def test_simulated_analysis(self):
+        """
+        Sans client OpenAI, l'analyse simulée renvoie remarques, recommandations et graphiques
+        """
+        with mock.patch.object(ai_service, 'get_openai_client', return_value=None):
+            response = self.client.post('/api/analyze-with-ai', json={'prompt': 'Maintenance des tags'})
+        body = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body['response'], ' '.join(body['remarks']))
+        self.assertTrue(body['recommendations'])
+        self.assertEqual(len(body['customInsights']), 2)
+
+    def test_stream_events(self):
+        """
+        En SSE, les graphiques arrivent d'abord, puis les fragments du texte de l'IA, puis la réponse complète
+        """
+        completions = FakeCompletions("Le parc est stable cette semaine")
+        with mock.patch.object(ai_service, 'get_openai_client', return_value=fake_client(completions)):
+            response = self.client.post('/api/analyze-with-ai?stream=1', json={'prompt': 'Utilisation'})
+            events = parse_events(response.get_data(as_text=True))
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        names = [name for name, _ in events]
+        self.assertEqual((names[0], names[-1]), ('insights', 'done'))
+        self.assertEqual(set(names[1:-1]), {'token'})
+        text = ''.join(data['delta'] for name, data in events if name == 'token')
+        self.assertEqual(text, "Le parc est stable cette semaine")
+        self.assertEqual(events[-1][1]['remarks'][0], text)
+        self.assertEqual(events[-1][1]['customInsights'], events[0][1]['customInsights'])
+
+
+if __name__ == '__main__':
+    unittest.main()
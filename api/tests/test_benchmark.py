@@ -0,0 +1,36 @@
+# Tests du banc d'essai : toutes les routes mesurées répondent sur un parc synthétique
+import unittest
+from unittest import mock
+
+from api.app import create_app
+from api.benchmark.runner import BENCHMARK_REQUESTS, load_fleet, run_local
+from api.benchmark.synthetic import SyntheticFleet
+from api.models.repository import get_counters, reset_data
+from api.services import ai_service
+from api.services.cache_service import response_cache
+
+
+class BenchmarkTest(unittest.TestCase):
+
+    def tearDown(self):
+        reset_data()
+        response_cache.invalidate()
+
+    def test_routes_answer_on_synthetic_fleet(self):
+        """
+        Chaque route du banc d'essai répond sans erreur sur un petit parc synthétique chargé puis ingéré
+        """
+        fleet = SyntheticFleet(40, reads_per_engine=3, movements_per_engine=1, seed=7)
+        app = create_app()
+        setup = load_fleet(fleet)
+        self.assertEqual((setup['tag_reads']['rejected'], setup['stock_movements']['rejected']), (0, 0))
+        self.assertEqual(get_counters().total_engines, 40)
+        with mock.patch.object(ai_service, 'get_openai_client', return_value=None), mock.patch('builtins.print'):
+            results = run_local(app, BENCHMARK_REQUESTS, 1)
+        self.assertEqual(set(results), set(BENCHMARK_REQUESTS))
+        failed = {name: result['errors'] for name, result in results.items() if result['errors']}
+        self.assertEqual(failed, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
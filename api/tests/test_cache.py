@@ -0,0 +1,65 @@
+# Tests du cache des réponses et des réponses conditionnelles (ETag, Last-Modified)
+import unittest
+from datetime import date, datetime, timezone
+from unittest import mock
+
+from api.app import create_app
+from api.models.repository import reset_data
+from api.services import cache_service
+from api.services.cache_service import response_cache
+from api.services.ingest_service import record_status_change
+
+
+class CachedResponseTest(unittest.TestCase):
+
+    def setUp(self):
+        reset_data()
+        response_cache.invalidate()
+        self.client = create_app().test_client()
+
+    def test_etag_revalidation_and_invalidation(self):
+        """
+        Une requête conditionnelle à jour reçoit 304; une écriture dans une table lue change l'ETag
+        """
+        first = self.client.get('/api/equipment')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self.client.get('/api/equipment', headers={'If-None-Match': first.headers['ETag']})
+                         .status_code, 304)
+        record_status_change(1, status='Maintenance')
+        second = self.client.get('/api/equipment', headers={'If-None-Match': first.headers['ETag']})
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second.headers['ETag'], first.headers['ETag'])
+
+    def test_cache_hit_until_write(self):
+        """
+        La réponse est servie du cache jusqu'à une écriture dans une table dont elle dépend
+        """
+        self.client.get('/api/stats')
+        hits = response_cache.hits
+        self.client.get('/api/stats')
+        self.assertEqual(response_cache.hits, hits + 1)
+        record_status_change(2, status='Actif')
+        self.client.get('/api/stats')
+        self.assertEqual(response_cache.hits, hits + 1)
+
+    def test_client_visits_revalidated_after_midnight(self):
+        """
+        Les jours écoulés dépendent de la date : le lendemain, ni le cache ni Last-Modified ne servent
+        la réponse de la veille
+        """
+        first = self.client.get('/api/client-visits')
+        self.assertEqual(first.status_code, 200)
+        conditional = {'If-Modified-Since': first.headers['Last-Modified']}
+        self.assertEqual(self.client.get('/api/client-visits', headers=conditional).status_code, 304)
+
+        tomorrow = date.fromordinal(datetime.now(timezone.utc).date().toordinal() + 1)
+        day_start = datetime(tomorrow.year, tomorrow.month, tomorrow.day, tzinfo=timezone.utc).timestamp()
+        with mock.patch.object(cache_service, 'current_day', return_value=(tomorrow, day_start)):
+            misses = response_cache.misses
+            response = self.client.get('/api/client-visits', headers=conditional)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response_cache.misses, misses + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
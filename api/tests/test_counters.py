@@ -0,0 +1,70 @@
+# Tests des compteurs matérialisés des indicateurs du parc
+import unittest
+
+from api.models.counters import FleetCounters
+from api.models.repository import get_counters, get_frame
+from api.tests.test_ingest import IngestTestCase
+
+
+class FleetCountersTest(unittest.TestCase):
+
+    def test_status_change_moves_counts(self):
+        """
+        Un changement de statut ou de zone déplace un équipement d'un compteur à l'autre et
+        supprime les compteurs tombés à zéro
+        """
+        counters = FleetCounters()
+        counters.apply_status_change(1, status='Actif', location='Zone A', on_site=True)
+        counters.apply_status_change(2, status='Actif', location='Zone A', on_site=False)
+        self.assertTrue(counters.apply_status_change(1, status='Maintenance', location='Atelier'))
+        self.assertFalse(counters.apply_status_change(1, status='Maintenance'))
+        snapshot = counters.snapshot()
+        self.assertEqual(snapshot['statusCounts'], {'Actif': 1, 'Maintenance': 1})
+        self.assertEqual(snapshot['zoneCounts'], {'Zone A': 1, 'Atelier': 1})
+        self.assertEqual((snapshot['totalEngines'], snapshot['enginesOnSite']), (2, 1))
+
+    def test_tag_battery_and_assignment(self):
+        """
+        Une batterie sous le seuil marque le tag à entretenir, une réaffectation déplace le tag
+        """
+        counters = FleetCounters()
+        counters.apply_tag_read('T-1', equipment_id=1, battery=90.0)
+        counters.apply_tag_read('T-2', equipment_id=1, battery=80.0)
+        counters.apply_tag_read('T-1', battery=10.0)
+        self.assertTrue(counters.tag_needs_maintenance('T-1'))
+        counters.apply_tag_read('T-2', equipment_id=2)
+        snapshot = counters.snapshot()
+        self.assertEqual(
+            (snapshot['totalTags'], snapshot['usedTags'], snapshot['taggedEngines'], snapshot['tagsToMaintain']),
+            (2, 2, 2, 1),
+        )
+        counters.apply_tag_read('T-1', battery=95.0)
+        self.assertEqual(counters.snapshot()['tagsToMaintain'], 0)
+
+
+class IngestedCountersTest(IngestTestCase):
+
+    def test_counters_match_recomputation(self):
+        """
+        Après ingestion, les compteurs maintenus événement par événement valent ceux recalculés
+        à partir des tables
+        """
+        self.client.post('/api/ingest/status-changes', json={'id': 1, 'status': 'Maintenance', 'location': 'Atelier'})
+        self.client.post('/api/ingest/status-changes', json={'id': 4, 'onSite': False})
+        self.post_lines('/api/ingest/tag-reads', [
+            {'tagId': 'TAG-006', 'equipmentId': 2, 'event': 'enter', 'client': 'Client A',
+             'ts': '2024-05-01T08:00:00Z', 'battery': 12.0},
+            {'tagId': 'TAG-NEW', 'equipmentId': 3, 'event': 'enter', 'client': 'Client B',
+             'ts': '2024-05-01T09:00:00Z', 'battery': 55.0},
+        ])
+        expected = FleetCounters.from_frames(get_frame('equipments'), get_frame('tags')).snapshot()
+        self.assertEqual(get_counters().snapshot(), expected)
+        stats = self.client.get('/api/stats').get_json()
+        self.assertEqual(
+            [stats[key]['value'] for key in ('enginesOnSite', 'taggedEngines', 'tagsToMaintain', 'usedTags')],
+            ['4/5', '5/5', '1/17', '7/17'],
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+# Tests des tableaux de bord composites (toutes les tuiles en une requête)
+import unittest
+
+from api.app import create_app
+from api.models.repository import reset_data
+from api.services.cache_service import response_cache
+from api.services.ingest_service import record_status_change
+
+
+class DashboardTest(unittest.TestCase):
+
+    def setUp(self):
+        reset_data()
+        response_cache.invalidate()
+        self.client = create_app().test_client()
+
+    def test_tiles_match_endpoints(self):
+        """
+        Les tuiles d'un tableau de bord valent les réponses des routes correspondantes
+        """
+        overview = self.client.get('/api/dashboard/overview').get_json()
+        for tile, path in (
+            ('stats', '/api/stats'),
+            ('statusDistribution', '/api/status-distribution'),
+            ('zoneDistribution', '/api/zone-distribution'),
+            ('monthlyData', '/api/monthly-data'),
+        ):
+            self.assertEqual(overview[tile], self.client.get(path).get_json(), tile)
+        stock = self.client.get('/api/dashboard/stock-analysis').get_json()
+        self.assertEqual(stock['weekly'], self.client.get('/api/stock-analysis?period=weekly').get_json())
+
+    def test_tile_selection(self):
+        """
+        Le paramètre tiles limite la réponse aux tuiles demandées; une tuile inconnue donne 400
+        """
+        body = self.client.get('/api/dashboard/overview?tiles=stats,monthlyData').get_json()
+        self.assertEqual(set(body), {'stats', 'monthlyData'})
+        self.assertEqual(self.client.get('/api/dashboard/overview?tiles=stats,bogus').status_code, 400)
+        self.assertEqual(self.client.get('/api/dashboard/bogus').status_code, 400)
+
+    def test_cache_follows_tile_tables(self):
+        """
+        Une écriture dans une table qu'aucune tuile ne lit laisse le tableau de bord en cache
+        """
+        self.client.get('/api/dashboard/stock-analysis')
+        self.client.get('/api/dashboard/overview')
+        hits = response_cache.hits
+        record_status_change(1, status='Maintenance')
+        self.client.get('/api/dashboard/stock-analysis')
+        self.assertEqual(response_cache.hits, hits + 1)
+        overview = self.client.get('/api/dashboard/overview').get_json()
+        self.assertEqual(response_cache.hits, hits + 1)
+        self.assertEqual(overview['statusDistribution'][0], {'count': 2, 'name': 'Actif', 'value': 40.0})
+
+
+if __name__ == '__main__':
+    unittest.main()
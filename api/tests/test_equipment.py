@@ -0,0 +1,85 @@
+# Tests de la liste paginée des équipements et des répartitions
+import json
+import unittest
+
+from api.app import create_app
+from api.models.repository import reset_data
+from api.services.cache_service import response_cache
+
+
+class EquipmentListTest(unittest.TestCase):
+
+    def setUp(self):
+        reset_data()
+        response_cache.invalidate()
+        self.client = create_app().test_client()
+
+    def test_pages_cover_fleet_once(self):
+        """
+        Le parcours des pages par curseur renvoie chaque équipement une fois, dans l'ordre de la liste
+        """
+        full = self.client.get('/api/equipment').get_json()
+        ids, cursor = [], None
+        while True:
+            query = '/api/equipment?limit=2' + (f'&cursor={cursor}' if cursor else '')
+            page = self.client.get(query).get_json()
+            self.assertLessEqual(len(page['items']), 2)
+            ids.extend(item['id'] for item in page['items'])
+            cursor = page['nextCursor']
+            if cursor is None:
+                break
+        self.assertEqual(ids, [item['id'] for item in full])
+
+    def test_filters_and_fields(self):
+        """
+        Les filtres de statut et la sélection de champs s'appliquent à la page
+        """
+        page = self.client.get('/api/equipment?limit=10&status=Actif&fields=id,status').get_json()
+        self.assertEqual(page['items'], [
+            {'id': 1, 'status': 'Actif'}, {'id': 3, 'status': 'Actif'}, {'id': 5, 'status': 'Actif'},
+        ])
+        self.assertIsNone(page['nextCursor'])
+
+    def test_ndjson_stream(self):
+        """
+        Le format ndjson renvoie un équipement par ligne
+        """
+        response = self.client.get('/api/equipment?format=ndjson&location=Atelier')
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([line['id'] for line in lines], [2])
+
+    def test_invalid_parameters(self):
+        """
+        Une limite hors bornes ou un curseur illisible donnent une erreur 400
+        """
+        self.assertEqual(self.client.get('/api/equipment?limit=0').status_code, 400)
+        self.assertEqual(self.client.get('/api/equipment?limit=2&cursor=%%%').status_code, 400)
+
+
+class DistributionTest(unittest.TestCase):
+
+    def setUp(self):
+        reset_data()
+        response_cache.invalidate()
+        self.client = create_app().test_client()
+
+    def test_status_distribution(self):
+        """
+        La répartition par statut donne le nombre et la part de chaque statut
+        """
+        self.assertEqual(self.client.get('/api/status-distribution').get_json(), [
+            {'count': 3, 'name': 'Actif', 'value': 60.0},
+            {'count': 1, 'name': 'Maintenance', 'value': 20.0},
+            {'count': 1, 'name': 'Inactif', 'value': 20.0},
+        ])
+
+    def test_unknown_dimension(self):
+        """
+        Une dimension inconnue donne une erreur 400
+        """
+        self.assertEqual(self.client.get('/api/distribution/bogus').status_code, 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+# Tests des exports de jeux de données en flux (/api/export/<jeu>)
+import io
+import json
+import unittest
+from unittest import mock
+
+from api.app import create_app
+from api.models.repository import reset_data
+from api.services import export_service
+from api.services.cache_service import response_cache
+from api.services.ingest_service import ingest_stock_movements
+
+
+class ExportTest(unittest.TestCase):
+
+    def setUp(self):
+        reset_data()
+        response_cache.invalidate()
+        export_service._pyarrow.cache_clear()
+        self.addCleanup(export_service._pyarrow.cache_clear)
+        self.client = create_app().test_client()
+        ingest_stock_movements([
+            {'ts': '2024-05-01T08:00:00Z', 'direction': 'in', 'quantity': 3, 'storageTime': 2.5},
+            {'ts': '2024-05-02T08:00:00Z', 'direction': 'out', 'quantity': 1},
+        ])
+
+    def test_csv_and_ndjson_rows(self):
+        """
+        Les exports CSV et NDJSON contiennent les lignes de la fenêtre, dates en ISO 8601
+        """
+        csv_body = self.client.get('/api/export/stock-movements?format=csv&from=2024-05-02').get_data(as_text=True)
+        self.assertEqual(csv_body.splitlines(), ['ts,direction,quantity,storageTime', '2024-05-02T08:00:00,out,1,'])
+        lines = self.client.get('/api/export/stock-movements?format=ndjson').get_data(as_text=True).splitlines()
+        self.assertEqual(json.loads(lines[0]), {'ts': '2024-05-01T08:00:00', 'direction': 'in', 'quantity': 3,
+                                                'storageTime': 2.5})
+
+    def test_unknown_dataset_and_format(self):
+        """
+        Un jeu ou un format inconnu est refusé avant l'envoi du flux
+        """
+        self.assertEqual(self.client.get('/api/export/unknown').status_code, 400)
+        self.assertEqual(self.client.get('/api/export/stock-movements?format=xml').status_code, 400)
+
+    def test_parquet_refused_when_pyarrow_cannot_be_imported(self):
+        """
+        pyarrow présent mais non importable (ABI numpy) : 501 avant l'envoi du flux, sans corps tronqué
+        """
+        with mock.patch.object(export_service.importlib, 'import_module', side_effect=ImportError('numpy ABI')):
+            response = self.client.get('/api/export/stock-movements?format=parquet')
+        self.assertEqual(response.status_code, 501)
+        self.assertIn('error', response.get_json())
+
+    def test_parquet_round_trip(self):
+        """
+        L'export Parquet se relit avec les mêmes lignes
+        """
+        if not export_service.parquet_available():
+            self.skipTest("pyarrow indisponible")
+        import pyarrow.parquet as pq
+
+        response = self.client.get('/api/export/stock-movements?format=parquet')
+        self.assertEqual(response.status_code, 200)
+        table = pq.read_table(io.BytesIO(response.get_data()))
+        self.assertEqual(table.column('quantity').to_pylist()[-2:], [3, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
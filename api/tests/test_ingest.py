@@ -0,0 +1,102 @@
+# Tests de l'ingestion des événements du parc par l'API
+import json
+import unittest
+
+from api.app import create_app
+from api.models.repository import get_store, reset_data
+from api.services.cache_service import response_cache
+
+
+def ndjson(rows):
+    return ''.join(json.dumps(row) + '\n' for row in rows)
+
+
+class IngestTestCase(unittest.TestCase):
+    """
+    Application créée sur les données initiales, sans réponse en cache
+    """
+
+    def setUp(self):
+        reset_data()
+        response_cache.invalidate()
+        self.client = create_app().test_client()
+
+    def post_lines(self, path, rows):
+        response = self.client.post(path, data=ndjson(rows), content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+
+class UnknownEquipmentTest(IngestTestCase):
+
+    def test_tag_read_for_unknown_equipment_is_rejected(self):
+        """
+        Une lecture pour un équipement inconnu est rejetée sans créer de ligne d'équipement vide
+        """
+        result = self.post_lines('/api/ingest/tag-reads', [
+            {'tagId': 'T-77', 'equipmentId': 77, 'event': 'enter', 'client': 'Client A', 'ts': '2024-05-01T08:00:00Z'},
+        ])
+        self.assertEqual((result['accepted'], result['rejected']), (0, 1))
+        self.assertNotIn(77, get_store().table('equipments')['id'].tolist())
+        for path in ['/api/equipment', '/api/equipment-usage', '/api/equipment-presence',
+                     '/api/dashboard/equipment-presence']:
+            self.assertEqual(self.client.get(path).status_code, 200, path)
+
+    def test_position_for_unknown_equipment_is_rejected(self):
+        """
+        Une position d'un équipement inconnu est rejetée, celle d'un équipement connu acceptée
+        """
+        result = self.post_lines('/api/ingest/positions', [
+            {'equipmentId': 77, 'ts': '2024-05-01T08:00:00Z', 'lat': 48.85, 'lon': 2.35},
+            {'equipmentId': 1, 'ts': '2024-05-01T08:00:00Z', 'lat': 48.85, 'lon': 2.35},
+        ])
+        self.assertEqual((result['accepted'], result['rejected']), (1, 1))
+        self.assertEqual(len(get_store().table('equipments')), 5)
+        self.assertEqual(self.client.get('/api/equipment-usage').status_code, 200)
+
+    def test_status_change_for_unknown_equipment_is_refused(self):
+        """
+        Un changement de statut d'un équipement inconnu est refusé (400)
+        """
+        response = self.client.post('/api/ingest/status-changes', json={'id': 77, 'status': 'Actif'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(get_store().table('equipments')), 5)
+
+
+class InvalidationTest(IngestTestCase):
+
+    def test_reads_without_change_keep_equipment_responses_cached(self):
+        """
+        Des lectures qui ne changent aucun équipement ni tag n'invalident pas leurs réponses en cache
+        """
+        store = get_store()
+        self.client.get('/api/equipment')
+        versions = store.table_version('equipments'), store.table_version('tags')
+        self.post_lines('/api/ingest/tag-reads', [
+            {'tagId': 'TAG-001', 'equipmentId': 1, 'battery': 92.0, 'ts': '2024-05-01T08:00:00Z'},
+            {'tagId': 'TAG-002', 'equipmentId': 2, 'event': 'read', 'ts': '2024-05-01T08:05:00Z'},
+        ])
+        self.post_lines('/api/ingest/positions', [
+            {'equipmentId': 1, 'ts': '2024-05-01T08:00:00Z', 'lat': 48.85, 'lon': 2.35},
+        ])
+        self.assertEqual((store.table_version('equipments'), store.table_version('tags')), versions)
+        hits = response_cache.hits
+        self.client.get('/api/equipment')
+        self.assertEqual(response_cache.hits, hits + 1)
+
+    def test_changed_equipment_is_updated(self):
+        """
+        Une entrée chez un client met à jour la présence sur site de l'équipement et invalide ses réponses
+        """
+        self.client.get('/api/equipment')
+        self.client.post('/api/ingest/status-changes', json={'id': 1, 'onSite': False})
+        self.post_lines('/api/ingest/tag-reads', [
+            {'tagId': 'TAG-001', 'equipmentId': 1, 'event': 'enter', 'client': 'Client A',
+             'ts': '2024-05-01T08:00:00Z'},
+        ])
+        equipment = {row['id']: row for row in self.client.get('/api/equipment').get_json()}
+        self.assertTrue(equipment[1]['onSite'])
+
+
+if __name__ == '__main__':
+    unittest.main()
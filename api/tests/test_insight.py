@@ -0,0 +1,56 @@
+# Tests des requêtes mémorisées des graphiques de l'analyse IA
+from api.models.repository import get_frame, get_store, get_usage_accumulator
+from api.services import insight_service
+from api.tests.test_ingest import IngestTestCase
+
+
+class InsightMemoTest(IngestTestCase):
+
+    def test_location_change_keeps_results(self):
+        """
+        Un changement de lieu modifie la table des équipements sans invalider les requêtes
+        qui n'en lisent que les types (ou rien du tout)
+        """
+        queries = [
+            insight_service.utilization_by_weekday, insight_service.activity_last_week,
+            insight_service.activity_by_day, insight_service.maintenance_by_month,
+            insight_service.time_by_activity,
+        ]
+        before = [query() for query in queries]
+        response = self.client.post('/api/ingest/status-changes', json={'id': 1, 'location': 'Dépôt Sud'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(get_frame('equipments').set_index('id').at[1, 'location'], 'Dépôt Sud')
+        for query, result in zip(queries, before):
+            self.assertIs(query(), result, query.__name__)
+
+    def test_status_change_refreshes_status_breakdown(self):
+        """
+        Un passage en maintenance est pris en compte dans la répartition du temps par activité
+        """
+        before = insight_service.time_by_activity()
+        self.client.post('/api/ingest/status-changes', json={'id': 1, 'status': 'Maintenance'})
+        after = insight_service.time_by_activity()
+        self.assertEqual(after[-1], {'name': 'Maintenance', 'value': 40})
+        self.assertNotEqual(after, before)
+
+    def test_type_change_refreshes_type_breakdown(self):
+        """
+        Un changement du type d'un équipement est pris en compte dans la répartition par type
+        """
+        before = insight_service.utilization_by_weekday()
+        equipments = get_frame('equipments').astype({'type': object})
+        equipments.loc[equipments['id'] == 1, 'type'] = 'Grue'
+        get_store().load('equipments', equipments)
+        after = insight_service.utilization_by_weekday()
+        self.assertIn('Bulldozer', before[0])
+        self.assertNotIn('Bulldozer', after[0])
+
+    def test_distance_refreshes_activity(self):
+        """
+        Une distance parcourue supplémentaire est prise en compte dans l'activité de la semaine
+        """
+        before = insight_service.activity_last_week()
+        usage = get_usage_accumulator()
+        usage.add_day(1, usage.latest_day, 10.0)
+        after = insight_service.activity_last_week()
+        self.assertEqual(after[-1]['Activité'], round(before[-1]['Activité'] + 10.0, 1))
@@ -0,0 +1,59 @@
+# Tests de l'instrumentation des routes (durées, volumes, cache) exportée au format Prometheus
+import re
+import unittest
+
+from api.app import create_app
+from api.models.repository import reset_data
+from api.services.cache_service import response_cache
+
+
+class MetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        reset_data()
+        response_cache.invalidate()
+        self.client = create_app().test_client()
+
+    def sample(self, body, name, **labels):
+        """
+        Valeur d'une série de l'export texte, ou 0 si elle est absente
+        """
+        selector = ','.join(f'{key}="{value}"' for key, value in labels.items())
+        match = re.search(rf'^{re.escape(name)}\{{{re.escape(selector)}\}} (\S+)$', body, re.MULTILINE)
+        return float(match.group(1)) if match else 0.0
+
+    def test_requests_counted_by_status(self):
+        """
+        Chaque requête est comptée par route, méthode et code de statut, et sa durée mesurée
+        """
+        before = self.client.get('/api/metrics').get_data(as_text=True)
+        self.client.get('/api/client-ranking')
+        self.client.get('/api/client-ranking?limit=abc')
+        response = self.client.get('/api/metrics')
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        body = response.get_data(as_text=True)
+        for status in ('200', '400'):
+            labels = {'endpoint': 'get_client_ranking', 'method': 'GET', 'status': status}
+            self.assertEqual(
+                self.sample(body, 'api_requests_total', **labels) - self.sample(before, 'api_requests_total', **labels), 1
+            )
+        self.assertIn('api_request_duration_seconds_bucket{endpoint="get_client_ranking",le="+Inf"}', body)
+
+    def test_cache_lookups_counted(self):
+        """
+        Les consultations du cache des réponses sont comptées par résultat
+        """
+        before = self.client.get('/api/metrics').get_data(as_text=True)
+        self.client.get('/api/stats')
+        self.client.get('/api/stats')
+        body = self.client.get('/api/metrics').get_data(as_text=True)
+        for result in ('hit', 'miss'):
+            labels = {'endpoint': 'get_stats', 'result': result}
+            self.assertEqual(
+                self.sample(body, 'api_cache_lookups_total', **labels)
+                - self.sample(before, 'api_cache_lookups_total', **labels), 1
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
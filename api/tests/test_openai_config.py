@@ -0,0 +1,32 @@
+# Tests de la configuration du client OpenAI
+import os
+import unittest
+from unittest import mock
+
+from api.config import openai_config
+
+
+class OpenAIClientTest(unittest.TestCase):
+
+    def test_client_is_built_with_pinned_dependencies(self):
+        """
+        Le client est construit avec une clé (sans appel réseau) : aucune incompatibilité
+        entre openai et httpx ne fait basculer silencieusement en simulation
+        """
+        environ = {'OPENAI_API_KEY': 'sk-test', 'OPENAI_BASE_URL': 'http://127.0.0.1:9/v1'}
+        with mock.patch.dict(os.environ, environ):
+            client = openai_config._create_client()
+        self.assertIsNotNone(client)
+        self.assertEqual(client.max_retries, 0)
+        client.close()
+
+    def test_simulation_without_key(self):
+        """
+        Sans clé, le mode simulation est retenu
+        """
+        with mock.patch.dict(os.environ, {'OPENAI_API_KEY': ''}), mock.patch('dotenv.load_dotenv'):
+            self.assertIsNone(openai_config._create_client())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+# Tests de la persistance : instantanés relus à l'identique et reprise après redémarrage
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from api.models.persistence import read_snapshot, write_snapshot
+from api.models.store import SCHEMAS, ColumnarStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class SnapshotRoundTripTest(unittest.TestCase):
+
+    def test_columns_round_trip(self):
+        """
+        Chaque type de colonne est relu avec ses valeurs et son type, y compris une colonne d'objets
+        """
+        frame = pd.DataFrame({
+            'flag': np.array([True, False, True]),
+            'mixed': pd.Series([True, None, 'x'], dtype=object),
+            'label': pd.Series(['a', None, 'c'], dtype='string'),
+            'kind': pd.Categorical(['x', 'y', None]),
+            'count': pd.Series([1, None, 3], dtype='Int64'),
+            'ts': pd.to_datetime(['2024-01-01', None, '2024-01-03']),
+            'value': [1.5, np.nan, 3.0],
+        })
+        with tempfile.TemporaryDirectory() as directory:
+            write_snapshot(directory, 7, {'sample': frame}, {})
+            lsn, tables, _ = read_snapshot(directory)
+        self.assertEqual(lsn, 7)
+        pd.testing.assert_frame_equal(tables['sample'], frame)
+
+    def test_legacy_object_column_restored(self):
+        """
+        Une colonne booléenne devenue objet est relue puis reconvertie au type du schéma
+        """
+        store = ColumnarStore()
+        store.load('equipments', [{'id': 1, 'name': 'A', 'onSite': True}, {'id': 2, 'name': 'B', 'onSite': False}])
+        equipments = store.table('equipments').assign(onSite=lambda f: f['onSite'].astype(object))
+        with tempfile.TemporaryDirectory() as directory:
+            write_snapshot(directory, 1, {'equipments': equipments}, {})
+            _, tables, _ = read_snapshot(directory)
+        restored = ColumnarStore()
+        restored.restore(tables)
+        self.assertEqual(restored.table('equipments')['onSite'].dtype, SCHEMAS['equipments']['onSite'])
+        self.assertEqual(restored.table('equipments')['onSite'].tolist(), [True, False])
+
+
+# Première exécution : écritures, instantané puis écritures journalisées après l'instantané
+WRITE = '''
+from api.models.repository import get_store
+from api.services.ingest_service import ingest_tag_reads, record_status_change
+from api.services.persistence_service import recover, take_snapshot
+
+recover()
+equipment_id = int(get_store().table('equipments')['id'].iloc[0])
+record_status_change(equipment_id, on_site=False)
+ingest_tag_reads([{'tagId': 'TEST-1', 'equipmentId': equipment_id, 'event': 'enter',
+                   'client': 'Client Test', 'ts': '2024-05-01T08:00:00Z'}])
+take_snapshot()
+ingest_tag_reads([{'tagId': 'TEST-2', 'equipmentId': equipment_id, 'event': 'exit',
+                   'client': 'Client Test', 'ts': '2024-05-01T09:00:00Z'}])
+'''
+
+# Seconde exécution : reprise et affichage de l'état restauré
+READ = '''
+from api.models.repository import get_store
+from api.services.persistence_service import recover
+
+recover()
+store = get_store()
+equipment = store.table('equipments').iloc[0]
+reads = store.table('tag_reads')
+print(bool(equipment['onSite']), store.table('equipments')['onSite'].dtype)
+print(','.join(reads.loc[reads['tagId'].str.startswith('TEST'), 'tagId'].tolist()))
+'''
+
+
+class RecoveryTest(unittest.TestCase):
+
+    def _run(self, directory, script):
+        env = dict(os.environ, FLEET_DATA_DIR=directory, STORAGE_BACKEND='memory', PYTHONPATH=ROOT)
+        result = subprocess.run([sys.executable, '-c', textwrap.dedent(script)], cwd=ROOT, env=env,
+                                capture_output=True, text=True, timeout=120)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout
+
+    def test_state_survives_restart(self):
+        """
+        L'instantané et le journal postérieur restituent l'état après redémarrage
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            output = self._run(directory, WRITE)
+            self.assertNotIn('illisible', output)
+            lines = self._run(directory, READ).strip().splitlines()
+        self.assertEqual(lines[-2], 'False bool')
+        self.assertEqual(lines[-1], 'TEST-1,TEST-2')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+# Tests de l'index des présences des engins chez les clients
+import os
+import tempfile
+import unittest
+
+from api.models.presence import PresenceIndex
+from api.models.sqlite_store import SqlitePresenceIndex, SqliteStore
+from api.tests.test_stats import StatsTestCase
+from api.services.ingest_service import ingest_tag_reads
+
+
+class PresenceIndexTest(unittest.TestCase):
+
+    def create_index(self):
+        return PresenceIndex()
+
+    def test_out_of_order_events_are_merged(self):
+        """
+        Une entrée et une sortie arrivées en retard qui chevauchent une présence connue sont fusionnées
+        """
+        index = self.create_index()
+        index.enter('Client A', 1, 10.0)
+        index.exit('Client A', 1, 20.0)
+        index.enter('Client A', 1, 5.0)
+        index.exit('Client A', 1, 15.0)
+        self.assertEqual(index.totals(now=100.0), [('Client A', 1, 15.0)])
+        self.assertEqual(index.client_total('Client A', start=12.0, end=18.0, now=100.0), 6.0)
+
+    def test_late_interval_bridges_neighbours(self):
+        """
+        Un intervalle historique qui recouvre deux présences les réunit en une seule
+        """
+        index = self.create_index()
+        for start, end in [(0.0, 10.0), (20.0, 30.0), (40.0, 50.0), (15.0, 25.0), (5.0, 22.0)]:
+            index.add_interval('Client A', 1, start, end)
+        self.assertEqual(index.totals(now=100.0), [('Client A', 1, 40.0)])
+        self.assertEqual(index.client_total('Client A', start=8.0, end=45.0, now=100.0), 27.0)
+
+
+class SqlitePresenceIndexTest(PresenceIndexTest):
+
+    def create_index(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        store = SqliteStore(os.path.join(directory.name, 'fleet.db'))
+        self.addCleanup(store.close)
+        return SqlitePresenceIndex(store)
+
+
+class PresencePayloadTest(StatsTestCase):
+
+    def test_unnamed_equipment_listed_by_identifier(self):
+        """
+        La présence d'un équipement sans nom est servie sous son identifiant
+        """
+        self.add_unnamed_equipment()
+        ingest_tag_reads([{'tagId': 'TAG-006', 'equipmentId': 6, 'event': 'enter', 'client': 'Client A',
+                           'ts': '2024-05-01T08:00:00Z'}])
+        rows = self.get_json('/api/equipment-presence')
+        self.assertIn('6', [row['equipment'] for row in rows])
+
+
+if __name__ == '__main__':
+    unittest.main()
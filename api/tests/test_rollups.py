@@ -0,0 +1,57 @@
+# Tests des agrégats de mouvements de stock
+from datetime import date, datetime
+
+from api.models import data
+from api.models.repository import _seed_stock_rollup, get_stock_rollup, reset_data
+from api.models.rollups import StockRollup
+from api.tests.test_ingest import IngestTestCase
+
+
+class StockRollupTest(IngestTestCase):
+
+    def ingest_daily_rows(self, rows):
+        """
+        Ingère chaque ligne d'historique journalier sous forme d'une entrée et d'une sortie à midi
+        (si leur quantité n'est pas nulle), portant toutes deux la durée moyenne de stockage
+        """
+        movements = []
+        for row in rows:
+            ts = f"{row['date']}T12:00:00Z"
+            for direction, quantity in (('in', row['incoming']), ('out', row['outgoing'])):
+                if quantity:
+                    movements.append({'ts': ts, 'direction': direction, 'quantity': quantity,
+                                      'storageTime': row['avgStorageTime']})
+        result = self.post_lines('/api/ingest/stock-movements', movements)
+        self.assertEqual(result['rejected'], 0)
+
+    def test_seed_and_ingest_weight_storage_time_alike(self):
+        """
+        L'historique initial et l'ingestion des mêmes lignes donnent les mêmes agrégats journaliers
+        (durée de stockage pondérée par les quantités sorties)
+        """
+        seeded = StockRollup()
+        _seed_stock_rollup(seeded)
+        reset_data(stock_rollup=StockRollup())
+        self.ingest_daily_rows(data.stock_analysis_data['daily'])
+
+        self.assertEqual(get_stock_rollup().query('day'), seeded.query('day'))
+
+    def test_weekly_average_weighted_by_outgoing(self):
+        """
+        La durée moyenne hebdomadaire des mouvements reçus est pondérée par les quantités sorties
+        """
+        reset_data(stock_rollup=StockRollup())
+        self.ingest_daily_rows([
+            {'date': '2024-05-06', 'incoming': 30, 'outgoing': 1, 'avgStorageTime': 10.0},
+            {'date': '2024-05-07', 'incoming': 0, 'outgoing': 3, 'avgStorageTime': 2.0},
+        ])
+        week = self.client.get('/api/stock-analysis?bucket=week').get_json()
+        self.assertEqual(week, [{'week': 'Semaine 19', 'incoming': 30, 'outgoing': 4, 'avgStorageTime': 4.0}])
+
+    def test_incoming_storage_time_ignored(self):
+        """
+        Une entrée seule ne donne pas de durée de stockage
+        """
+        rollup = StockRollup()
+        rollup.add_movement(datetime(2024, 5, 6, 8), 'in', 5, storage_time=7.0)
+        self.assertEqual(rollup.query('day'), [(date(2024, 5, 6), [5, 0, 0.0, 0])])
@@ -0,0 +1,57 @@
+# Tests du démarrage à froid de l'application
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+from api import app as app_module
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StartupImportsTest(unittest.TestCase):
+
+    def _loaded_modules(self, environ):
+        """
+        Crée l'application dans un nouveau processus et retourne les modules lourds importés
+        """
+        code = (
+            "import sys; from api.app import create_app; create_app(); "
+            "print(','.join(m for m in ('pandas', 'numpy', 'openai') if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True,
+            env={**os.environ, 'PYTHONPATH': ROOT, **environ},
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout.strip()
+
+    def test_create_app_defers_heavy_imports(self):
+        """
+        Ni pandas, ni numpy, ni openai ne sont importés par la création de l'application
+        """
+        self.assertEqual(self._loaded_modules({'FLEET_DATA_DIR': ''}), '')
+
+    def test_data_dir_defers_heavy_imports(self):
+        """
+        Avec un répertoire de données, la restauration (et pandas) attend la première requête
+        """
+        self.assertEqual(self._loaded_modules({'FLEET_DATA_DIR': os.path.join(ROOT, 'inexistant')}), '')
+
+
+class CheckStartupTest(unittest.TestCase):
+
+    def test_check_fails_over_budget(self):
+        """
+        --check retourne un code non nul lorsque l'objectif de démarrage n'est pas tenu
+        """
+        with mock.patch.object(app_module, 'STARTUP_TARGET_MS', 0), mock.patch('builtins.print'):
+            self.assertEqual(app_module.check_startup(), 1)
+
+    def test_check_passes_within_budget(self):
+        """
+        --check retourne 0 lorsque l'objectif de démarrage est tenu
+        """
+        with mock.patch.object(app_module, 'STARTUP_TARGET_MS', 60_000), mock.patch('builtins.print'):
+            self.assertEqual(app_module.check_startup(), 0)
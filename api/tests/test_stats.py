@@ -0,0 +1,101 @@
+# Tests des statistiques du parc servies par l'API
+import unittest
+
+from api.app import create_app
+from api.models import data
+from api.models.repository import get_store, reset_data
+from api.services.cache_service import response_cache
+from api.services.ingest_service import ingest_positions, ingest_tag_reads
+
+
+class StatsTestCase(unittest.TestCase):
+    """
+    Application créée sur les données initiales, sans réponse en cache
+    """
+
+    def setUp(self):
+        reset_data()
+        response_cache.invalidate()
+        self.client = create_app().test_client()
+
+    def get_json(self, path):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200, path)
+        return response.get_json()
+
+    def add_unnamed_equipment(self):
+        """
+        Ajoute au parc un équipement 6 sans nom
+        """
+        get_store().load('equipments', data.equipments + [{'id': 6, 'type': 'Grue', 'onSite': False}])
+        reset_data(get_store())
+
+
+class UnnamedEquipmentTest(StatsTestCase):
+
+    def test_usage_uses_identifier_when_name_is_missing(self):
+        """
+        Un équipement sans nom apparaît sous son identifiant dans l'utilisation des engins
+        """
+        self.add_unnamed_equipment()
+        ingest_positions([
+            {'equipmentId': 6, 'ts': '2024-05-01T08:00:00', 'lat': 48.85, 'lon': 2.35},
+            {'equipmentId': 6, 'ts': '2024-05-01T09:00:00', 'lat': 48.95, 'lon': 2.35},
+        ])
+        names = [row['equipment'] for row in self.get_json('/api/equipment-usage')]
+        self.assertIn('6', names)
+
+
+class DashboardStatsTest(StatsTestCase):
+
+    def test_every_dashboard_has_computed_stats(self):
+        """
+        Chaque tableau de bord a quatre indicateurs calculés; un type inconnu retombe sur la présence
+        """
+        for dashboard_type in ['equipment-presence', 'client-ranking', 'equipment-usage', 'stock-analysis',
+                               'client-visits']:
+            stats = self.get_json(f'/api/dashboard-stats?type={dashboard_type}')
+            self.assertEqual(sorted(stats), ['stat1', 'stat2', 'stat3', 'stat4'], dashboard_type)
+        self.assertEqual(self.get_json('/api/dashboard-stats?type=unknown'),
+                         self.get_json('/api/dashboard-stats?type=equipment-presence'))
+
+    def test_client_visits_tile_follows_visits(self):
+        """
+        La tuile des visites est dérivée des visites enregistrées (données initiales, puis une entrée)
+        """
+        stats = self.get_json('/api/dashboard-stats?type=client-visits')
+        self.assertEqual([stats[key]['value'] for key in ['stat1', 'stat2', 'stat3', 'stat4']],
+                         ['62', 'Client C', '0/5', '12.4'])
+        ingest_tag_reads([{'tagId': 'TAG-002', 'equipmentId': 2, 'event': 'enter', 'client': 'Client B',
+                           'ts': '2024-05-01T08:00:00Z'}])
+        stats = self.get_json('/api/dashboard-stats?type=client-visits')
+        self.assertEqual(stats['stat1']['value'], '63')
+
+
+class ClientRankingTest(StatsTestCase):
+
+    def test_limit_is_validated(self):
+        """
+        limit doit être un entier positif : une valeur invalide est refusée (400) au lieu d'être ignorée
+        """
+        self.assertEqual(len(self.get_json('/api/client-ranking?metric=visits&limit=2')), 2)
+        for limit in ['abc', '0', '-1', '', '2.5']:
+            response = self.client.get(f'/api/client-ranking?limit={limit}')
+            self.assertEqual(response.status_code, 400, limit)
+            self.assertIn('error', response.get_json())
+
+    def test_window_applies_to_visits(self):
+        """
+        Avec from et to, les visites sont comptées sur les seules entrées de la fenêtre
+        """
+        ingest_tag_reads([
+            {'tagId': 'TAG-002', 'equipmentId': 2, 'event': 'enter', 'client': 'Client B', 'ts': '2024-05-01T08:00:00'},
+            {'tagId': 'TAG-002', 'equipmentId': 2, 'event': 'exit', 'client': 'Client B', 'ts': '2024-05-01T10:00:00'},
+            {'tagId': 'TAG-002', 'equipmentId': 2, 'event': 'enter', 'client': 'Client B', 'ts': '2024-06-01T08:00:00'},
+        ])
+        rows = self.get_json('/api/client-ranking?metric=visits&from=2024-05-01&to=2024-05-31')
+        self.assertEqual([(row['client'], row['visits']) for row in rows if row['visits']], [('Client B', 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
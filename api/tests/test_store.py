@@ -0,0 +1,121 @@
+# Tests du stockage des tables : colonnaire en mémoire et SQLite (même interface)
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from api.models.sqlite_store import SqliteStore
+from api.models.store import ColumnarStore, frame_to_records
+
+EQUIPMENTS = [
+    {'id': 1, 'name': 'A', 'type': 'Grue', 'status': 'Actif', 'location': 'Zone A', 'client': 'Client A',
+     'lastUsed': '2024-05-01', 'onSite': True},
+    {'id': 2, 'name': 'B', 'type': 'Chargeuse', 'status': 'Inactif', 'location': 'Zone B', 'onSite': False},
+]
+
+
+class ColumnarStoreTest(unittest.TestCase):
+
+    def create_store(self):
+        return ColumnarStore()
+
+    def setUp(self):
+        self.store = self.create_store()
+        self.store.load('equipments', EQUIPMENTS)
+
+    def test_load_coerces_schema(self):
+        """
+        Les lignes chargées prennent les types du schéma, valeurs manquantes comprises
+        """
+        frame = self.store.table('equipments')
+        self.assertEqual(frame['id'].dtype, 'int64')
+        self.assertEqual(frame['name'].dtype, 'string')
+        self.assertIsInstance(frame['status'].dtype, pd.CategoricalDtype)
+        self.assertEqual(frame['lastUsed'].dtype, 'datetime64[ns]')
+        self.assertTrue(pd.isna(frame['client'].iloc[1]))
+        self.assertTrue(pd.isna(frame['lastUsed'].iloc[1]))
+
+    def test_append_keeps_order_and_categories(self):
+        """
+        Les lignes ajoutées suivent les précédentes, avec de nouvelles catégories si besoin,
+        et chaque écriture renouvelle la version de la table
+        """
+        version = self.store.table_version('equipments')
+        self.store.append('equipments', [{'id': 3, 'name': 'C', 'type': 'Grue', 'status': 'Maintenance',
+                                          'onSite': True}])
+        self.store.append('equipments', [{'id': 4, 'name': 'D', 'type': 'Bulldozer', 'status': 'Actif',
+                                          'onSite': False}])
+        self.assertNotEqual(self.store.table_version('equipments'), version)
+        frame = self.store.table('equipments')
+        self.assertEqual(frame['id'].tolist(), [1, 2, 3, 4])
+        self.assertEqual(frame['status'].tolist(), ['Actif', 'Inactif', 'Maintenance', 'Actif'])
+        self.assertIsInstance(frame['type'].dtype, pd.CategoricalDtype)
+
+    def test_upsert_keeps_last_value_and_types(self):
+        """
+        Les mises à jour partielles gardent la dernière valeur renseignée par clé, sans changer
+        les types, et ajoutent les clés inconnues
+        """
+        self.store.upsert('equipments', 'id', [
+            {'id': 1, 'status': 'Maintenance'},
+            {'id': 1, 'location': 'Atelier'},
+            {'id': 2, 'lastUsed': '2024-06-01'},
+            {'id': 5, 'name': 'E', 'type': 'Grue', 'status': 'Actif', 'onSite': True},
+        ])
+        frame = self.store.table('equipments')
+        rows = frame.set_index('id')
+        self.assertEqual((rows.at[1, 'status'], rows.at[1, 'location']), ('Maintenance', 'Atelier'))
+        self.assertEqual(rows.at[2, 'lastUsed'], pd.Timestamp('2024-06-01'))
+        self.assertEqual(rows.at[5, 'name'], 'E')
+        self.assertEqual(frame['id'].dtype, 'int64')
+        self.assertEqual(frame['lastUsed'].dtype, 'datetime64[ns]')
+
+    def test_upsert_rejects_other_key(self):
+        """
+        Des mises à jour sur une autre clé que celle de la table sont refusées
+        """
+        self.store.upsert('equipments', 'id', [{'id': 1, 'status': 'Maintenance'}])
+        with self.assertRaises(ValueError):
+            self.store.upsert('equipments', 'name', [{'name': 'A', 'status': 'Actif'}])
+
+    def test_records_omit_missing_values(self):
+        """
+        La conversion en dictionnaires formate les dates et omet les valeurs manquantes
+        """
+        self.assertEqual(frame_to_records(self.store.table('equipments')), EQUIPMENTS)
+
+
+class SqliteStoreTest(ColumnarStoreTest):
+
+    def create_store(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'fleet.db')
+        store = SqliteStore(self.path)
+        self.addCleanup(store.close)
+        return store
+
+    def test_write_from_other_connection_seen(self):
+        """
+        Une écriture par un autre stockage sur la même base (autre processus) renouvelle la version
+        de la table et la table relue
+        """
+        frame = self.store.table('equipments')
+        version = self.store.table_version('equipments')
+        other = SqliteStore(self.path)
+        self.addCleanup(other.close)
+        other.upsert('equipments', 'id', [{'id': 2, 'status': 'Actif'}])
+        self.assertNotEqual(self.store.table_version('equipments'), version)
+        self.assertIsNot(self.store.table('equipments'), frame)
+        self.assertEqual(self.store.table('equipments')['status'].tolist(), ['Actif', 'Actif'])
+
+    def test_reads_cached_until_write(self):
+        """
+        Sans écriture, une table lue en entier est resservie sans nouvelle requête
+        """
+        self.assertIs(self.store.table('equipments'), self.store.table('equipments'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+# Tests de la diffusion en direct des mises à jour (/api/stream)
+import threading
+import unittest
+from unittest import mock
+
+from api.app import create_app
+from api.models.repository import reset_data
+from api.services.cache_service import response_cache
+from api.services.stream_service import TopicBroadcaster, broadcaster
+
+
+class SubscriberLimitTest(unittest.TestCase):
+
+    def setUp(self):
+        reset_data()
+        response_cache.invalidate()
+        self.app = create_app()
+
+    def test_concurrent_subscriptions_respect_limit(self):
+        """
+        Des abonnements simultanés ne dépassent jamais la limite : la place est prise sous verrou
+        """
+        topics_broadcaster = TopicBroadcaster(min_interval=0)
+        barrier = threading.Barrier(8)
+        results = []
+
+        def subscribe():
+            barrier.wait()
+            with self.app.app_context():
+                results.append(topics_broadcaster.subscribe(['stats'], self.app, limit=3))
+
+        threads = [threading.Thread(target=subscribe) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        accepted = [subscription for subscription in results if subscription is not None]
+        self.assertEqual(len(accepted), 3)
+        self.assertEqual(topics_broadcaster.subscriber_count(), 3)
+        for subscription in accepted:
+            topics_broadcaster.unsubscribe(subscription)
+        self.assertEqual(topics_broadcaster.subscriber_count(), 0)
+
+    def test_stream_refused_when_full_and_slot_released(self):
+        """
+        Au-delà de la limite, /api/stream répond 503; la place est rendue à la fermeture de la réponse
+        """
+        client = self.app.test_client()
+        with mock.patch('api.controllers.stream_controller.STREAM_MAX_SUBSCRIBERS', 1):
+            first = client.get('/api/stream?topics=stats', buffered=False)
+            self.assertEqual(first.status_code, 200)
+            self.assertEqual(client.get('/api/stream?topics=stats').status_code, 503)
+            first.close()
+            self.assertEqual(broadcaster.subscriber_count(), 0)
+            second = client.get('/api/stream?topics=stats', buffered=False)
+            self.assertEqual(second.status_code, 200)
+            self.assertTrue(next(second.response).startswith(b'event: stats'))
+            second.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+# Tests du calcul des distances parcourues à partir des positions GPS
+import unittest
+
+import numpy as np
+
+from api.models.usage import UsageAccumulator, haversine_km
+from api.tests.test_ingest import IngestTestCase
+
+# Un millième de degré de latitude, en km
+LAT_STEP_KM = 0.001 * np.pi / 180 * 6371.0088
+
+
+def track(equipment, latitudes, start='2024-05-01T08:00'):
+    """
+    Positions d'un engin sur un méridien, une par minute
+    """
+    count = len(latitudes)
+    ts = np.datetime64(start, 'ns') + np.arange(count) * np.timedelta64(60, 's')
+    return np.full(count, equipment), ts, np.asarray(latitudes, dtype=float), np.zeros(count)
+
+
+class UsageAccumulatorTest(unittest.TestCase):
+
+    def test_haversine(self):
+        """
+        Un degré de latitude mesure environ 111,2 km
+        """
+        self.assertAlmostEqual(float(haversine_km(0.0, 0.0, 1.0, 0.0)), 111.195, places=2)
+
+    def test_jitter_ignored(self):
+        """
+        Des positions qui oscillent sous le seuil de bruit autour d'un point ne comptent pas
+        """
+        usage = UsageAccumulator()
+        usage.add_positions(*track(1, [48.0, 48.00001, 48.0, 48.00002, 48.00001]))
+        self.assertEqual(usage.distances(), {})
+
+    def test_slow_steady_movement_accumulates(self):
+        """
+        Des déplacements réguliers plus courts que le seuil s'additionnent depuis le dernier point retenu
+        """
+        usage = UsageAccumulator()
+        # 3 m par position (seuil 5 m), 20 positions : 57 m au total, dont 54 m retenus par pas de 6 m
+        latitudes = [48.0 + index * 0.000027 for index in range(20)]
+        usage.add_positions(*track(1, latitudes))
+        self.assertAlmostEqual(usage.distances()[1], 9 * 2 * 0.000027 * LAT_STEP_KM * 1000, places=3)
+
+    def test_batches_match_single_batch(self):
+        """
+        Des positions reçues en plusieurs lots donnent la même distance qu'un lot unique
+        """
+        latitudes = [48.0 + index * 0.001 for index in range(10)]
+        whole = UsageAccumulator()
+        whole.add_positions(*track(1, latitudes))
+        split = UsageAccumulator()
+        equipment, ts, lat, lon = track(1, latitudes)
+        split.add_positions(equipment[:4], ts[:4], lat[:4], lon[:4])
+        split.add_positions(equipment[4:], ts[4:], lat[4:], lon[4:])
+        self.assertAlmostEqual(split.distances()[1], whole.distances()[1], places=9)
+        self.assertAlmostEqual(whole.distances()[1], 9 * LAT_STEP_KM, places=6)
+
+    def test_out_of_order_positions_ignored(self):
+        """
+        Une position antérieure à la dernière position connue d'un engin est ignorée
+        """
+        usage = UsageAccumulator()
+        usage.add_positions(*track(1, [48.0, 48.001], start='2024-05-01T09:00'))
+        usage.add_positions(*track(1, [47.0], start='2024-05-01T08:00'))
+        self.assertAlmostEqual(usage.distances()[1], LAT_STEP_KM, places=6)
+
+
+class EquipmentUsageTest(IngestTestCase):
+
+    def test_ingested_positions_reach_usage(self):
+        """
+        Les positions ingérées alimentent la distance du jour de l'engin
+        """
+        self.post_lines('/api/ingest/positions', [
+            {'equipmentId': 5, 'ts': f'2024-05-01T08:0{minute}:00Z', 'lat': 48.0 + minute * 0.01, 'lon': 2.0}
+            for minute in range(4)
+        ])
+        usage = {row['equipment']: row for row in self.client.get('/api/equipment-usage').get_json()}
+        self.assertAlmostEqual(usage['Grue GR-750']['day'], round(3 * 10 * LAT_STEP_KM, 1), places=1)
+        self.assertEqual(usage['Bulldozer BX-250']['day'], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
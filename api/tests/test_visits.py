@@ -0,0 +1,66 @@
+# Tests de la fréquence de visite des clients
+import unittest
+from datetime import datetime
+
+from api.models.visits import VisitIndex
+from api.tests.test_ingest import IngestTestCase
+
+
+class VisitIndexTest(unittest.TestCase):
+
+    def test_counts_and_last_visit(self):
+        """
+        Chaque visite est comptée; une visite plus ancienne que la dernière n'en change pas la date
+        """
+        index = VisitIndex()
+        index.record('Client A', datetime(2024, 5, 2))
+        index.record('Client A', datetime(2024, 5, 1))
+        index.record('Client B', datetime(2024, 5, 3))
+        self.assertEqual(index.rows(), [
+            ('Client A', 2, datetime(2024, 5, 2)),
+            ('Client B', 1, datetime(2024, 5, 3)),
+        ])
+        self.assertEqual(index.rows(['Client B', 'Client Z']), [('Client B', 1, datetime(2024, 5, 3))])
+
+    def test_stale_clients(self):
+        """
+        Les clients non visités depuis une date sont retrouvés du plus ancien au plus récent,
+        y compris après de nombreuses visites d'un même client
+        """
+        index = VisitIndex()
+        index.record('Client A', datetime(2024, 5, 1))
+        index.record('Client B', datetime(2024, 4, 1))
+        for day in range(2, 20):
+            index.record('Client A', datetime(2024, 5, day))
+        index.record('Client C', datetime(2024, 4, 15))
+        self.assertEqual(index.stale(datetime(2024, 5, 1)), [
+            ('Client B', 1, datetime(2024, 4, 1)),
+            ('Client C', 1, datetime(2024, 4, 15)),
+        ])
+        self.assertEqual(index.stale(datetime(2024, 4, 1)), [])
+        self.assertEqual([client for client, _, _ in index.stale(datetime(2024, 6, 1))],
+                         ['Client B', 'Client C', 'Client A'])
+
+
+class ClientVisitsTest(IngestTestCase):
+
+    def test_enter_read_counts_visit(self):
+        """
+        Une entrée d'un engin chez un client compte une visite et avance la date de dernière visite
+        """
+        before = {row['client']: row for row in self.client.get('/api/client-visits').get_json()}
+        self.post_lines('/api/ingest/tag-reads', [
+            {'tagId': 'TAG-004', 'equipmentId': 4, 'event': 'enter', 'client': 'Client D',
+             'ts': '2024-05-01T08:00:00Z'},
+            {'tagId': 'TAG-004', 'equipmentId': 4, 'event': 'exit', 'client': 'Client D',
+             'ts': '2024-05-01T10:00:00Z'},
+        ])
+        after = {row['client']: row for row in self.client.get('/api/client-visits').get_json()}
+        self.assertEqual(after['Client D']['visitCount'], before['Client D']['visitCount'] + 1)
+        self.assertEqual(after['Client D']['lastVisit'], '2024-05-01')
+        self.assertLess(after['Client D']['daysElapsed'], before['Client D']['daysElapsed'])
+        self.assertEqual(after['Client A'], before['Client A'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,22 @@
+# Point d'entrée WSGI de production : gunicorn -c api/gunicorn.conf.py
+import gc
+
+from api.app import create_app
+from api.config.openai_config import setup_openai
+from api.models.repository import preload_data
+from api.services.persistence_service import recover
+
+app = create_app()
+
+# Contrôleurs, client OpenAI et données construits avant le fork (ils sont sinon chargés
+# à la première requête) : les workers les partagent en copie sur écriture
+for view in app.view_functions.values():
+    getattr(view, 'view', None)
+setup_openai()
+# Dernier instantané et fin du journal (si FLEET_DATA_DIR est défini), avant la construction des index
+recover()
+preload_data()
+
+# Les objets déjà créés sont exclus du ramasse-miettes, qui sinon réécrirait leurs en-têtes
+# dans chaque worker et dupliquerait les pages mémoire partagées
+gc.freeze()